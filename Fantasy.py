@@ -1,3 +1,6 @@
+import bisect
+import contextlib
+import itertools
 import random
 import time
 import datetime
@@ -6,10 +9,12 @@ import os
 import sys
 import json
 import sqlite3
+from collections import deque
 import threading
 import traceback
 from pathlib import Path
-from typing import List, Dict, Tuple, Optional, Any, Union
+from typing import List, Dict, Tuple, Optional, Any, Union, Sequence, Iterator
+import numpy as np
 import colorama
 from colorama import Fore, Back, Style
 import base64
@@ -21,12 +26,33 @@ COLOR_SUPPORT = True
 # Import our modular components
 from ai_functions import AIFunctions, AI_SUPPORT, AI_PROVIDERS
 from telegram_functions import TelegramFunctions
+from template_engine import CompiledTemplate, NumpyChooser, TemplateEngine
+from sampling import AliasTable, RecentWindow
+from entity_index import EntityIndex
+from db_connections import WriteError, connections
+from db_schema import migrate_database
+from entity_registry import EntityRegistry
+from event_participants import (CHARACTER_INSERT, FACTION_INSERT, character_timeline, faction_timeline,
+                                participant_rows)
+from event_search import search_available, search_events
+from faction_relations import FactionRelations
+from plot_index import PLOT_DORMANT_AFTER, PLOT_RESOLVED_AFTER, PLOT_SWEEP_INTERVAL, PlotIndex, plot_keywords
+from history import DEFAULT_HISTORY_LIMITS, EVENT_TABLE_COLLECTIONS, WORLD_HISTORIES, bounded, json_default, push, trim
+from state_codec import DEFAULT_CODEC, available_codecs, check_codec, decode_state, row_payload, state_columns
+from world_schema import SCHEMA_VERSION, upgrade_state
+from state_retention import compact_world_state, format_report, start_compaction_thread
+from world_records import CharacterState, LocationState, PlotState, plots_to_records, to_records
+from world_snapshot import WorldSnapshot, next_snapshot, take_snapshot
+from world_sections import (SECTIONS, LazyWorldState, encode_sections, op_section, read_checkpoint,
+                            section_reader, split_ops, write_sections)
+from world_journal import (CHECKPOINT_BYTES, CHECKPOINT_INTERVAL, WorldJournal, apply_delta, fetch_event_summaries,
+                           load_world_at, named_world_state, parent_of, replay_saved, summary_line)
 
 colorama.init(autoreset=True)
 
 # Import event data from the separate module
 from fantasy_events_data import (
-    event_categories, locations, factions, characters,
+    event_categories, category_weights, template_weights, locations, factions, characters,
     magic_fields, resources, monsters, other_realms, inn_names, fill_ins,
     # World state templates
     weather_by_season, extreme_weather_events, natural_disaster_events,
@@ -87,67 +113,226 @@ def load_last_world() -> Dict[str, Any]:
         print(f"Error loading settings: {e}")
     return defaults
 
-def load_world_state(world_name: str) -> Optional[Dict[str, Any]]:
-    """Load the saved world state for a specific world if it exists."""
+def load_world_state(world_name: str) -> Optional[Tuple[LazyWorldState, List[list], str, int, bool]]:
+    """Open the latest checkpoint of a world and read the journal deltas written after it.
+
+    Returns ``(state, deltas, codec, schema_version, in_sections)`` or None if
+    the world has not been saved yet. ``state`` is a LazyWorldState: sections of
+    a checkpoint stored in sections (see world_sections.py) are only read once
+    they are used. One-piece checkpoints (``in_sections`` False) and checkpoints
+    of an older schema are decoded whole and upgraded to the current schema
+    (see world_schema.py). ``codec`` and ``schema_version`` are what the
+    checkpoint was stored with.
+    """
     db_path = _SCRIPT_DIR / f"{world_name.lower().replace(' ', '_')}_events.db"
 
     try:
         if db_path.exists():
-            conn = sqlite3.connect(str(db_path))
-            cursor = conn.cursor()
+            cursor = connections(db_path).read().cursor()
 
-            # Get the latest saved world state
+            # Get the latest checkpoint
             cursor.execute('''
-            SELECT state_json FROM world_state
+            SELECT id, state_json, state_data, codec, schema_version, journal_id FROM world_state
             ORDER BY id DESC
             LIMIT 1
             ''')
 
             result = cursor.fetchone()
-            conn.close()
+            if not result:
+                return None
+            checkpoint_id, state_json, state_data, codec, version, journal_id = result
+            codec, version = codec or 'json', version or 0
 
-            if result and result[0]:
-                return json.loads(result[0])
+            # Every event journaled since the checkpoint, oldest first
+            cursor.execute('''
+            SELECT delta_json FROM world_journal
+            WHERE id > ?
+            ORDER BY id
+            ''', (journal_id or 0,))
+            deltas = [json.loads(row[0]) for row in cursor.fetchall()]
+
+            in_sections = row_payload(state_json, state_data) is None
+            if in_sections and version == SCHEMA_VERSION:
+                state = LazyWorldState(section_reader(str(db_path), checkpoint_id))
+            elif version == SCHEMA_VERSION:
+                state = LazyWorldState.from_state(decode_state(row_payload(state_json, state_data), codec))
+            else:
+                # The journal after an older checkpoint is in that checkpoint's
+                # schema too: replay it first, then upgrade the result
+                saved = read_checkpoint(cursor, checkpoint_id, state_json, state_data, codec)
+                if deltas:
+                    replay_saved(saved, deltas)
+                    deltas = []
+                state = LazyWorldState.from_state(upgrade_state(saved, version))
+            return state, deltas, codec, version, in_sections
     except Exception as e:
         print(f"Error loading world state: {e}")
 
     return None
 
+# Independent random streams owned by each generator (see seed_rng_streams):
+#   template - event category, template and fill-in choices
+#   world    - world creation, time of day, season length and world changes
+#   weather  - weather shifts
+RNG_STREAMS = ("template", "world", "weather")
+
+# Redraws allowed before a template inside the no-repeat window is used anyway
+NO_REPEAT_ATTEMPTS = 8
+
+
+def new_rng_seed() -> int:
+    """Return a fresh random seed for a new world."""
+    return random.SystemRandom().randrange(2**63)
+
 class FantasyWorldEventGenerator:
     def __init__(self, world_name: str, api_key: Optional[str] = None, telegram_token: Optional[str] = None,
                  telegram_chat_id: Optional[int] = None, debug_mode: bool = False,
-                 ai_provider: str = "gemini", ai_model: str = "", ai_base_url: str = ""):
+                 ai_provider: str = "gemini", ai_model: str = "", ai_base_url: str = "",
+                 seed: Optional[int] = None, no_repeat_window: int = 0,
+                 history_limits: Optional[Dict[str, Optional[int]]] = None,
+                 state_codec: Optional[str] = None):
         self.world_name = world_name
         self.event_count = 0
         self.debug_mode = debug_mode
         self.ai_event_mode = "hybrid"  # default, can be overridden after init
+        self.headless = False  # set by the simulation runner to silence console output and Telegram
+
+        # In-memory history sizes per collection; older entries live in the database
+        self.history_limits = dict(DEFAULT_HISTORY_LIMITS, **(history_limits or {}))
+        # (collection, owner, entry) evicted from memory, written with the next snapshot
+        self._archive_queue: List[Tuple[str, str, Any]] = []
+        # Keyword -> plot lookup over world_state['active_plots']
+        self.plot_index = PlotIndex()
+
+        # Read-only copy of world_state for other threads, replaced after every event
+        self._snapshot: Optional[WorldSnapshot] = None
+
+        # Changes of the current event, written as one journal row by update_world_state()
+        self.journal = WorldJournal()
+        self.checkpoint_interval = CHECKPOINT_INTERVAL
+        self.checkpoint_bytes = CHECKPOINT_BYTES
+
+        # Define event categories and templates
+        self.event_categories = event_categories
+
+        # World-specific elements
+        self.locations = locations
+        self.factions = factions
+        self.characters = characters
+        self.magic_fields = magic_fields
+        self.resources = resources
+        self.monsters = monsters
+        self.other_realms = other_realms
+        self.inn_names = inn_names
+
+        # Fill-in variables for event templates
+        self.fill_ins = fill_ins
+
+        # Validate and compile every template once at load; a placeholder with no
+        # fill-in pool or an empty one, or a stray brace, raises TemplateError
+        # here instead of leaking into events
+        load_start = time.perf_counter()
+        self.template_engine = self._build_template_engine()
+        self.compiled_categories = self.template_engine.compile_all(self.event_categories)
+        self.feature_engine = TemplateEngine(location_feature_fill_ins)
+        self.compiled_features = self.feature_engine.compile_all(
+            {"location_feature_templates": location_feature_templates})["location_feature_templates"]
+        self.debug_print(f"Compiled {len(self.template_engine.index) + len(self.feature_engine.index)} "
+                         f"templates in {(time.perf_counter() - load_start) * 1000:.2f} ms")
+        self.category_names = tuple(self.event_categories)
+        self.character_types = tuple(self.characters)
+
+        # Alias-method sampling tables, rebuilt only when the weights change
+        self.category_weights: Dict[str, float] = {}
+        self.template_weights: Dict[str, Tuple[float, ...]] = {}
+        self.template_tables: Dict[str, AliasTable] = {}
+        self.set_category_weights(category_weights)
+        self.set_template_weights(template_weights)
+
+        # Optional "no repeat within the last K templates" window (0 = off)
+        self.recent_templates = RecentWindow(no_repeat_window)
+
+        # Multi-pattern matcher over all entity names, used by extract_event_data
+        self.entity_index = EntityIndex.from_world(self.locations, self.factions, self.characters)
 
         # Initialize AI module with debug mode and provider config
         self.ai = AIFunctions(api_key, debug=debug_mode, provider=ai_provider, model=ai_model, base_url=ai_base_url)
         self.gemini_available = self.ai.ai_available  # backwards compat
 
-        # Try to load existing world state first, create new only if none exists
+        # Initialize database for event history
+        self.db_path = str(_SCRIPT_DIR / f"{world_name.lower().replace(' ', '_')}_events.db")
+        # One writer connection and a read connection per thread (see db_connections.py)
+        self.db = connections(self.db_path)
+        self.initialize_database()
+
+        # Load the latest event count from database
+        self.event_count = self.get_last_event_count()
+
+        # Try to load existing world state first, create new only if none exists.
+        # world_state is a LazyWorldState: each section is read, prepared and
+        # brought up to date with the journal on first use (_prepare_section).
+        self._relations: Optional[FactionRelations] = None
+        # Sections changed since the last checkpoint, the only ones it writes
+        self._dirty_sections = set()
+        # Journal operations not yet replayed into their (unloaded) sections
+        self._pending_ops: Dict[str, List[list]] = {}
+        # Set when loading a section trimmed its histories: checkpoint at the next save
+        self._checkpoint_due = False
+        # Set when the background writer lost a unit: checkpoint every section at the next save
+        self._writes_lost = False
         existing_state = load_world_state(world_name)
+        deltas: List[list] = []
         if existing_state:
             print(f"Loaded existing world state for {world_name}")
-            self.world_state = existing_state
-            # Initialize events counter if not present
-            if 'events_since_season_change' not in self.world_state:
-                self.world_state['events_since_season_change'] = 0
+            self.world_state, deltas, saved_codec, saved_version, in_sections = existing_state
+            # A world keeps the codec it was saved with unless told otherwise
+            self.state_codec = check_codec(state_codec or saved_codec)
+            if self.state_codec != saved_codec:
+                self.migrate_state_rows()
+            # Checkpoints saved with an older schema were upgraded on load, and
+            # one-piece checkpoints are split into sections; save the result
+            needs_checkpoint = (saved_version < SCHEMA_VERSION or self.state_codec != saved_codec
+                                or not in_sections)
+            self._pending_ops = split_ops(deltas)
+            self._dirty_sections.update(self._pending_ops)
+            self.world_state.prepare = self._prepare_section
+            # The world's own seed wins over the one passed in; worlds saved before
+            # seeding existed get a fresh one.
+            if self.world_state.get('rng_seed') is None:
+                self.world_state['rng_seed'] = seed if seed is not None else new_rng_seed()
+            elif seed is not None and seed != self.world_state['rng_seed']:
+                self.debug_print(f"Ignoring seed {seed}: {world_name} already uses seed {self.world_state['rng_seed']}")
+            self.seed_rng_streams(self.world_state['rng_seed'], self.event_count)
+            # Loading the "world" section above replayed the names journaled since
+            # the checkpoint in their original order; names new to the data
+            # module come after them.
+            self._journaled_entities = len(self.entities)
+            self.entities.add_world(self.locations, self.factions, self.characters)
         else:
             print(f"Creating new randomized world state for {world_name}")
-            self.world_state = self.create_randomized_world_state()
-
-        # Initialize database for event history
-        self.db_path = str(_SCRIPT_DIR / f"{world_name.lower().replace(' ', '_')}_events.db")
-        self.initialize_database()
+            self.state_codec = check_codec(state_codec or DEFAULT_CODEC)
+            self.seed_rng_streams(seed if seed is not None else new_rng_seed())
+            self.entities = EntityRegistry.from_world(self.locations, self.factions, self.characters)
+            state = self.create_randomized_world_state()
+            state['rng_seed'] = self.rng_seed
+            self.world_state = LazyWorldState.from_state(state, self._prepare_section).load_all()
+            self._journaled_entities = len(self.entities)
+            needs_checkpoint = True
+        self._journal_since_checkpoint = len(deltas)
+        self._journal_bytes_since_checkpoint = 0
+        if needs_checkpoint:
+            self._dirty_sections.update(SECTIONS)
+            self.update_world_state(checkpoint=True)
+
+        # From here on the writes of each event are committed by a background
+        # thread, in groups, while the next event is generated (see db_connections.py).
+        # A write it cannot commit is printed and raised from the next save, and
+        # the next save checkpoints the whole world (see _on_write_lost)
+        self.db.start_background_writer(on_error=self._on_write_lost)
 
         # Initialize Telegram module with debug mode
         self.telegram = TelegramFunctions(telegram_token, telegram_chat_id, debug=debug_mode, db_path=self.db_path)
 
-        # Load the latest event count from database
-        self.event_count = self.get_last_event_count()
-
         # Create directories for saving generated content
         self.world_dir = _SCRIPT_DIR / f"{world_name.lower().replace(' ', '_')}_world"
         self.images_dir = self.world_dir / "images"
@@ -157,66 +342,268 @@ class FantasyWorldEventGenerator:
         for directory in [self.world_dir, self.images_dir, self.events_dir, self.maps_dir]:
             directory.mkdir(exist_ok=True, parents=True)
 
-        # Define event categories and templates
-        self.event_categories = event_categories
+    def _on_write_lost(self, error: Exception) -> None:
+        """Called on the writer thread when a unit of work could not be committed.
 
-        # World-specific elements
-        self.locations = locations
-        self.factions = factions
-        self.characters = characters
-        self.magic_fields = magic_fields
-        self.resources = resources
-        self.monsters = monsters
-        self.other_realms = other_realms
-        self.inn_names = inn_names
+        The lost event's row and journal row are gone, but the world in memory
+        and the journal rows of the events after it already include it, so a
+        replay across the gap would fail or diverge. update_world_state() sees
+        the flag and writes every section as a new checkpoint, which later
+        loads start from.
+        """
+        self._writes_lost = True
 
-        # Fill-in variables for event templates
-        self.fill_ins = fill_ins
+    def close(self) -> None:
+        """Commit what is still queued and close the world's database connections.
+
+        If the background writer lost a unit since the last save, the whole
+        world is checkpointed first, so it reopens without crossing the gap.
+        """
+        try:
+            self.db.flush()
+        except WriteError as e:
+            print(f"Error writing the last events to the database: {e}")
+        if self._writes_lost:
+            self.update_world_state()
+        self.db.close()
 
     def debug_print(self, message: str) -> None:
         """Print debug messages only if debug mode is enabled."""
         if self.debug_mode:
             print(message)
 
+    def announce(self, message: str) -> None:
+        """Print a world-change notice unless running headless."""
+        if not self.headless:
+            print(message)
+
+    def named_state(self) -> Dict[str, Any]:
+        """Return a copy of the world state with entity IDs translated back to names.
+
+        world_state stores locations, factions and characters as integer IDs; use
+        this view wherever the state is shown to people or handed to the AI.
+        'relations' becomes a list of the non-neutral faction pairs, each a dict
+        with 'factions' (two names), 'status' and 'events'.
+        """
+        self.world_state.load_all()
+        return named_world_state(self.world_state, self.relations, self.entities, self._event_summaries)
+
+    def world_at(self, event_id: int) -> Optional[Dict[str, Any]]:
+        """Return the named world state as it was right after event ``event_id``.
+
+        Rebuilt from the nearest earlier checkpoint and the journal, so nothing is
+        re-rolled; None if the event predates the journal.
+        """
+        try:
+            return load_world_at(self.db_path, event_id, self.history_limits)
+        except Exception as e:
+            self.debug_print(f"Error rebuilding world at event {event_id}: {e}")
+            return None
+
+    @property
+    def relations(self) -> FactionRelations:
+        """The world's faction relations, loaded with the "relations" section on first use."""
+        if self._relations is None:
+            self.world_state.load('relations')
+        return self._relations
+
+    @relations.setter
+    def relations(self, relations: FactionRelations) -> None:
+        self._relations = relations
+
+    def _prepare_section(self, section: str, data: Dict[str, Any]) -> None:
+        """Make a section of world_state that was just read ready for use.
+
+        Called by LazyWorldState before the section's keys become visible:
+        restores integer ID keys, turns every history list into a ring buffer of
+        its configured size and replays the journal operations recorded for the
+        section since its checkpoint. Entries trimmed from a loaded history are
+        queued for the history archive.
+        """
+        archived = len(self._archive_queue)
+        if section == 'world':
+            if 'entities' in data:
+                self.entities = EntityRegistry(data['entities'])
+            # The registry's name list is saved with every checkpoint
+            data['entities'] = self.entities.names
+        elif section == 'relations':
+            if 'relations' in data or self._relations is None:
+                self._relations = FactionRelations.from_dict(data.pop('relations', {}))
+            limit = self.history_limits['relation_events']
+            for faction1, faction2, entry in self._relations.set_history_limit(limit):
+                self._archive_queue.append(('relation_events', self._relation_owner(faction1, faction2), entry))
+            for faction in self.factions:
+                self._relations.add_faction(self.entities.intern(faction))
+        elif section in ('characters', 'locations'):
+            EntityRegistry.restore_int_keys(data)
+        ops = self._pending_ops.pop(section, ())
+        self._bound_histories(section, data)
+        if ops:
+            apply_delta(ops, data, self._relations, self.entities, self.history_limits)
+            # Entries the journal created come back as dicts holding plain lists
+            self._bound_histories(section, data)
+        if section == 'plots':
+            self.plot_index.rebuild(data['active_plots'])
+        if len(self._archive_queue) > archived:
+            # Save the trimmed section with the archived entries, or the next
+            # load would trim and archive them again
+            self._dirty_sections.add(section)
+            self._checkpoint_due = True
+
+    def _bound_histories(self, section: str, data: Dict[str, Any]) -> None:
+        """Make the entries of a section records and their history lists ring buffers.
+
+        Histories that already are ring buffers are left alone, so this can run
+        again after the journal replay to catch the entries it created.
+        """
+        def bounded_history(collection: str, owner: Any, entries) -> deque:
+            return entries if isinstance(entries, deque) else self._trimmed(collection, owner, entries)
+
+        if section == 'characters':
+            data['character_status'] = to_records(data['character_status'], CharacterState)
+            for char_id, char_data in data['character_status'].items():
+                char_data.events = bounded_history('character_events', char_id, char_data.events)
+                char_data.developments = bounded_history('developments', char_id, char_data.developments)
+        elif section == 'locations':
+            data['location_status'] = to_records(data['location_status'], LocationState)
+            for location_id, location_data in data['location_status'].items():
+                location_data.events = bounded_history('location_events', location_id, location_data.events)
+        elif section == 'plots':
+            data['active_plots'] = plots_to_records(data['active_plots'])
+            for plot in data['active_plots']:
+                plot.events = bounded_history('plot_events', plot.name, plot.events)
+        elif section == 'history':
+            for collection in WORLD_HISTORIES:
+                data[collection] = bounded_history(collection, '', data[collection])
+
+    def _trimmed(self, collection: str, owner: Any, entries) -> deque:
+        buffer, overflow = trim(collection, entries, self.history_limits.get(collection))
+        self._archive_queue.extend((collection, str(owner), entry) for entry in overflow)
+        return buffer
+
+    def _new_history(self, collection: str, entries=()) -> deque:
+        """Return an empty (or pre-filled) ring buffer sized for ``collection``."""
+        return bounded(entries, self.history_limits.get(collection))
+
+    # --- journaled world_state changes ---------------------------------------
+    # Every change an event makes goes through these helpers so that it is
+    # also recorded in self.journal and written as that event's journal row.
+
+    def _set_state(self, path: Sequence[Any], value: Any) -> None:
+        parent_of(self.world_state, path)[path[-1]] = value
+        self.journal.set(path, value)
+
+    def _add_state(self, path: Sequence[Any], amount: int) -> None:
+        parent_of(self.world_state, path)[path[-1]] += amount
+        self.journal.add(path, amount)
+
+    def _append_state(self, path: Sequence[Any], value: Any) -> None:
+        parent_of(self.world_state, path)[path[-1]].append(value)
+        self.journal.append(path, value)
+
+    def _pop_state(self, path: Sequence[Any]) -> None:
+        del parent_of(self.world_state, path)[path[-1]]
+        self.journal.pop(path)
+
+    def _record_history(self, collection: str, owner: Any, path: Sequence[Any], entry: Any) -> None:
+        """Append to the history ring buffer at ``path``, queueing any evicted entry for the archive."""
+        evicted = push(collection, parent_of(self.world_state, path)[path[-1]], entry)
+        if evicted is not None:
+            self._archive_queue.append((collection, str(owner), evicted))
+        self.journal.push(collection, path, entry)
+
+    def _record_relation(self, faction1: int, faction2: int, entry: Dict[str, Any]) -> None:
+        evicted = self.relations.record(faction1, faction2, entry)
+        if evicted is not None:
+            self._archive_queue.append(('relation_events', self._relation_owner(faction1, faction2), evicted))
+        self.journal.relation_event(faction1, faction2, entry)
+
+    def _set_relation(self, faction1: int, faction2: int, status: str) -> None:
+        self.relations.set_status(faction1, faction2, status)
+        self.journal.relation(faction1, faction2, status)
+
+    @staticmethod
+    def _relation_owner(faction1: int, faction2: int) -> str:
+        """Archive owner key of a faction pair, independent of argument order."""
+        return f"{min(faction1, faction2)}_{max(faction1, faction2)}"
+
+    def snapshot_state(self) -> Dict[str, Any]:
+        """Return the whole JSON-ready world state, as update_world_state() saves it in sections."""
+        self.world_state.load_all()
+        return dict(self.world_state, relations=self.relations.to_dict())
+
+    @property
+    def snapshot(self) -> Optional[WorldSnapshot]:
+        """The latest published WorldSnapshot (None before the first one).
+
+        Safe to read from any thread without locking; see world_snapshot.py.
+        """
+        return self._snapshot
+
+    def publish_snapshot(self, ops: Optional[Sequence[list]] = None) -> WorldSnapshot:
+        """Publish a new snapshot of world_state and return it.
+
+        With the journal ``ops`` of the event just applied, only what they
+        changed is copied from the previous snapshot; otherwise (or for the
+        first snapshot) the whole state is.
+        """
+        if self._snapshot is None or ops is None:
+            self.world_state.load_all()
+            snapshot = take_snapshot(self.event_count, self.world_state, self.relations, self.entities.names)
+        else:
+            snapshot = next_snapshot(self._snapshot, ops, self.event_count, self.world_state,
+                                     self.relations, self.entities.names)
+        # One assignment: readers see either the old snapshot or the new one
+        self._snapshot = snapshot
+        return snapshot
+
+    def _section_state(self, section: str) -> Dict[str, Any]:
+        """Return the JSON-ready keys of one world_state section."""
+        if section == 'relations':
+            return {'relations': self.relations.to_dict()}
+        return self.world_state.section(section)
+
+    def seed_rng_streams(self, seed: int, position: int = 0) -> None:
+        """Create this world's independent random streams from its seed.
+
+        Each stream in RNG_STREAMS gets its own random.Random, derived from the
+        world seed, the stream name and the event count it resumes from. The same
+        seed therefore replays the same event sequence, a restarted world does not
+        repeat earlier draws, and separate worlds never share generator state.
+        """
+        self.rng_seed = seed
+        for stream in RNG_STREAMS:
+            setattr(self, f"{stream}_rng", random.Random(f"{seed}:{stream}:{position}"))
+        # NumPy stream for generate_events(); seeded the same way so batches are reproducible too
+        self.batch_rng = np.random.default_rng(random.Random(f"{seed}:batch:{position}").getrandbits(128))
+
     def create_randomized_world_state(self) -> Dict[str, Any]:
-        """Create a randomized initial world state for this fantasy world."""
-        # First store all imported data as instance variables to ensure they're available
-        if not hasattr(self, 'factions'):
-            self.factions = factions
-            self.locations = locations
-            self.characters = characters
-            self.magic_fields = magic_fields
-            self.resources = resources
-            self.monsters = monsters
-            self.other_realms = other_realms
-            self.inn_names = inn_names
-            self.fill_ins = fill_ins
-            self.event_categories = event_categories
+        """Create a randomized initial world state for this fantasy world.
 
+        Faction relations are not part of the returned dict; they are set up in
+        self.relations.
+        """
         # Randomize starting year (between 500 and 2000)
-        starting_year = random.randint(500, 2000)
+        starting_year = self.world_rng.randint(500, 2000)
 
         # Randomize starting season
         seasons = ['spring', 'summer', 'autumn', 'winter']
-        starting_season = random.choice(seasons)
+        starting_season = self.world_rng.choice(seasons)
 
         # Randomize time of day
         times_of_day = ['morning', 'afternoon', 'evening', 'night']
-        starting_time = random.choice(times_of_day)
+        starting_time = self.world_rng.choice(times_of_day)
 
         # Randomize starting weather based on season
-        starting_weather = random.choice(weather_by_season[starting_season])
+        starting_weather = self.weather_rng.choice(weather_by_season[starting_season])
 
         # Create initial faction relations (some randomly friendly, neutral, or hostile)
-        initial_relations = {}
-        for i, faction1 in enumerate(self.factions):
-            for faction2 in self.factions[i+1:]:
-                relation_key = f"{faction1}_{faction2}"
-                relation_status = random.choice(['friendly', 'neutral', 'neutral', 'neutral', 'hostile'])  # Weighted toward neutral
-                initial_relations[relation_key] = {
-                    'status': relation_status,
-                    'events': []
-                }
+        faction_ids = [self.entities.intern(faction) for faction in self.factions]
+        self.relations = FactionRelations(faction_ids)
+        for i, faction1 in enumerate(faction_ids):
+            for faction2 in faction_ids[i+1:]:
+                relation_status = self.world_rng.choice(['friendly', 'neutral', 'neutral', 'neutral', 'hostile'])  # Weighted toward neutral
+                self.relations.set_status(faction1, faction2, relation_status)
 
         # Set up a few random characters in random locations
         character_status = {}
@@ -225,108 +612,107 @@ class FantasyWorldEventGenerator:
 
         for _ in range(num_initial_chars):
             # Get a random character that hasn't been used yet
-            char_type = random.choice(list(self.characters.keys()))
+            char_type = self.world_rng.choice(list(self.characters.keys()))
             available_chars = [c for c in self.characters[char_type] if c not in used_chars]
 
             if not available_chars:
                 continue
 
-            char_name = random.choice(available_chars)
+            char_name = self.world_rng.choice(available_chars)
             used_chars.add(char_name)
 
             # Place them in a random location
-            char_location = random.choice(self.locations)
+            char_location = self.world_rng.choice(self.locations)
 
             # Create their status
-            character_status[char_name] = {
-                'type': char_type,
-                'location': char_location,
-                'last_seen': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                'events': []
-            }
+            character_status[self.entities.intern(char_name)] = CharacterState(
+                type=char_type,
+                location=self.entities.intern(char_location),
+                last_seen=datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                events=[],
+                event_total=0,
+                developments=[]
+            )
 
         # Create initial location status with random features
         location_status = {}
         for location in self.locations:
             # Random number of notable features (0-3)
-            num_features = random.randint(0, 3)
+            num_features = self.world_rng.randint(0, 3)
             features = []
 
-            feature_options = []
-            for template in location_feature_templates:
-                # Fill in the template with random options from the fill-in data
-                filled = template
-                for key, options in location_feature_fill_ins.items():
-                    placeholder = "{" + key + "}"
-                    if placeholder in filled:
-                        filled = filled.replace(placeholder, random.choice(options))
-                feature_options.append(filled)
+            feature_options = [self.feature_engine.render(template, self.world_rng)
+                                for template in self.compiled_features]
 
             for _ in range(num_features):
                 if feature_options:
-                    feature = random.choice(feature_options)
+                    feature = self.world_rng.choice(feature_options)
                     feature_options.remove(feature)  # No duplicate features
                     features.append(feature)
 
             # Set up location with characters present being those we assigned to this location
-            characters_present = [char for char, data in character_status.items() if data['location'] == location]
-
-            location_status[location] = {
-                'events': [],
-                'notable_features': features,
-                'characters_present': characters_present
-            }
+            location_id = self.entities.intern(location)
+            characters_present = [char for char, data in character_status.items() if data.location == location_id]
+
+            location_status[location_id] = LocationState(
+                events=[],
+                event_total=0,
+                notable_features=features,
+                characters_present=characters_present
+            )
 
         # Create a randomized world description
         description_elements = [
-            f"{self.world_name} is a {random.choice(world_description_adjectives)} realm",
-            f"where {random.choice(world_description_themes)}",
-            f"and {random.choice(world_description_hooks)}."
+            f"{self.world_name} is a {self.world_rng.choice(world_description_adjectives)} realm",
+            f"where {self.world_rng.choice(world_description_themes)}",
+            f"and {self.world_rng.choice(world_description_hooks)}."
         ]
         world_description = " ".join(description_elements)
 
         # Create 0-2 initial active plots
-        num_plots = random.randint(0, 2)
+        num_plots = self.world_rng.randint(0, 2)
         active_plots = []
 
         plot_templates = [
             {
-                'name': f"Conflict between {random.choice(self.factions)} and {random.choice(self.factions)}",
-                'description': f"Tensions are rising as two powerful factions clash over {random.choice(plot_conflict_subjects)}.",
+                'name': f"Conflict between {self.world_rng.choice(self.factions)} and {self.world_rng.choice(self.factions)}",
+                'description': f"Tensions are rising as two powerful factions clash over {self.world_rng.choice(plot_conflict_subjects)}.",
                 'status': 'active'
             },
             {
-                'name': f"The {random.choice(plot_location_phenomena)} of {random.choice(self.locations)}",
-                'description': f"Something strange is happening in this location, affecting the {random.choice(plot_location_affected)}.",
+                'name': f"The {self.world_rng.choice(plot_location_phenomena)} of {self.world_rng.choice(self.locations)}",
+                'description': f"Something strange is happening in this location, affecting the {self.world_rng.choice(plot_location_affected)}.",
                 'status': 'active'
             },
             {
-                'name': f"Rise of {random.choice(plot_rising_forces)}",
-                'description': f"Change is coming to the world as {random.choice(plot_world_changes)}.",
+                'name': f"Rise of {self.world_rng.choice(plot_rising_forces)}",
+                'description': f"Change is coming to the world as {self.world_rng.choice(plot_world_changes)}.",
                 'status': 'active'
             }
         ]
 
         for _ in range(num_plots):
-            plot_template = random.choice(plot_templates)
+            plot_template = self.world_rng.choice(plot_templates)
             plot_templates.remove(plot_template)  # No duplicate plots
 
             # Add some randomized elements to the plot
             plot = plot_template.copy()
-            plot['keywords'] = [word.lower() for word in plot['name'].split() if len(word) > 4][:5]
+            plot['id'] = len(active_plots)
+            plot['keywords'] = plot_keywords(plot['name'])
             plot['events'] = []
+            plot['last_event'] = 0
 
             # Add random characters to the plot
-            num_chars = random.randint(1, 3)
-            plot_chars = random.sample(list(character_status.keys()), min(num_chars, len(character_status)))
+            num_chars = self.world_rng.randint(1, 3)
+            plot_chars = self.world_rng.sample(list(character_status.keys()), min(num_chars, len(character_status)))
             plot['characters'] = plot_chars
 
             # Add random locations to the plot
-            num_locs = random.randint(1, 2)
-            plot_locs = random.sample(self.locations, min(num_locs, len(self.locations)))
-            plot['locations'] = plot_locs
+            num_locs = self.world_rng.randint(1, 2)
+            plot_locs = self.world_rng.sample(self.locations, min(num_locs, len(self.locations)))
+            plot['locations'] = [self.entities.intern(loc) for loc in plot_locs]
 
-            active_plots.append(plot)
+            active_plots.append(PlotState.from_dict(plot))
 
         # Construct and return the randomized world state
         return {
@@ -336,118 +722,174 @@ class FantasyWorldEventGenerator:
                 "time_of_day": starting_time,
                 "weather": starting_weather
             },
-            "relations": initial_relations,
             "character_status": character_status,
             "location_status": location_status,
             "active_plots": active_plots,
+            "next_plot_id": len(active_plots),
             "event_history": [],
+            "social_events": [],
+            "economic_events": [],
+            "magical_events": [],
+            "realm_shifts": [],
             "world_description": world_description,
             "events_since_season_change": 0  # Add counter for season change
         }
 
     def choose_random(self, options: List) -> str:
         """Select a random item from a list."""
-        return random.choice(options)
+        return self.template_rng.choice(options)
 
     def get_random_character(self) -> Tuple[str, str]:
         """Return a random character type and name."""
-        char_type = random.choice(list(self.characters.keys()))
-        char_name = random.choice(self.characters[char_type])
+        char_type = self.template_rng.choice(self.character_types)
+        char_name = self.template_rng.choice(self.characters[char_type])
         return char_type, char_name
 
+    def _build_template_engine(self) -> TemplateEngine:
+        """Build the compiled template engine over this world's fill-in pools."""
+        pools = dict(self.fill_ins)
+        # World elements take precedence over fill_ins entries of the same name
+        pools.update({
+            "location": self.locations,
+            "location2": self.locations,
+            "faction": self.factions,
+            "faction2": self.factions,
+            "magic_field": self.magic_fields,
+            "resource": self.resources,
+            "valuable_resource": self.resources,
+            "monster_type": self.monsters,
+            "other_realm": self.other_realms,
+            "inn_name": self.inn_names,
+        })
+        return TemplateEngine(pools, self.characters)
+
+    def set_category_weights(self, weights: Dict[str, float]) -> None:
+        """Set relative category weights, e.g. more "conflict" in wartime.
+
+        Categories missing from ``weights`` keep a weight of 1.0. The alias table
+        is only rebuilt when the weights actually change.
+        """
+        unknown = set(weights) - set(self.category_names)
+        if unknown:
+            raise ValueError(f"Unknown event categories in weights: {', '.join(sorted(unknown))}")
+        new_weights = {c: float(weights.get(c, 1.0)) for c in self.category_names}
+        if new_weights == self.category_weights:
+            return
+        self.category_table = AliasTable([new_weights[c] for c in self.category_names])
+        self.category_weights = new_weights
+
+    def set_template_weights(self, weights: Dict[str, Sequence[float]]) -> None:
+        """Set per-template weights for some categories; the rest stay uniform.
+
+        Each entry needs one weight per template in that category. Only tables
+        whose weights changed are rebuilt.
+        """
+        for category in self.category_names:
+            size = len(self.compiled_categories[category])
+            new_weights = tuple(float(w) for w in weights.get(category, (1.0,) * size))
+            if len(new_weights) != size:
+                raise ValueError(f"Category '{category}' has {size} templates but {len(new_weights)} template weights")
+            if self.template_weights.get(category) != new_weights:
+                self.template_tables[category] = AliasTable(new_weights)
+                self.template_weights[category] = new_weights
+
+    def _pick_template(self, category: str, index: int, rng: Any) -> CompiledTemplate:
+        """Return template ``index`` of ``category``, redrawing it if it was used recently."""
+        templates = self.compiled_categories[category]
+        template = templates[index]
+        recent = self.recent_templates
+        if recent.size:
+            table = self.template_tables[category]
+            for _ in range(NO_REPEAT_ATTEMPTS):
+                if template not in recent:
+                    break
+                template = templates[table.sample(rng)]
+            if template in recent:
+                # Most of the category is in the window: pick among the rest directly,
+                # by weight, or accept a repeat if the window covers all of it that
+                # can be drawn at all
+                fresh = [(t, w) for t, w in zip(templates, self.template_weights[category])
+                         if w > 0 and t not in recent]
+                if fresh:
+                    cumulative = list(itertools.accumulate(w for _, w in fresh))
+                    pick = bisect.bisect_right(cumulative, rng.random() * cumulative[-1])
+                    template = fresh[min(pick, len(fresh) - 1)][0]
+            recent.add(template)
+        return template
+
     def fill_template(self, template: str) -> str:
-        """Fill a template string with random elements from the world."""
-        result = template
-
-        # Replace location placeholders
-        while "{location}" in result:
-            result = result.replace("{location}", self.choose_random(self.locations), 1)
-
-        # Replace second location if needed
-        if "{location2}" in result:
-            loc2 = self.choose_random(self.locations)
-            # Ensure it's different from the first location if possible
-            if "{location}" in result and len(self.locations) > 1:
-                current_loc = result.split("{location}")[1].split()[0]
-                while loc2 == current_loc and len(self.locations) > 1:
-                    loc2 = self.choose_random(self.locations)
-            result = result.replace("{location2}", loc2)
-
-        # Replace faction placeholders
-        while "{faction}" in result:
-            result = result.replace("{faction}", self.choose_random(self.factions), 1)
-
-        # Replace second faction if needed
-        if "{faction2}" in result:
-            fac2 = self.choose_random(self.factions)
-            # Ensure it's different from the first faction
-            if "{faction}" in result and len(self.factions) > 1:
-                current_fac = result.split("{faction}")[1].split()[0]
-                while fac2 == current_fac and len(self.factions) > 1:
-                    fac2 = self.choose_random(self.factions)
-            result = result.replace("{faction2}", fac2)
-
-        # Character placeholders
-        if "{character_type}" in result or "{character_name}" in result:
-            char_type, char_name = self.get_random_character()
-            result = result.replace("{character_type}", char_type)
-            result = result.replace("{character_name}", char_name)
-
-        # Second character if needed
-        if "{character_name2}" in result:
-            char_type2, char_name2 = self.get_random_character()
-            # Ensure different from first character
-            if "{character_name}" in result:
-                while char_name2 == char_name and sum(len(chars) for chars in self.characters.values()) > 1:
-                    char_type2, char_name2 = self.get_random_character()
-            result = result.replace("{character_name2}", char_name2)
-
-        # Other specific placeholders
-        if "{magic_field}" in result:
-            result = result.replace("{magic_field}", self.choose_random(self.magic_fields))
-
-        if "{resource}" in result:
-            result = result.replace("{resource}", self.choose_random(self.resources))
-
-        if "{valuable_resource}" in result:
-            result = result.replace("{valuable_resource}", self.choose_random(self.resources))
-
-        if "{monster_type}" in result:
-            result = result.replace("{monster_type}", self.choose_random(self.monsters))
-
-        if "{other_realm}" in result:
-            result = result.replace("{other_realm}", self.choose_random(self.other_realms))
-
-        if "{inn_name}" in result:
-            result = result.replace("{inn_name}", self.choose_random(self.inn_names))
-
-        # Replace other template variables from fill_ins dictionary
-        for key, options in self.fill_ins.items():
-            placeholder = "{" + key + "}"
-            while placeholder in result:
-                result = result.replace(placeholder, self.choose_random(options), 1)
-
-        return result
+        """Fill a template string with random elements from the world.
+
+        {location2}, {faction2} and {character_name2} are guaranteed to differ from
+        the first {location}, {faction} and {character_name} whenever the pool has
+        more than one option.
+        """
+        return self.template_engine.render_template(template, self.template_rng)
 
     def generate_event(self) -> Tuple[str, str]:
-        """Generate a random event from the fantasy world. Returns a tuple of (formatted_event, category)."""
-        # Choose a random category
-        category = random.choice(list(self.event_categories.keys()))
+        """Generate a random event from the fantasy world. Returns a tuple of (formatted_event, category).
 
-        # Choose a random template from that category
-        template = random.choice(self.event_categories[category])
+        The event is numbered with the ID save_event_to_db() will give it.
+        """
+        # Choose a weighted random category
+        category = self.category_names[self.category_table.sample(self.template_rng)]
+
+        # Choose a weighted random pre-compiled template from that category
+        index = self.template_tables[category].sample(self.template_rng)
+        template = self._pick_template(category, index, self.template_rng)
 
         # Fill the template with random elements
-        event = self.fill_template(template)
+        event = self.template_engine.render(template, self.template_rng)
 
-        self.event_count += 1
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
         # Format the event with category and timestamp
-        formatted_event = f"[{timestamp}] {self.world_name} Event #{self.event_count} ({category.capitalize()}):\n{event}"
+        formatted_event = f"[{timestamp}] {self.world_name} Event #{self.event_count + 1} ({category.capitalize()}):\n{event}"
 
         return formatted_event, category
 
+    def generate_events(self, n: int, extract: bool = True) -> List[Tuple[str, str, Optional[Dict]]]:
+        """Generate a batch of ``n`` template events for backfills and simulations.
+
+        Categories, templates and fill-in choices are drawn for the whole batch with
+        vectorized NumPy index draws from the same weighted alias tables as
+        generate_event(), then rendered in one pass. Returns a list of
+        (formatted_event, category, event_data) tuples ready for bulk persistence,
+        numbered with the IDs they get when saved in order; event_data is None
+        when ``extract`` is False.
+        """
+        if n <= 0:
+            return []
+
+        category_idx = self.category_table.sample_many(self.batch_rng, n)
+        template_idx = np.zeros(n, dtype=np.int64)
+        for c, category in enumerate(self.category_names):
+            in_category = category_idx == c
+            count = int(in_category.sum())
+            if count:
+                template_idx[in_category] = self.template_tables[category].sample_many(self.batch_rng, count)
+        category_idx = category_idx.tolist()
+        if self.recent_templates.size:
+            chooser = NumpyChooser(self.batch_rng)
+            templates = [
+                self._pick_template(self.category_names[c], t, chooser)
+                for c, t in zip(category_idx, template_idx.tolist())
+            ]
+        else:
+            templates = [
+                self.compiled_categories[self.category_names[c]][t]
+                for c, t in zip(category_idx, template_idx.tolist())
+            ]
+        texts = self.template_engine.render_batch(templates, self.batch_rng)
+
+        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        batch = []
+        for number, (c, text) in enumerate(zip(category_idx, texts), self.event_count + 1):
+            category = self.category_names[c]
+            formatted_event = f"[{timestamp}] {self.world_name} Event #{number} ({category.capitalize()}):\n{text}"
+            batch.append((formatted_event, category, self.extract_event_data(formatted_event) if extract else None))
+        return batch
+
     def display_event(self, event_tuple: Tuple[str, str]) -> None:
         """Display an event with notification and appropriate color based on category."""
         event, category = event_tuple
@@ -509,95 +951,33 @@ class FantasyWorldEventGenerator:
         except:
             pass  # Silently fail if sound isn't available
     def initialize_database(self):
-        """Initialize SQLite database for event history and world state tracking."""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-
-            # Create events table
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS events (
-                id INTEGER PRIMARY KEY,
-                timestamp TEXT,
-                category TEXT,
-                event_text TEXT,
-                location TEXT,
-                characters TEXT,
-                factions TEXT,
-                image_path TEXT,
-                headline TEXT DEFAULT '',
-                description TEXT DEFAULT ''
-            )
-            ''')
+        """Initialize SQLite database for event history and world state tracking.
 
-            # Migrate existing DBs that don't have the headline / description columns yet
-            for col_def in [
-                "ALTER TABLE events ADD COLUMN headline TEXT DEFAULT ''",
-                "ALTER TABLE events ADD COLUMN description TEXT DEFAULT ''",
-            ]:
-                try:
-                    cursor.execute(col_def)
-                except Exception:
-                    pass  # Column already exists
-
-            # Create world state table
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS world_state (
-                id INTEGER PRIMARY KEY,
-                timestamp TEXT,
-                state_json TEXT
-            )
-            ''')
-
-            # Create telegram_event_details table for storing data used by telegram buttons
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS event_details (
-                id INTEGER PRIMARY KEY,
-                event_id INTEGER,
-                hidden_details TEXT,
-                connections TEXT,
-                plot_hooks TEXT,
-                consequences TEXT,
-                FOREIGN KEY (event_id) REFERENCES events (id)
-            )
-            ''')
-
-            # Characters table — one row per unique character, updated on each appearance
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS characters (
-                id INTEGER PRIMARY KEY,
-                name TEXT UNIQUE NOT NULL,
-                type TEXT,
-                last_location TEXT,
-                last_seen TEXT,
-                event_count INTEGER DEFAULT 0
-            )
-            ''')
-
-            # Locations table — one row per unique location, updated on each appearance
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS locations (
-                id INTEGER PRIMARY KEY,
-                name TEXT UNIQUE NOT NULL,
-                last_event_id INTEGER,
-                last_seen TEXT,
-                event_count INTEGER DEFAULT 0,
-                characters_present TEXT
-            )
-            ''')
-
-            conn.commit()
-            conn.close()
+        Creates the tables of a new database and brings an older one up to the
+        current schema version (see db_schema.py).
+        """
+        try:
+            with self.db.write() as conn:
+                applied = migrate_database(conn.cursor())
+            if applied:
+                self.debug_print(f"Applied database schema migrations {applied}")
             print(f"Database initialized at {self.db_path}")
         except Exception as e:
-            self.debug_print(f"Error displaying event: {e}")
+            self.debug_print(f"Error initializing database: {e}")
 
     def save_event_to_db(self, event_text: str, category: str, event_data: Dict):
-        """Save event information to the database."""
+        """Save event information to the database.
+
+        Every event gets its ID here, whichever way it was made (templates,
+        batches or the AI): the event row is stored under the next ID and
+        event_count advanced to it, the ID the world state and its histories
+        refer to it by. Inside an event's unit of work (see event_transaction())
+        it is written together with the rest of the event; on its own it is
+        committed here. event_count only moves once the row is committed or
+        added to the event's unit, so a failed insert does not use up an ID.
+        """
+        event_id = self.event_count + 1
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-
             timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             location = event_data.get('location', '')
             characters = json.dumps(event_data.get('characters', []))
@@ -613,13 +993,9 @@ class FantasyWorldEventGenerator:
             else:
                 clean_event_text = event_text
 
-            cursor.execute('''
-            INSERT INTO events (timestamp, category, event_text, location, characters, factions, image_path, headline, description)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (timestamp, category, clean_event_text, location, characters, factions, image_path, headline, description))
-
-            # Get the event ID that was just inserted
-            event_id = cursor.lastrowid
+            # One row per character and faction, for their timelines
+            character_rows, faction_rows = participant_rows(
+                event_id, event_data.get('characters', []), event_data.get('factions', []))
 
             # Save telegram button data — normalize lists to newline-separated strings
             def _fmt(val):
@@ -631,77 +1007,254 @@ class FantasyWorldEventGenerator:
             plot_hooks = _fmt(event_data.get('plot_hooks', ''))
             consequences = _fmt(event_data.get('consequences', ''))
 
-            # Only insert if we have at least one of these details
-            if hidden_details or connections or plot_hooks or consequences:
-                cursor.execute('''
-                INSERT INTO event_details (event_id, hidden_details, connections, plot_hooks, consequences)
-                VALUES (?, ?, ?, ?, ?)
-                ''', (event_id, hidden_details, connections, plot_hooks, consequences))
-
-            conn.commit()
-            conn.close()
+            # Every row is built before any is added, so a bad event adds none
+            with self.db.unit_of_work() as unit:
+                unit.add('''
+                INSERT INTO events (id, timestamp, category, event_text, location, characters, factions, image_path, headline, description)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (event_id, timestamp, category, clean_event_text, location, characters, factions, image_path, headline, description))
+                unit.add_many(CHARACTER_INSERT, character_rows)
+                unit.add_many(FACTION_INSERT, faction_rows)
+
+                # Only insert if we have at least one of these details
+                if hidden_details or connections or plot_hooks or consequences:
+                    unit.add('''
+                    INSERT INTO event_details (event_id, hidden_details, connections, plot_hooks, consequences)
+                    VALUES (?, ?, ?, ?, ?)
+                    ''', (event_id, hidden_details, connections, plot_hooks, consequences))
+            self.event_count = event_id
             return event_id
         except Exception as e:
             self.debug_print(f"Error saving event to database: {e}")
         return None
 
-    def update_world_state(self):
-        """Update world state in the database."""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+    def save_event(self, event_text: str, category: str, event_data: Dict) -> Optional[int]:
+        """Save an event, apply it to the world and persist its effects in one transaction.
 
-            timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            state_json = json.dumps(self.world_state)
+        Returns the event's ID, or None if it could not be written; then none
+        of its rows are, and the world is as it was before the event (see
+        event_transaction()). With the background writer running, the
+        transaction is only queued here; a queued event that failed to commit
+        is reported by the next save_event().
+        """
+        event_id = None
+        try:
+            with self.event_transaction():
+                event_id = self.save_event_to_db(event_text, category, event_data)
+                if event_id is None:
+                    return None
+                self.update_world_based_on_event(event_text, category, event_data)
+            return event_id
+        except WriteError as e:
+            # This event is queued; it is an earlier one that was lost
+            print(f"Error writing earlier events to the database: {e}")
+            return event_id
+        except sqlite3.Error as e:
+            print(f"Error saving event {self.event_count + 1}: {e}")
+        return None
 
-            cursor.execute('''
-            INSERT INTO world_state (timestamp, state_json)
-            VALUES (?, ?)
-            ''', (timestamp, state_json))
+    @contextlib.contextmanager
+    def event_transaction(self) -> Iterator[None]:
+        """Run the steps of one event (save_event_to_db(), apply, persist) as one unit of work.
+
+        If the block raises or the unit cannot be committed, nothing of the
+        event is written, and the world is reloaded as the database has it:
+        its ID, journal operations and world changes are dropped too, so
+        nothing in memory refers to an event that was never saved. The error
+        is raised again. A WriteError only reports earlier units the background
+        writer lost; this one was queued, so the world is kept.
+        """
+        try:
+            with self.db.unit_of_work():
+                yield
+        except WriteError:
+            raise
+        except Exception:
+            self._reload_world_state()
+            raise
+
+    def _reload_world_state(self) -> None:
+        """Drop the unsaved changes in memory and load the world from its latest checkpoint and journal."""
+        loaded = load_world_state(self.world_name)
+        if loaded is None:
+            print(f"Error reloading {self.world_name}; keeping the world in memory and saving all of it next")
+            self._dirty_sections.update(SECTIONS)
+            self._checkpoint_due = True
+            return
+        self.journal.take()
+        self._archive_queue.clear()
+        self.event_count = self.get_last_event_count()
+        self.world_state, deltas = loaded[0], loaded[1]
+        self._relations = None
+        self._pending_ops = split_ops(deltas)
+        self._dirty_sections = set(self._pending_ops)
+        self._checkpoint_due = False
+        self._journal_since_checkpoint = len(deltas)
+        self._journal_bytes_since_checkpoint = 0
+        self.world_state.prepare = self._prepare_section
+        # As in __init__: reading the seed loads the "world" section and its names
+        self.seed_rng_streams(self.world_state['rng_seed'], self.event_count)
+        self._journaled_entities = len(self.entities)
+        self.entities.add_world(self.locations, self.factions, self.characters)
+        self.publish_snapshot()
+
+    def migrate_state_rows(self):
+        """Re-encode every saved checkpoint with this world's codec.
+
+        One-piece checkpoints are upgraded to the current schema on the way;
+        checkpoints stored in sections keep their schema version, which the
+        readers upgrade from when they assemble them.
+        """
+        try:
+            with self.db.write() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                SELECT id FROM world_state
+                WHERE COALESCE(codec, 'json') != ? AND (state_json IS NOT NULL OR state_data IS NOT NULL)
+                ''', (self.state_codec,))
+                row_ids = [row[0] for row in cursor.fetchall()]
+                cursor.execute('''
+                SELECT id FROM world_state_sections
+                WHERE COALESCE(codec, 'json') != ?
+                ''', (self.state_codec,))
+                section_ids = [row[0] for row in cursor.fetchall()]
+                if row_ids or section_ids:
+                    print(f"Migrating {len(row_ids) + len(section_ids):,} saved world states "
+                          f"to the {self.state_codec} codec...")
+                for row_id in row_ids:
+                    cursor.execute('''
+                    SELECT state_json, state_data, codec, schema_version FROM world_state WHERE id = ?
+                    ''', (row_id,))
+                    state_json, state_data, codec, version = cursor.fetchone()
+                    state = upgrade_state(decode_state(row_payload(state_json, state_data), codec), version)
+                    state_json, state_data = state_columns(state, self.state_codec)
+                    cursor.execute('''
+                    UPDATE world_state
+                    SET state_json = ?, state_data = ?, codec = ?, schema_version = ?
+                    WHERE id = ?
+                    ''', (state_json, state_data, self.state_codec, SCHEMA_VERSION, row_id))
+                for section_id in section_ids:
+                    cursor.execute('''
+                    SELECT state_json, state_data, codec FROM world_state_sections WHERE id = ?
+                    ''', (section_id,))
+                    state_json, state_data, codec = cursor.fetchone()
+                    state_json, state_data = state_columns(decode_state(row_payload(state_json, state_data), codec),
+                                                           self.state_codec)
+                    cursor.execute('''
+                    UPDATE world_state_sections
+                    SET state_json = ?, state_data = ?, codec = ?
+                    WHERE id = ?
+                    ''', (state_json, state_data, self.state_codec, section_id))
+                cursor.execute('''
+                UPDATE world_state SET codec = ?
+                WHERE state_json IS NULL AND state_data IS NULL
+                ''', (self.state_codec,))
+        except Exception as e:
+            self.debug_print(f"Error migrating world states: {e}")
+
+    def update_world_state(self, checkpoint: bool = False):
+        """Save the current event's world changes to the journal.
+
+        A checkpoint of the world_state sections changed since the previous
+        one is written every ``checkpoint_interval`` events, once
+        ``checkpoint_bytes`` of journal were written since the last one, or
+        when ``checkpoint`` is set. Then publishes the new snapshot.
+        """
+        # Names first seen during this event travel with its delta
+        if len(self.entities) > self._journaled_entities:
+            self.journal.entities(self.entities.names[self._journaled_entities:])
+            self._journaled_entities = len(self.entities)
+        ops = self.journal.take()
 
-            conn.commit()
-            conn.close()
+        try:
+            with self.db.unit_of_work() as unit:
+                timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+                if ops:
+                    self._dirty_sections.update(op_section(op) for op in ops)
+                    delta_json = json.dumps(ops, default=json_default)
+                    unit.add('''
+                    INSERT INTO world_journal (event_id, timestamp, delta_json)
+                    VALUES (?, ?, ?)
+                    ''', (self.event_count, timestamp, delta_json))
+                    self._journal_since_checkpoint += 1
+                    self._journal_bytes_since_checkpoint += len(delta_json)
+
+                if self._writes_lost:
+                    # A lost unit left a gap in the journal: save every section
+                    # after it, so no replay has to cross the gap
+                    self._writes_lost = False
+                    self._dirty_sections.update(SECTIONS)
+                    checkpoint = True
+
+                if (checkpoint or self._checkpoint_due or self._journal_since_checkpoint >= self.checkpoint_interval
+                        or self._journal_bytes_since_checkpoint >= self.checkpoint_bytes):
+                    # Only the sections changed since the previous checkpoint are written
+                    # Encoded now: the unit may be written after the state has moved on
+                    event_id, codec = self.event_count, self.state_codec
+                    sections = encode_sections({section: self._section_state(section)
+                                                for section in SECTIONS if section in self._dirty_sections}, codec)
+
+                    def write_checkpoint(cursor):
+                        cursor.execute('''
+                        INSERT INTO world_state (timestamp, codec, schema_version, event_id, journal_id)
+                        VALUES (?, ?, ?, ?, (SELECT COALESCE(MAX(id), 0) FROM world_journal))
+                        ''', (timestamp, codec, SCHEMA_VERSION, event_id))
+                        write_sections(cursor, cursor.lastrowid, sections, codec)
+
+                    unit.call(write_checkpoint)
+                    self._dirty_sections.clear()
+                    self._checkpoint_due = False
+                    self._journal_since_checkpoint = 0
+                    self._journal_bytes_since_checkpoint = 0
+
+                # History entries evicted from memory since the last snapshot
+                if self._archive_queue:
+                    unit.add_many('''
+                    INSERT INTO history_archive (collection, owner, entry_json)
+                    VALUES (?, ?, ?)
+                    ''', [(collection, owner, json.dumps(entry)) for collection, owner, entry in self._archive_queue])
+                    self._archive_queue.clear()
         except Exception as e:
             self.debug_print(f"Error updating world state: {e}")
 
+        try:
+            self.publish_snapshot(ops)
+        except Exception as e:
+            self.debug_print(f"Error publishing world snapshot: {e}")
+
     def upsert_character_in_db(self, name: str, char_type: str, location: str, event_id: int):
         """Insert or update a character row in the characters table."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            cursor.execute('''
-            INSERT INTO characters (name, type, last_location, last_seen, event_count)
-            VALUES (?, ?, ?, ?, 1)
-            ON CONFLICT(name) DO UPDATE SET
-                type         = excluded.type,
-                last_location = excluded.last_location,
-                last_seen    = excluded.last_seen,
-                event_count  = event_count + 1
-            ''', (name, char_type, location, now))
-            conn.commit()
-            conn.close()
+            with self.db.unit_of_work() as unit:
+                now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                unit.add('''
+                INSERT INTO characters (name, type, last_location, last_seen, event_count)
+                VALUES (?, ?, ?, ?, 1)
+                ON CONFLICT(name) DO UPDATE SET
+                    type         = excluded.type,
+                    last_location = excluded.last_location,
+                    last_seen    = excluded.last_seen,
+                    event_count  = event_count + 1
+                ''', (name, char_type, location, now))
         except Exception as e:
             self.debug_print(f"Error upserting character: {e}")
 
     def upsert_location_in_db(self, name: str, event_id: int, characters: list):
         """Insert or update a location row in the locations table."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            chars_json = json.dumps(characters)
-            cursor.execute('''
-            INSERT INTO locations (name, last_event_id, last_seen, event_count, characters_present)
-            VALUES (?, ?, ?, 1, ?)
-            ON CONFLICT(name) DO UPDATE SET
-                last_event_id      = excluded.last_event_id,
-                last_seen          = excluded.last_seen,
-                event_count        = event_count + 1,
-                characters_present = excluded.characters_present
-            ''', (name, event_id, now, chars_json))
-            conn.commit()
-            conn.close()
+            with self.db.unit_of_work() as unit:
+                now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                chars_json = json.dumps(characters)
+                unit.add('''
+                INSERT INTO locations (name, last_event_id, last_seen, event_count, characters_present)
+                VALUES (?, ?, ?, 1, ?)
+                ON CONFLICT(name) DO UPDATE SET
+                    last_event_id      = excluded.last_event_id,
+                    last_seen          = excluded.last_seen,
+                    event_count        = event_count + 1,
+                    characters_present = excluded.characters_present
+                ''', (name, event_id, now, chars_json))
         except Exception as e:
             self.debug_print(f"Error upserting location: {e}")
 
@@ -715,55 +1268,143 @@ class FantasyWorldEventGenerator:
             'time_references': []
         }
 
-        # Extract locations
-        for location in self.locations:
-            if location in event_text:
-                data['location'] = location
-                break
+        # One linear scan finds every whole-word location, character and faction name
+        found = self.entity_index.extract(event_text)
 
-        # Extract characters
-        for char_type, chars in self.characters.items():
-            for char in chars:
-                if char in event_text:
-                    data['characters'].append({'name': char, 'type': char_type})
+        # The first location mentioned is the event's location
+        if found['location']:
+            data['location'] = found['location'][0]
 
-        # Extract factions
-        for faction in self.factions:
-            if faction in event_text:
-                data['factions'].append(faction)
+        data['characters'] = [{'name': name, 'type': char_type} for name, char_type in found['character']]
+        data['factions'] = found['faction']
 
         return data
 
     def get_recent_events(self, count: int = 5) -> List[str]:
-        """Get the most recent events from the database."""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+        """Get the summaries of the most recent events, newest first, for AI prompts.
 
-            cursor.execute('''
-            SELECT event_text FROM events
-            ORDER BY id DESC
-            LIMIT ?
-            ''', (count,))
+        Read through get_history(), so a count larger than the in-memory
+        event_history continues into the events table.
+        """
+        return [entry.get('summary', '') for entry in self.get_history('event_history', limit=count)]
 
-            results = cursor.fetchall()
-            conn.close()
+    def _event_summaries(self, event_ids) -> Dict[int, str]:
+        """Fetch the event text of the given event ids from the events table."""
+        summaries = {}
+        try:
+            conn = self.db.read()
+            summaries = fetch_event_summaries(conn.cursor(), event_ids)
+        except Exception as e:
+            self.debug_print(f"Error retrieving event summaries: {e}")
+        return summaries
+
+    def get_history(self, collection: str, owner: Any = None, limit: int = 20) -> List[Any]:
+        """Return up to ``limit`` entries of a history, newest first.
+
+        Reads the in-memory ring buffer first and continues into the database for
+        entries that no longer fit in it: rows of the events table for event
+        histories, then the history_archive table.
+
+        ``owner`` names whose history to read: a character or location name for
+        character_events/developments and location_events, a plot name for
+        plot_events, a pair of faction names for relation_events, and nothing for
+        the world-wide histories (event_history, social_events, ...). Raises
+        ValueError for an unknown collection or a missing owner.
+        """
+        if collection == 'relation_events':
+            if not isinstance(owner, (tuple, list)) or len(owner) != 2:
+                raise ValueError(f"relation_events needs a pair of faction names, not {owner!r}")
+        elif collection in ('character_events', 'developments', 'location_events', 'plot_events') and owner is None:
+            raise ValueError(f"{collection} needs the name whose history to read")
+        entity = self.entities.get
+        if collection in ('character_events', 'developments'):
+            data = self.world_state['character_status'].get(entity(owner))
+            key = entity(owner)
+            buffer = (data.events if collection == 'character_events' else data.developments) if data else ()
+        elif collection == 'location_events':
+            data = self.world_state['location_status'].get(entity(owner))
+            key = entity(owner)
+            buffer = data.events if data else ()
+        elif collection == 'plot_events':
+            plot = next((p for p in self.world_state['active_plots'] if p.name == owner), None)
+            key = owner
+            buffer = plot.events if plot else ()
+        elif collection == 'relation_events':
+            faction1, faction2 = (entity(n) for n in owner)
+            key = self._relation_owner(faction1, faction2) if None not in (faction1, faction2) else None
+            buffer = self.relations.history(faction1, faction2) if key else ()
+        elif collection in WORLD_HISTORIES:
+            key = ''
+            buffer = self.world_state[collection]
+        else:
+            raise ValueError(f"Unknown history collection {collection!r}")
+
+        entries = list(reversed(buffer))[:limit]
+        if len(entries) < limit and key is not None:
+            entries.extend(self._older_history(collection, owner, str(key), buffer, limit - len(entries)))
+
+        # Character and location event entries carry only the event id
+        if collection in ('character_events', 'location_events'):
+            summaries = self._event_summaries(e['event_id'] for e in entries if 'summary' not in e)
+            entries = [e if 'summary' in e else dict(e, summary=summaries.get(e['event_id'], ''))
+                       for e in entries]
+        return entries
+
+    def _older_history(self, collection: str, owner: Any, key: str, buffer, count: int) -> List[Any]:
+        """Entries of a history older than its in-memory buffer, newest first."""
+        older = []
+        try:
+            conn = self.db.read()
+            cursor = conn.cursor()
 
-            return [result[0] for result in results]
+            if collection in EVENT_TABLE_COLLECTIONS:
+                buffered = [e['event_id'] for e in buffer if isinstance(e, dict) and 'event_id' in e]
+                before = min(buffered) if buffered else self.event_count + 1
+                # Character and relation histories are lookups in the join tables
+                if collection == 'character_events':
+                    events = character_timeline(cursor, owner, count, before)
+                elif collection == 'relation_events':
+                    events = faction_timeline(cursor, owner[0], count, before, other=owner[1], relation_only=True)
+                else:
+                    where, params = ("location = ?", [owner]) if collection == 'location_events' else ("1", [])
+                    cursor.execute(f'''
+                    SELECT id, category, event_text FROM events
+                    WHERE id < ? AND {where}
+                    ORDER BY id DESC
+                    LIMIT ?
+                    ''', [before, *params, count])
+                    events = [{'id': event_id, 'category': category, 'event_text': text}
+                              for event_id, category, text in cursor.fetchall()]
+                for event in events:
+                    entry = {'event_id': event['id'], 'category': event['category']}
+                    # Relation logs never carried the summary
+                    if collection != 'relation_events':
+                        entry['summary'] = summary_line(event['event_text'])
+                    older.append(entry)
+
+            # Entries evicted since the last snapshot, then the archived ones
+            older.extend(entry for c, o, entry in reversed(self._archive_queue) if (c, o) == (collection, key))
+            if len(older) < count:
+                cursor.execute('''
+                SELECT entry_json FROM history_archive
+                WHERE collection = ? AND owner = ?
+                ORDER BY id DESC
+                LIMIT ?
+                ''', (collection, key, count - len(older)))
+                older.extend(json.loads(row[0]) for row in cursor.fetchall())
         except Exception as e:
-            self.debug_print(f"Error retrieving recent events: {e}")
-            return []
+            self.debug_print(f"Error retrieving {collection} history: {e}")
+        return older[:count]
 
     def get_last_event_count(self) -> int:
         """Get the last event count from the database."""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self.db.read()
             cursor = conn.cursor()
 
             # Try to get the highest event ID
             cursor.execute("SELECT MAX(id) FROM events")
             result = cursor.fetchone()
-            conn.close()
 
             if result and result[0]:
                 return result[0]
@@ -785,7 +1426,7 @@ class FantasyWorldEventGenerator:
         # visual_description) so that every field is coherent with every other field.
         if self.gemini_available:
             recent_events = self.get_recent_events(5)
-            ai_details = self.ai.get_ai_enhanced_event_details(event_text, category, self.world_state, self.world_name, recent_events)
+            ai_details = self.ai.get_ai_enhanced_event_details(event_text, category, self.named_state(), self.world_name, recent_events)
 
             # Check if ai_details is a dictionary before updating
             if isinstance(ai_details, dict):
@@ -814,7 +1455,8 @@ class FantasyWorldEventGenerator:
 
         # Generate an image if we have a visual description
         if 'visual_description' in event_data and event_data['visual_description']:
-            image_path = self.ai.generate_event_image(event_data['visual_description'], self.event_count, self.images_dir)
+            # Named after the ID the event is saved under below
+            image_path = self.ai.generate_event_image(event_data['visual_description'], self.event_count + 1, self.images_dir)
             if image_path:
                 event_data['image_path'] = image_path
                 self.debug_print(f"Image saved to {image_path}")
@@ -858,7 +1500,7 @@ class FantasyWorldEventGenerator:
             print("="*40 + "\n")
         else:
             # AI didn't return headline/description — fall back to the separate summary call
-            news_summary = self.ai.summarize_event_for_telegram(event_text, category, self.world_state, self.world_name)
+            news_summary = self.ai.summarize_event_for_telegram(event_text, category, self.named_state(), self.world_name)
             if isinstance(news_summary, dict):
                 event_data['headline'] = news_summary.get('headline', '')
                 event_data['description'] = news_summary.get('description', '')
@@ -879,14 +1521,11 @@ class FantasyWorldEventGenerator:
             else:
                 telegram_message = f"*New Event in {self.world_name}*\n\n{event_text}"
 
-        # Save event to database — capture the real DB row ID
-        db_event_id = self.save_event_to_db(event_text, category, event_data)
+        # Save the event and update the world state based on it, in one transaction
+        db_event_id = self.save_event(event_text, category, event_data)
         if db_event_id is None:
             db_event_id = self.event_count  # fallback if insert failed
 
-        # Update world state based on event
-        self.update_world_based_on_event(event_text, category, event_data)
-
         # Send to Telegram if configured
         if self.telegram.get_chat_id():
             # Create admin details dictionary — drawn from the same AI call as the message
@@ -906,87 +1545,88 @@ class FantasyWorldEventGenerator:
         return event_data
 
     def update_world_based_on_event(self, event_text: str, category: str, event_data: Dict):
-        """Update world state based on the event that occurred."""
+        """Update world state based on the event that occurred, then persist it."""
+        self.apply_event_to_world(event_text, category, event_data)
+        self.persist_event_effects(event_data)
+
+    def apply_event_to_world(self, event_text: str, category: str, event_data: Dict):
+        """Apply an event's effects to the in-memory world state."""
+        # Entities are tracked by ID from here on
+        intern = self.entities.intern
+        location = event_data.get('location', '')
+        location_id = intern(location) if location else None
+        character_ids = [intern(character['name']) for character in event_data.get('characters', [])]
+
         # Track characters mentioned in events
-        for character in event_data.get('characters', []):
-            char_name = character['name']
+        for char_id, character in zip(character_ids, event_data.get('characters', [])):
             char_type = character['type']
 
             # Update or create character status
-            if char_name not in self.world_state['character_status']:
-                self.world_state['character_status'][char_name] = {
-                    'type': char_type,
-                    'location': event_data.get('location', ''),
-                    'last_seen': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    'events': []
-                }
+            if char_id not in self.world_state['character_status']:
+                self._set_state(['character_status', char_id], CharacterState(
+                    type=char_type,
+                    location=location_id,
+                    last_seen=datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    events=self._new_history('character_events'),
+                    event_total=0,
+                    developments=self._new_history('developments')
+                ))
             else:
                 # Update existing character
-                self.world_state['character_status'][char_name]['location'] = event_data.get('location', '')
-                self.world_state['character_status'][char_name]['last_seen'] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                self._set_state(['character_status', char_id, 'location'], location_id)
+                self._set_state(['character_status', char_id, 'last_seen'], datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
 
-            # Add event to character history
-            self.world_state['character_status'][char_name]['events'].append({
+            # Add event to character history (the summary is kept once, in event_history)
+            self._record_history('character_events', char_id, ['character_status', char_id, 'events'], {
                 'event_id': self.event_count,
-                'category': category,
-                'summary': event_text.split('\n')[1] if '\n' in event_text else event_text
+                'category': category
             })
+            self._add_state(['character_status', char_id, 'event_total'], 1)
 
         # Track faction relations based on events
         factions = event_data.get('factions', [])
         if len(factions) >= 2:
-            faction1, faction2 = factions[0], factions[1]
-            relation_key = f"{faction1}_{faction2}"
-
-            # Initialize relation if it doesn't exist
-            if relation_key not in self.world_state['relations']:
-                self.world_state['relations'][relation_key] = {
-                    'status': 'neutral',
-                    'events': []
-                }
-
-            # Update relation based on category and content
-            relation = self.world_state['relations'][relation_key]
+            faction1, faction2 = intern(factions[0]), intern(factions[1])
 
             # Add event to relation history
-            relation['events'].append({
+            self._record_relation(faction1, faction2, {
                 'event_id': self.event_count,
                 'category': category
             })
 
             # Simple relation state updates based on category
             if category == 'conflict':
-                relation['status'] = 'hostile'
+                self._set_relation(faction1, faction2, 'hostile')
             elif category == 'political' and 'alliance' in event_text.lower():
-                relation['status'] = 'allied'
+                self._set_relation(faction1, faction2, 'allied')
             elif category == 'economic' and 'trade' in event_text.lower():
-                relation['status'] = 'trading'
+                self._set_relation(faction1, faction2, 'trading')
 
         # Update location status
-        location = event_data.get('location', '')
-        if location:
-            if location not in self.world_state['location_status']:
-                self.world_state['location_status'][location] = {
-                    'events': [],
-                    'notable_features': [],
-                    'characters_present': []
-                }
+        if location_id is not None:
+            if location_id not in self.world_state['location_status']:
+                self._set_state(['location_status', location_id], LocationState(
+                    events=self._new_history('location_events'),
+                    event_total=0,
+                    notable_features=[],
+                    characters_present=[]
+                ))
 
             # Add event to location history
-            self.world_state['location_status'][location]['events'].append({
+            self._record_history('location_events', location_id, ['location_status', location_id, 'events'], {
                 'event_id': self.event_count,
-                'category': category,
-                'summary': event_text.split('\n')[1] if '\n' in event_text else event_text
+                'category': category
             })
+            self._add_state(['location_status', location_id, 'event_total'], 1)
 
             # Track characters at this location
-            for character in event_data.get('characters', []):
-                char_name = character['name']
-                if char_name not in self.world_state['location_status'][location]['characters_present']:
-                    self.world_state['location_status'][location]['characters_present'].append(char_name)
+            characters_present = self.world_state['location_status'][location_id].characters_present
+            for char_id in character_ids:
+                if char_id not in characters_present:
+                    self._append_state(['location_status', location_id, 'characters_present'], char_id)
 
         # Add event to overall history
-        self.world_state['event_history'].append({
+        self._record_history('event_history', '', ['event_history'], {
             'event_id': self.event_count,
             'category': category,
             'summary': event_text.split('\n')[1] if '\n' in event_text else event_text
@@ -994,46 +1634,54 @@ class FantasyWorldEventGenerator:
 
         # Update plots based on AI suggestions if available
         if 'consequences' in event_data and 'plot_hooks' in event_data:
-            # Create or update plots
-            plot_exists = False
-            for plot in self.world_state['active_plots']:
-                # Check if this event belongs to an existing plot
-                if any(keyword in event_text.lower() for keyword in plot.get('keywords', [])):
-                    plot['events'].append(self.event_count)
-                    plot_exists = True
-                    break
+            # Advance the plot this event belongs to, waking it if it was dormant
+            plots = self.world_state['active_plots']
+            index = self.plot_index.match(event_text)
+            if index is not None:
+                plot = plots[index]
+                self._record_history('plot_events', plot.name, ['active_plots', index, 'events'], self.event_count)
+                self._set_state(['active_plots', index, 'last_event'], self.event_count)
+                if plot.status != 'active':
+                    self._set_state(['active_plots', index, 'status'], 'active')
 
             # Create a new plot if needed
-            if not plot_exists and event_data.get('plot_hooks'):
-                new_plot = {
-                    'name': f"Plot from Event #{self.event_count}",
-                    'description': event_data.get('plot_hooks', ''),
-                    'keywords': [word.lower() for word in event_text.split() if len(word) > 4][:5],
-                    'status': 'active',
-                    'events': [self.event_count],
-                    'characters': [c['name'] for c in event_data.get('characters', [])],
-                    'locations': [event_data.get('location', '')] if event_data.get('location') else []
-                }
-                self.world_state['active_plots'].append(new_plot)
+            elif event_data.get('plot_hooks'):
+                new_plot = PlotState(
+                    id=self.world_state['next_plot_id'],
+                    name=f"Plot from Event #{self.event_count}",
+                    description=event_data.get('plot_hooks', ''),
+                    keywords=plot_keywords(event_text),
+                    status='active',
+                    events=self._new_history('plot_events', [self.event_count]),
+                    last_event=self.event_count,
+                    characters=character_ids,
+                    locations=[location_id] if location_id is not None else []
+                )
+                self._add_state(['next_plot_id'], 1)
+                self._append_state(['active_plots'], new_plot)
+                self.plot_index.add(new_plot, len(plots) - 1)
+
+        if self.event_count % PLOT_SWEEP_INTERVAL == 0:
+            self.update_plot_lifecycle()
 
         # Always randomize time of day with each event
         times_of_day = ['morning', 'afternoon', 'evening', 'night']
-        self.world_state['time']['time_of_day'] = random.choice(times_of_day)
+        self._set_state(['time', 'time_of_day'], self.world_rng.choice(times_of_day))
 
         # Update season counter
-        self.world_state['events_since_season_change'] += 1
+        self._add_state(['events_since_season_change'], 1)
 
         # Check if it's time to change seasons (every 3-5 events)
-        events_per_season = random.randint(3, 5)
+        events_per_season = self.world_rng.randint(3, 5)
         if self.world_state['events_since_season_change'] >= events_per_season:
             self.advance_season()
 
         # Occasionally make more significant world state changes (5% chance)
-        if random.random() < 0.05:
+        if self.world_rng.random() < 0.05:
             self.apply_random_world_changes()
 
         # Random weather changes
-        if random.random() < 0.3:  # 30% chance to change weather
+        if self.weather_rng.random() < 0.3:  # 30% chance to change weather
             weather_options = ['clear', 'cloudy', 'rainy', 'stormy', 'foggy', 'windy']
             # Adjust options based on season
             if self.world_state['time']['season'] == 'winter':
@@ -1041,22 +1689,51 @@ class FantasyWorldEventGenerator:
             elif self.world_state['time']['season'] == 'summer':
                 weather_options = ['clear', 'sunny', 'hot', 'thunderstorm', 'cloudy', 'windy']
 
-            self.world_state['time']['weather'] = random.choice(weather_options)
+            self._set_state(['time', 'weather'], self.weather_rng.choice(weather_options))
 
-        # Save the updated world state
-        self.update_world_state()
+    def persist_event_effects(self, event_data: Dict):
+        """Save the world state snapshot and the event's characters and location.
 
-        # Persist characters and locations to their own DB tables
-        event_id = self.event_count
-        location = event_data.get('location', '')
-        char_names = []
-        for character in event_data.get('characters', []):
-            cname = character['name']
-            ctype = character['type']
-            char_names.append(cname)
-            self.upsert_character_in_db(cname, ctype, location, event_id)
-        if location:
-            self.upsert_location_in_db(location, event_id, char_names)
+        All in one transaction; the character upserts go out as one executemany().
+        """
+        with self.db.unit_of_work():
+            # Save the updated world state
+            self.update_world_state()
+
+            # Persist characters and locations to their own DB tables
+            event_id = self.event_count
+            location = event_data.get('location', '')
+            char_names = []
+            for character in event_data.get('characters', []):
+                cname = character['name']
+                ctype = character['type']
+                char_names.append(cname)
+                self.upsert_character_in_db(cname, ctype, location, event_id)
+            if location:
+                self.upsert_location_in_db(location, event_id, char_names)
+
+    def update_plot_lifecycle(self):
+        """Let idle plots go dormant and archive the ones dormant for too long.
+
+        A plot with no related event for PLOT_DORMANT_AFTER events goes dormant;
+        after another PLOT_RESOLVED_AFTER it is resolved, written to the history
+        archive and removed from world_state.
+        """
+        plots = self.world_state['active_plots']
+        removed = False
+        # Backwards, so removing a plot does not shift the ones still to check
+        for index in range(len(plots) - 1, -1, -1):
+            plot = plots[index]
+            idle = self.event_count - plot.last_event
+            if plot.status == 'active' and idle >= PLOT_DORMANT_AFTER:
+                self._set_state(['active_plots', index, 'status'], 'dormant')
+            elif plot.status == 'dormant' and idle >= PLOT_DORMANT_AFTER + PLOT_RESOLVED_AFTER:
+                self._archive_queue.append(('plots', plot.name,
+                                            dict(plot.to_dict(), status='resolved', events=list(plot.events))))
+                self._pop_state(['active_plots', index])
+                removed = True
+        if removed:
+            self.plot_index.rebuild(plots)
 
     def advance_season(self):
         """Advance to the next season and update weather accordingly."""
@@ -1069,25 +1746,25 @@ class FantasyWorldEventGenerator:
         next_season = seasons[next_index]
 
         # Set new season
-        self.world_state['time']['season'] = next_season
+        self._set_state(['time', 'season'], next_season)
 
         # Reset the counter
-        self.world_state['events_since_season_change'] = 0
+        self._set_state(['events_since_season_change'], 0)
 
         # Update weather based on new season
-        self.world_state['time']['weather'] = random.choice(weather_by_season[next_season])
+        self._set_state(['time', 'weather'], self.weather_rng.choice(weather_by_season[next_season]))
 
         # Update year if winter ends
         if current_season == 'winter' and next_season == 'spring':
-            self.world_state['time']['year'] += 1
+            self._add_state(['time', 'year'], 1)
 
         # Print notification of season change
-        print(f"\n🍃 The season has changed to {next_season.capitalize()}!")
+        self.announce(f"\n🍃 The season has changed to {next_season.capitalize()}!")
         if current_season == 'winter' and next_season == 'spring':
-            print(f"🎆 A new year begins! It is now Year {self.world_state['time']['year']} in {self.world_name}.")
+            self.announce(f"🎆 A new year begins! It is now Year {self.world_state['time']['year']} in {self.world_name}.")
 
-        # Send notification via telegram if available
-        if self.telegram.get_chat_id():
+        # Send notification via telegram if available (not for bulk simulation runs)
+        if not self.headless and self.telegram.get_chat_id():
             emoji = season_emojis.get(next_season, '🍃')
 
             message = f"{emoji} *The season has changed to {next_season.capitalize()}!*\n\n"
@@ -1098,185 +1775,182 @@ class FantasyWorldEventGenerator:
 
     def apply_random_world_changes(self):
         """Apply random significant changes to the world state."""
-        print("A significant shift occurs in the world...")
+        self.announce("A significant shift occurs in the world...")
 
         # Pick a random type of change
-        change_type = random.choice(world_change_types)
+        change_type = self.world_rng.choice(world_change_types)
 
         if change_type == 'weather_event':
             # Dramatic weather change
-            extreme_weather = random.choice(extreme_weather_events)
-            self.world_state['time']['weather'] = extreme_weather
-            print(f"The world experiences an extreme weather event: {extreme_weather}")
+            extreme_weather = self.world_rng.choice(extreme_weather_events)
+            self._set_state(['time', 'weather'], extreme_weather)
+            self.announce(f"The world experiences an extreme weather event: {extreme_weather}")
         elif change_type == 'natural_event':
             # Major natural disaster
-            natural_disaster = random.choice(natural_disaster_events)
-            print(f"A natural disaster occurs: {natural_disaster}")
+            natural_disaster = self.world_rng.choice(natural_disaster_events)
+            self.announce(f"A natural disaster occurs: {natural_disaster}")
         elif change_type == 'mystery_event':
             # Mysterious event affecting the world
-            mystery_event = random.choice(mystery_events)
-            print(f"A mysterious event occurs: {mystery_event}")
+            mystery_event = self.world_rng.choice(mystery_events)
+            self.announce(f"A mysterious event occurs: {mystery_event}")
         elif change_type == 'mundane_event':
             # Mundane event affecting the world
-            mundane_event = random.choice(mundane_events)
-            print(f"A mundane event occurs: {mundane_event}")
+            mundane_event = self.world_rng.choice(mundane_events)
+            self.announce(f"A mundane event occurs: {mundane_event}")
         elif change_type == 'conflict_event':
-            conflict_event = random.choice(conflict_events)
-            print(f"A conflict event occurs: {conflict_event}")
+            conflict_event = self.world_rng.choice(conflict_events)
+            self.announce(f"A conflict event occurs: {conflict_event}")
         elif change_type == 'faction_shift':
             # Major shift in faction dynamics
-            if self.world_state['relations'] and len(self.world_state['relations']) > 0:
-                relation_key = random.choice(list(self.world_state['relations'].keys()))
-                factions = relation_key.split('_')
-
+            pair = self.relations.random_pair(self.world_rng)
+            if pair:
                 # Flip the relationship status
-                current_status = self.world_state['relations'][relation_key]['status']
+                current_status = self.relations.status(*pair)
                 new_status = 'hostile' if current_status != 'hostile' else 'allied'
 
-                self.world_state['relations'][relation_key]['status'] = new_status
-                print(f"Relations between {factions[0]} and {factions[1]} have dramatically shifted to {new_status}!")
+                self._set_relation(*pair, new_status)
+                self.announce(f"Relations between {self.entities.name(pair[0])} and {self.entities.name(pair[1])} "
+                              f"have dramatically shifted to {new_status}!")
         elif change_type == 'political_event':
             # Random political event affecting factions
-            political_event = random.choice(political_events)
-
-            # Store this in world state relations
-            if self.world_state['relations'] and len(self.world_state['relations']) > 0:
-                relation_key = random.choice(list(self.world_state['relations'].keys()))
-            else:
-                # Pick two random factions and create a relation key
-                all_factions = list(set(
-                    [f for f_list in self.world_state.get('factions', {}).values() for f in f_list]
-                )) or ["Unknown Faction A", "Unknown Faction B"]
-                if len(all_factions) >= 2:
-                    f1, f2 = random.sample(all_factions, 2)
-                else:
-                    f1, f2 = all_factions[0], "Unknown Faction"
-                relation_key = f"{f1}_{f2}"
-
-            if relation_key not in self.world_state['relations']:
-                self.world_state['relations'][relation_key] = {
-                    'status': 'neutral',
-                    'events': []
-                }
-
-            self.world_state['relations'][relation_key]['events'].append({
-                'type': political_event,
-                'timestamp': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                'active': True
-            })
+            political_event = self.world_rng.choice(political_events)
+
+            # Store this in the log of a random faction pair
+            pair = self.relations.random_pair(self.world_rng)
+            if pair:
+                self._record_relation(*pair, {
+                    'type': political_event,
+                    'timestamp': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    'active': True
+                })
 
-            print(f"A political event occurs: {political_event}")
+            self.announce(f"A political event occurs: {political_event}")
         elif change_type == 'social_event':
             # Random social event affecting the world
-            social_event = random.choice(social_events)
+            social_event = self.world_rng.choice(social_events)
 
             # Store this in world state custom events
-            if 'social_events' not in self.world_state:
-                self.world_state['social_events'] = []
-
-            self.world_state['social_events'].append({
+            self._record_history('social_events', '', ['social_events'], {
                 'type': social_event,
                 'timestamp': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                 'active': True
             })
 
-            print(f"A social event occurs: {social_event}")
+            self.announce(f"A social event occurs: {social_event}")
         elif change_type == 'economic_event':
             # Random economic event affecting the world
-            economic_event = random.choice(economic_events)
+            economic_event = self.world_rng.choice(economic_events)
 
             # Store this in world state custom events
-            if 'economic_events' not in self.world_state:
-                self.world_state['economic_events'] = []
-
-            self.world_state['economic_events'].append({
+            self._record_history('economic_events', '', ['economic_events'], {
                 'type': economic_event,
                 'timestamp': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                 'active': True
             })
 
-            print(f"An economic event occurs: {economic_event}")
+            self.announce(f"An economic event occurs: {economic_event}")
         elif change_type == 'magical_occurrence':
             # Random magical event affecting the world
-            magic_event = random.choice(magical_occurrence_events)
+            magic_event = self.world_rng.choice(magical_occurrence_events)
 
             # Store this in world state custom events
-            if 'magical_events' not in self.world_state:
-                self.world_state['magical_events'] = []
-
-            self.world_state['magical_events'].append({
+            self._record_history('magical_events', '', ['magical_events'], {
                 'type': magic_event,
                 'timestamp': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                 'active': True
             })
 
-            print(f"A magical occurrence affects the world: {magic_event}")
+            self.announce(f"A magical occurrence affects the world: {magic_event}")
 
         elif change_type == 'character_development':
             # Major character development
             if self.world_state['character_status'] and len(self.world_state['character_status']) > 0:
-                char_name = random.choice(list(self.world_state['character_status'].keys()))
-                development = random.choice(character_developments)
+                char_id = self.world_rng.choice(list(self.world_state['character_status'].keys()))
+                char_name = self.entities.name(char_id)
+                development = self.world_rng.choice(character_developments)
 
                 # Add the development to character history
-                if 'developments' not in self.world_state['character_status'][char_name]:
-                    self.world_state['character_status'][char_name]['developments'] = []
-
-                self.world_state['character_status'][char_name]['developments'].append({
+                self._record_history('developments', char_id, ['character_status', char_id, 'developments'], {
                     'type': development,
                     'timestamp': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                 })
 
-                print(f"{char_name} has {development}!")
+                self.announce(f"{char_name} has {development}!")
 
         elif change_type == 'realm_shift':
             # The entire realm undergoes a shift
-            realm_change = random.choice(realm_shift_events)
+            realm_change = self.world_rng.choice(realm_shift_events)
 
             # Apply actual changes
             if realm_change == 'time warp':
-                years_shift = random.randint(1, 100) * random.choice([-1, 1])
-                self.world_state['time']['year'] += years_shift
-                print(f"A time warp has shifted the world {abs(years_shift)} years into the {'future' if years_shift > 0 else 'past'}!")
+                years_shift = self.world_rng.randint(1, 100) * self.world_rng.choice([-1, 1])
+                self._add_state(['time', 'year'], years_shift)
+                self.announce(f"A time warp has shifted the world {abs(years_shift)} years into the {'future' if years_shift > 0 else 'past'}!")
 
             elif realm_change == 'seasonal anomaly':
                 seasons = ['spring', 'summer', 'autumn', 'winter']
-                self.world_state['time']['season'] = random.choice(seasons)
-                print(f"A seasonal anomaly has changed the season to {self.world_state['time']['season']}!")
+                self._set_state(['time', 'season'], self.world_rng.choice(seasons))
+                self.announce(f"A seasonal anomaly has changed the season to {self.world_state['time']['season']}!")
 
             # Store the realm shift in world state
-            if 'realm_shifts' not in self.world_state:
-                self.world_state['realm_shifts'] = []
-
-            self.world_state['realm_shifts'].append({
+            self._record_history('realm_shifts', '', ['realm_shifts'], {
                 'type': realm_change,
                 'timestamp': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                 'description': f"The realm experienced a {realm_change}"
             })
 
     # Display helper methods
-    def show_character_details(self):
-        """Display details about characters in the world (reads from DB)."""
+    def show_character_details(self, name: Optional[str] = None, limit: int = 15):
+        """Display details about characters in the world (reads from DB).
+
+        With a name, display the newest events of that character (or faction)
+        instead, from the event_characters and event_factions tables.
+        """
+        if name:
+            try:
+                cursor = self.db.read().cursor()
+                timeline, kind = character_timeline(cursor, name, limit), "character"
+                if not timeline:
+                    timeline, kind = faction_timeline(cursor, name, limit), "faction"
+            except Exception as e:
+                self.debug_print(f"Error reading the timeline of {name}: {e}")
+                timeline = []
+            if not timeline:
+                print(f"No events found for '{name}'.")
+                return
+            print(f"\n=== TIMELINE OF {name.upper()} ({kind}, newest first) ===\n")
+            for event in timeline:
+                print(f"{Fore.CYAN}#{event['id']}{Style.RESET_ALL} ({event['category']}, {event['timestamp']}) "
+                      f"{event['location']}")
+                print(f"  {event['headline']}")
+            developments = self.get_history('developments', name, limit) if kind == "character" else []
+            if developments:
+                print(f"\n{Fore.YELLOW}Developments:{Style.RESET_ALL}")
+                for development in developments:
+                    print(f"  {development['timestamp']}: {name} has {development['type']}")
+            print()
+            return
+
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self.db.read()
             cursor = conn.cursor()
             cursor.execute('SELECT name, type, last_location, last_seen, event_count FROM characters ORDER BY event_count DESC')
             rows = cursor.fetchall()
-            conn.close()
         except Exception as e:
             self.debug_print(f"Error reading characters from DB: {e}")
             rows = []
 
         if not rows:
             # Fallback to world_state
-            if not self.world_state['character_status']:
+            character_status = self.named_state()['character_status']
+            if not character_status:
                 print("No character information available yet.")
                 return
             rows = [
-                (name, d['type'], d['location'], d['last_seen'], len(d['events']))
+                (name, d['type'], d['location'], d['last_seen'], d['event_total'])
                 for name, d in sorted(
-                    self.world_state['character_status'].items(),
-                    key=lambda x: len(x[1]['events']), reverse=True
+                    character_status.items(),
+                    key=lambda x: x[1]['event_total'], reverse=True
                 )
             ]
 
@@ -1290,25 +1964,25 @@ class FantasyWorldEventGenerator:
     def show_location_details(self):
         """Display details about locations in the world (reads from DB)."""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self.db.read()
             cursor = conn.cursor()
             cursor.execute('SELECT name, last_event_id, last_seen, event_count, characters_present FROM locations ORDER BY event_count DESC')
             rows = cursor.fetchall()
-            conn.close()
         except Exception as e:
             self.debug_print(f"Error reading locations from DB: {e}")
             rows = []
 
         if not rows:
             # Fallback to world_state
-            if not self.world_state['location_status']:
+            location_status = self.named_state()['location_status']
+            if not location_status:
                 print("No location information available yet.")
                 return
             rows = [
-                (name, None, None, len(d['events']), json.dumps(d['characters_present']))
+                (name, None, None, d['event_total'], json.dumps(d['characters_present']))
                 for name, d in sorted(
-                    self.world_state['location_status'].items(),
-                    key=lambda x: len(x[1]['events']), reverse=True
+                    location_status.items(),
+                    key=lambda x: x[1]['event_total'], reverse=True
                 )
             ]
 
@@ -1327,17 +2001,46 @@ class FantasyWorldEventGenerator:
                 print(f"  Characters present: {', '.join(display)}")
                 if len(characters) > 5:
                     print(f"    ...and {len(characters) - 5} more")
+            for entry in self.get_history('location_events', name, 2):
+                print(f"  #{entry['event_id']}: {entry['summary']}")
+            print()
+
+    def show_search_results(self, query: str, limit: int = 15):
+        """Display the events best matching a full-text search (see event_search.py)."""
+        try:
+            cursor = self.db.read().cursor()
+            if not search_available(cursor):
+                print("Search is not available: this SQLite build has no full-text search (FTS5).")
+                return
+            results = search_events(cursor, query, limit, marks=(Fore.YELLOW, Style.RESET_ALL))
+        except Exception as e:
+            self.debug_print(f"Error searching events: {e}")
+            results = []
+
+        if not results:
+            print(f"No events found for '{query}'.")
+            return
+
+        print(f"\n=== EVENTS MATCHING '{query}' ===\n")
+        for result in results:
+            print(f"{Fore.CYAN}#{result['id']}{Style.RESET_ALL} ({result['category']}, {result['timestamp']}) "
+                  f"{result['headline']}")
+            print(f"  {result['snippet']}")
             print()
 
     def show_active_plots(self):
         """Display active plots in the world."""
-        if not self.world_state['active_plots']:
+        active_plots = self.named_state()['active_plots']
+        dormant = [plot.name for plot in self.world_state['active_plots'] if plot.status == 'dormant']
+        if not active_plots:
             print("No active plots detected yet.")
+            if dormant:
+                print(f"Dormant plots: {', '.join(dormant)}")
             return
 
         print("\n=== ACTIVE PLOTS ===\n")
 
-        for i, plot in enumerate(self.world_state['active_plots']):
+        for i, plot in enumerate(active_plots):
             print(f"{Fore.RED}Plot {i+1}: {plot['name']}{Style.RESET_ALL}")
             print(f"  {plot['description']}")
 
@@ -1347,17 +2050,22 @@ class FantasyWorldEventGenerator:
             if 'locations' in plot and plot['locations']:
                 print(f"  Locations: {', '.join(plot['locations'])}")
 
-            print(f"  Related events: {', '.join(f'#{e}' for e in plot['events'])}")
+            related = self.get_history('plot_events', plot['name'], 10)
+            print(f"  Related events: {', '.join(f'#{e}' for e in related)}")
             print()
 
+        if dormant:
+            print(f"Dormant plots: {', '.join(dormant)}")
+
     def show_world_summary(self):
         """Display a summary of the current world state."""
         print(f"\n=== {self.world_name} WORLD SUMMARY ===\n")
+        state = self.named_state()
 
         # Time and date
-        print(f"{Fore.BLUE}Date:{Style.RESET_ALL} Year {self.world_state['time']['year']}, {self.world_state['time']['season'].capitalize()}")
-        print(f"{Fore.BLUE}Time:{Style.RESET_ALL} {self.world_state['time']['time_of_day'].capitalize()}")
-        print(f"{Fore.BLUE}Weather:{Style.RESET_ALL} {self.world_state['time']['weather'].capitalize()}")
+        print(f"{Fore.BLUE}Date:{Style.RESET_ALL} Year {state['time']['year']}, {state['time']['season'].capitalize()}")
+        print(f"{Fore.BLUE}Time:{Style.RESET_ALL} {state['time']['time_of_day'].capitalize()}")
+        print(f"{Fore.BLUE}Weather:{Style.RESET_ALL} {state['time']['weather'].capitalize()}")
 
         # Event statistics
         print(f"\n{Fore.YELLOW}Total Events:{Style.RESET_ALL} {self.event_count}")
@@ -1365,11 +2073,10 @@ class FantasyWorldEventGenerator:
         # Category stats if we have events
         if self.event_count > 0:
             try:
-                conn = sqlite3.connect(self.db_path)
+                conn = self.db.read()
                 cursor = conn.cursor()
                 cursor.execute("SELECT category, COUNT(*) FROM events GROUP BY category ORDER BY COUNT(*) DESC")
                 category_counts = cursor.fetchall()
-                conn.close()
 
                 print(f"\n{Fore.YELLOW}Event Categories:{Style.RESET_ALL}")
                 for category, count in category_counts:
@@ -1378,40 +2085,46 @@ class FantasyWorldEventGenerator:
                 self.debug_print(f"Error getting category stats: {e}")
 
         # Most active locations
-        if self.world_state['location_status']:
+        if state['location_status']:
             sorted_locs = sorted(
-                self.world_state['location_status'].items(),
-                key=lambda x: len(x[1]['events']),
+                state['location_status'].items(),
+                key=lambda x: x[1]['event_total'],
                 reverse=True
             )[:5]  # Top 5
 
             print(f"\n{Fore.GREEN}Most Active Locations:{Style.RESET_ALL}")
             for loc_name, loc_data in sorted_locs:
-                print(f"  {loc_name}: {len(loc_data['events'])} events")
+                print(f"  {loc_name}: {loc_data['event_total']} events")
 
         # Most active characters
-        if self.world_state['character_status']:
+        if state['character_status']:
             sorted_chars = sorted(
-                self.world_state['character_status'].items(),
-                key=lambda x: len(x[1]['events']),
+                state['character_status'].items(),
+                key=lambda x: x[1]['event_total'],
                 reverse=True
             )[:5]  # Top 5
 
             print(f"\n{Fore.MAGENTA}Most Active Characters:{Style.RESET_ALL}")
             for char_name, char_data in sorted_chars:
-                print(f"  {char_name} ({char_data['type']}): {len(char_data['events'])} events")
+                print(f"  {char_name} ({char_data['type']}): {char_data['event_total']} events")
 
         # Faction relations
-        if self.world_state['relations']:
+        if state['relations']:
             print(f"\n{Fore.RED}Notable Faction Relations:{Style.RESET_ALL}")
-            for relation_key, relation_data in self.world_state['relations'].items():
-                factions = relation_key.split('_')
-                print(f"  {factions[0]} and {factions[1]}: {relation_data['status']}")
+            for relation in state['relations']:
+                print(f"  {relation['factions'][0]} and {relation['factions'][1]}: {relation['status']}")
+
+        # Recent world changes, older ones read back from the archive
+        realm_shifts = self.get_history('realm_shifts', limit=3)
+        if realm_shifts:
+            print(f"\n{Fore.CYAN}Recent Realm Shifts:{Style.RESET_ALL}")
+            for shift in realm_shifts:
+                print(f"  {shift['timestamp']}: {shift['description']}")
 
         # Active plots
-        if self.world_state['active_plots']:
-            print(f"\n{Fore.CYAN}Active Plots:{Style.RESET_ALL} {len(self.world_state['active_plots'])}")
-            for i, plot in enumerate(self.world_state['active_plots'][:3]):  # Top 3
+        if state['active_plots']:
+            print(f"\n{Fore.CYAN}Active Plots:{Style.RESET_ALL} {len(state['active_plots'])}")
+            for i, plot in enumerate(state['active_plots'][:3]):  # Top 3
                 print(f"  {i+1}. {plot['name']}")
 
         print("\nWorld database stored at:", self.db_path)
@@ -1480,6 +2193,7 @@ def wait_with_menu(generator: 'FantasyWorldEventGenerator', wait_seconds: int, c
                     print(f"  {green}[7]{reset} View active plots")
                     print(f"  {green}[8]{reset} View character details")
                     print(f"  {green}[9]{reset} View location details")
+                    print(f"  {green}[S]{reset} Search event history")
                     print(f"  {green}[N]{reset} Open newspaper in browser")
                     print(f"  {red}[0]{reset} Exit")
                     print(f"  {green}[Enter]{reset} Return to waiting")
@@ -1559,8 +2273,15 @@ def wait_with_menu(generator: 'FantasyWorldEventGenerator', wait_seconds: int, c
                         generator.show_active_plots()
                     elif choice == '8':
                         generator.show_character_details()
+                        name = input("Character or faction for a timeline (Enter to skip): ").strip()
+                        if name:
+                            generator.show_character_details(name)
                     elif choice == '9':
                         generator.show_location_details()
+                    elif choice.lower() == 's':
+                        query = input("Search for: ").strip()
+                        if query:
+                            generator.show_search_results(query)
                     elif choice.lower() == 'n':
                         import webbrowser
                         webbrowser.open('http://localhost:5000')
@@ -1583,8 +2304,54 @@ def wait_with_menu(generator: 'FantasyWorldEventGenerator', wait_seconds: int, c
     return trigger_now
 
 
-def main():
+def main(argv: Optional[List[str]] = None):
     """Main function to run the Fantasy World Event Generator."""
+    import argparse
+    parser = argparse.ArgumentParser(description="Fantasy World Event Generator")
+    parser.add_argument("--simulate", type=int, metavar="N",
+                        help="run headless: generate N template events as fast as possible and report throughput")
+    parser.add_argument("--world", default="Simulation",
+                        help="world to use with --simulate or --compact (default: %(default)s)")
+    parser.add_argument("--seed", type=int,
+                        help="seed for a new simulated world, for reproducible event sequences")
+    parser.add_argument("--worlds", metavar="A,B,...",
+                        help="with --simulate: comma-separated worlds to simulate in parallel processes")
+    parser.add_argument("--workers", type=int,
+                        help="with --worlds: number of worker processes (default: CPU count)")
+    parser.add_argument("--no-repeat", type=int, default=0, metavar="K",
+                        help="never repeat one of the last K templates (default: off)")
+    parser.add_argument("--state-codec", choices=available_codecs(),
+                        help="how to store world-state checkpoints; an existing world is converted "
+                             "(default: the world's current codec, json for new worlds)")
+    parser.add_argument("--compact", action="store_true",
+                        help="thin out the saved world-state checkpoints of --world and exit")
+    args = parser.parse_args(argv)
+    if args.simulate is not None and args.simulate < 0:
+        parser.error("--simulate needs a number of events of 0 or more")
+
+    if args.compact:
+        db_path = _SCRIPT_DIR / f"{args.world.lower().replace(' ', '_')}_events.db"
+        if not db_path.exists():
+            print(f"No database found for world '{args.world}' ({db_path})")
+            return
+        print(format_report(compact_world_state(str(db_path), convert=True)))
+        return
+
+    if args.simulate is not None and args.worlds:
+        from simulation import simulate_worlds, print_multi_world_report
+        world_names = [name.strip() for name in args.worlds.split(",") if name.strip()]
+        stats = simulate_worlds(world_names, args.simulate, workers=args.workers, seed=args.seed,
+                                no_repeat_window=args.no_repeat, state_codec=args.state_codec)
+        print_multi_world_report(stats)
+        return
+
+    if args.simulate is not None:
+        from simulation import run_simulation, print_simulation_report
+        stats = run_simulation(args.world, args.simulate, progress_every=max(args.simulate // 10, 1),
+                               seed=args.seed, no_repeat_window=args.no_repeat, state_codec=args.state_codec)
+        print_simulation_report(stats)
+        return
+
     print("\n" + "="*80)
     print("FANTASY WORLD EVENT GENERATOR".center(80))
     print("="*80 + "\n")
@@ -1653,7 +2420,8 @@ def main():
 
     # Initialize the generator with debug mode
     generator = FantasyWorldEventGenerator(world_name, api_key, telegram_token, telegram_chat_id, debug_mode,
-                                           ai_provider=ai_provider, ai_model=ai_model, ai_base_url=ai_base_url)
+                                           ai_provider=ai_provider, ai_model=ai_model, ai_base_url=ai_base_url,
+                                           no_repeat_window=args.no_repeat, state_codec=args.state_codec)
     generator.ai_event_mode = ai_event_mode
 
     # Save all settings
@@ -1678,6 +2446,9 @@ def main():
                         ai_provider=cfg['ai_provider'], ai_model=cfg['ai_model'],
                         ai_base_url=cfg['ai_base_url'], ai_event_mode=cfg['ai_event_mode'])
 
+    # Readers in other threads use the published snapshot, so have one from the start
+    generator.publish_snapshot()
+
     # ── Start the newspaper web server ──
     try:
         from web_server import start_web_server
@@ -1686,6 +2457,7 @@ def main():
             world_name=world_name,
             images_dir=str(generator.images_dir),
             port=5000,
+            snapshot=lambda: generator.snapshot,
         )
     except ImportError as imp_err:
         print(f"(Flask not installed — newspaper web page disabled. pip install flask)")
@@ -1696,6 +2468,9 @@ def main():
         traceback.print_exc()
         web_thread = None
 
+    # Thin out old world-state checkpoints every few hours
+    start_compaction_thread(generator.db_path)
+
     # Print world information
     print(f"\nWorld '{world_name}' created successfully!")
     print(f"AI Provider: {AI_PROVIDERS.get(ai_provider, {}).get('name', ai_provider)}")
@@ -1721,7 +2496,7 @@ def main():
                                                      characters, monsters, magic_fields)
                     recent_events = generator.get_recent_events(8)
                     ai_event = generator.ai.generate_full_ai_event(
-                        generator.world_name, generator.world_state, recent_events,
+                        generator.world_name, generator.named_state(), recent_events,
                         locations, factions, characters, monsters, magic_fields,
                         list(event_categories.keys())
                     )
@@ -1810,6 +2585,7 @@ def main():
             wait_with_menu(generator, wait_time, config, _save_config)
 
     except KeyboardInterrupt:
+        generator.close()
         print("\n\nExiting Fantasy World Event Generator.")
         print(f"Your world '{world_name}' has been saved.")
         print(f"World database: {generator.db_path}")
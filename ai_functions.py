@@ -547,9 +547,9 @@ class AIFunctions:
             # Get notable faction relations
             relations_text = ""
             if world_state.get('relations'):
-                notable = [(k, v) for k, v in world_state['relations'].items() if v['status'] != 'neutral']
+                notable = [r for r in world_state['relations'] if r['status'] != 'neutral']
                 if notable:
-                    rels = [f"- {k.replace('_', ' and ')}: {v['status']}" for k, v in notable[:5]]
+                    rels = [f"- {r['factions'][0]} and {r['factions'][1]}: {r['status']}" for r in notable[:5]]
                     relations_text = "\nNotable faction relations:\n" + "\n".join(rels)
 
             prompt = f"""You are the master storyteller for the fantasy world of {world_name}.
@@ -0,0 +1,86 @@
+"""
+Benchmark: writing events inline vs. on the background writer thread.
+
+Run from the repository root:
+    python benchmarks/bench_background_writer.py [events]
+
+Generates ``events`` events into a throwaway world with each event's unit of
+work committed inline on the event loop, then again with the background
+writer (group commit), both with synchronous=FULL so every commit fsyncs the
+WAL. Reports how long save_event() keeps the event loop busy, the overall
+throughput including the final flush(), and the commits per event.
+"""
+
+import contextlib
+import io
+import shutil
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import db_connections  # noqa: E402
+from Fantasy import FantasyWorldEventGenerator  # noqa: E402
+
+WORLD_NAME = "bench background writer"
+
+
+def _percentile(values, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def run(events: int, background: bool) -> None:
+    db_connections.SYNCHRONOUS = "FULL"
+    with contextlib.redirect_stdout(io.StringIO()):
+        generator = FantasyWorldEventGenerator(WORLD_NAME, seed=31)
+    generator.headless = True
+    db_path = generator.db_path
+    try:
+        if not background:
+            generator.db.stop_background_writer()
+        commits = 0
+
+        def count_commits(statement: str) -> None:
+            nonlocal commits
+            if statement.startswith("COMMIT"):
+                commits += 1
+
+        with generator.db.write() as conn:
+            conn.set_trace_callback(count_commits)
+
+        timings = []
+        commits = 0
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(events):
+                event, category = generator.generate_event()
+                event_data = generator.extract_event_data(event)
+                t0 = time.perf_counter()
+                generator.save_event(event, category, event_data)
+                timings.append((time.perf_counter() - t0) * 1000)
+        generator.db.flush()
+        elapsed = time.perf_counter() - start
+
+        print("background writer" if background else "inline commits")
+        print(f"  {'save_event, median':<28}{statistics.median(timings):>9.3f} ms")
+        print(f"  {'save_event, p99':<28}{_percentile(timings, 0.99):>9.3f} ms")
+        print(f"  {'events/sec incl. flush':<28}{events / elapsed:>9,.0f}")
+        print(f"  {'commits per event':<28}{commits / events:>9.3f}")
+    finally:
+        generator.db.close()
+        for suffix in ("", "-wal", "-shm"):
+            Path(db_path + suffix).unlink(missing_ok=True)
+        shutil.rmtree(Path(db_path).parent / f"{WORLD_NAME.replace(' ', '_')}_world", ignore_errors=True)
+
+
+def main(events: int = 5_000) -> None:
+    print(f"{events:,} events, synchronous=FULL\n")
+    for background in (False, True):
+        run(events, background)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
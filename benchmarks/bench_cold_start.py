@@ -0,0 +1,69 @@
+"""
+Benchmark: cold start of a large world with lazily loaded state sections.
+
+Run from the repository root:
+    python benchmarks/bench_cold_start.py [events] [repeats]
+
+Simulates a throwaway world, then times opening it the way the generator does
+(only the "world" section is read up front) against reading every section at
+once, which is what startup used to do, and the time until the first event is
+applied.
+"""
+
+import contextlib
+import io
+import shutil
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from Fantasy import FantasyWorldEventGenerator  # noqa: E402
+from simulation import run_simulation  # noqa: E402
+
+WORLD_NAME = "bench cold start"
+
+
+def _open(load_all: bool = False, first_event: bool = False) -> FantasyWorldEventGenerator:
+    with contextlib.redirect_stdout(io.StringIO()):
+        generator = FantasyWorldEventGenerator(WORLD_NAME)
+        generator.headless = True
+        if load_all:
+            generator.world_state.load_all()
+            generator.relations
+        if first_event:
+            event, category = generator.generate_event()
+            event_data = generator.extract_event_data(event)
+            generator.save_event_to_db(event, category, event_data)
+            generator.apply_event_to_world(event, category, event_data)
+    return generator
+
+
+def _median_ms(func, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main(n: int = 20_000, repeats: int = 10) -> None:
+    with contextlib.redirect_stdout(io.StringIO()):
+        stats = run_simulation(WORLD_NAME, n, seed=17)
+    db_path = stats["db_path"]
+    try:
+        loaded = sorted(_open().world_state.loaded)
+        print(f"{n:,} events; sections loaded at startup: {', '.join(loaded)}\n")
+        print(f"{'startup, lazy sections':<34}{_median_ms(_open, repeats):>9.1f} ms")
+        print(f"{'startup, every section':<34}{_median_ms(lambda: _open(load_all=True), repeats):>9.1f} ms")
+        print(f"{'startup + first event':<34}{_median_ms(lambda: _open(first_event=True), repeats):>9.1f} ms")
+    finally:
+        Path(db_path).unlink(missing_ok=True)
+        shutil.rmtree(Path(db_path).parent / f"{WORLD_NAME.replace(' ', '_')}_world", ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
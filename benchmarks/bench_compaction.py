@@ -0,0 +1,86 @@
+"""
+Benchmark: world-state checkpoint compaction.
+
+Run from the repository root:
+    python benchmarks/bench_compaction.py [checkpoints] [days]
+
+Simulates a small throwaway world, then fills its world_state table with
+``checkpoints`` copies of its snapshot spread evenly over the last ``days``
+days -- the shape of a long-running world saved before the journal. Runs
+compact_world_state() while another thread keeps reading the latest
+checkpoint the way the web server does, and reports the rows and bytes
+reclaimed plus the slowest of those reads.
+"""
+
+import contextlib
+import datetime
+import io
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from simulation import run_simulation  # noqa: E402
+from state_retention import TIMESTAMP_FORMAT, compact_world_state, format_report  # noqa: E402
+
+WORLD_NAME = "bench compaction"
+
+
+def main(checkpoints: int = 10_000, days: int = 60) -> None:
+    with contextlib.redirect_stdout(io.StringIO()):
+        stats = run_simulation(WORLD_NAME, 200, seed=11)
+    db_path = stats["db_path"]
+    try:
+        conn = sqlite3.connect(db_path)
+        state_json, state_data, codec, version = conn.execute('''
+            SELECT state_json, state_data, codec, schema_version FROM world_state ORDER BY id DESC LIMIT 1
+        ''').fetchone()
+        now = datetime.datetime.now()
+        step = datetime.timedelta(days=days) / checkpoints
+        conn.executemany('''
+            INSERT INTO world_state (timestamp, state_json, state_data, codec, schema_version, event_id, journal_id)
+            VALUES (?, ?, ?, ?, ?, NULL, NULL)
+        ''', (((now - step * (checkpoints - i)).strftime(TIMESTAMP_FORMAT), state_json, state_data, codec, version)
+              for i in range(checkpoints)))
+        conn.commit()
+        conn.close()
+        size_before = sum(Path(db_path + suffix).stat().st_size for suffix in ("", "-wal")
+                          if Path(db_path + suffix).exists())
+
+        reads = []
+        done = threading.Event()
+
+        def reader():
+            read_conn = sqlite3.connect(db_path, timeout=30)
+            while not done.is_set():
+                start = time.perf_counter()
+                read_conn.execute("SELECT state_json, state_data FROM world_state ORDER BY id DESC LIMIT 1").fetchall()
+                reads.append((time.perf_counter() - start) * 1000)
+                time.sleep(0.005)
+            read_conn.close()
+
+        thread = threading.Thread(target=reader)
+        thread.start()
+        start = time.perf_counter()
+        report = compact_world_state(db_path)
+        elapsed = time.perf_counter() - start
+        done.set()
+        thread.join()
+
+        remaining = sqlite3.connect(db_path).execute("SELECT COUNT(*) FROM world_state").fetchone()[0]
+        print(f"{checkpoints:,} checkpoints over {days} days, {size_before / 1024 / 1024:,.1f} MB database and WAL")
+        print(format_report(report))
+        print(f"{remaining:,} checkpoints kept, compaction took {elapsed:,.1f} s")
+        print(f"concurrent reads: {len(reads):,}, slowest {max(reads):,.1f} ms")
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            Path(db_path + suffix).unlink(missing_ok=True)
+        shutil.rmtree(Path(db_path).parent / f"{WORLD_NAME.replace(' ', '_')}_world", ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
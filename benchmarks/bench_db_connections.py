@@ -0,0 +1,96 @@
+"""
+Benchmark: event writes and newspaper reads against the same database.
+
+Run from the repository root (needs Flask, for the web server's queries):
+    python benchmarks/bench_db_connections.py [events] [readers]
+
+Generates ``events`` events into a throwaway world while ``readers`` threads
+keep loading the newspaper front page data (latest event with its details and
+the recent headlines) the way the web server does. Reports the write latency
+per event, the read latency, and how many writes or reads failed with
+"database is locked".
+"""
+
+import contextlib
+import io
+import shutil
+import sqlite3
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import web_server  # noqa: E402
+from Fantasy import FantasyWorldEventGenerator  # noqa: E402
+
+WORLD_NAME = "bench db connections"
+
+
+def _percentile(values, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def main(events: int = 1_000, readers: int = 4) -> None:
+    with contextlib.redirect_stdout(io.StringIO()):
+        generator = FantasyWorldEventGenerator(WORLD_NAME, seed=23)
+    generator.headless = True
+    db_path = generator.db_path
+    web_server._db_path = db_path
+    try:
+        errors = []
+        generator.debug_mode = True
+        generator.debug_print = lambda message: errors.append(message)
+
+        reads, failed_reads = [], 0
+        done = threading.Event()
+
+        def reader():
+            nonlocal failed_reads
+            while not done.is_set():
+                start = time.perf_counter()
+                # Both return nothing only on errors: the world has events
+                if web_server._get_latest_event() is None or not web_server._get_recent_events(10):
+                    failed_reads += 1
+                reads.append((time.perf_counter() - start) * 1000)
+                time.sleep(0.002)
+
+        threads = [threading.Thread(target=reader) for _ in range(readers)]
+        writes = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i in range(events):
+                if i == 1:
+                    for thread in threads:
+                        thread.start()
+                event, category = generator.generate_event()
+                event_data = generator.extract_event_data(event)
+                start = time.perf_counter()
+                generator.save_event_to_db(event, category, event_data)
+                generator.apply_event_to_world(event, category, event_data)
+                generator.persist_event_effects(event_data)
+                writes.append((time.perf_counter() - start) * 1000)
+        done.set()
+        for thread in threads:
+            thread.join()
+        failed_writes = sum("locked" in message for message in errors)
+        journal_mode = sqlite3.connect(db_path).execute("PRAGMA journal_mode").fetchone()[0]
+
+        print(f"{events:,} events, {readers} reader threads, journal_mode={journal_mode}\n")
+        print(f"{'write per event, median':<30}{statistics.median(writes):>9.2f} ms")
+        print(f"{'write per event, p99':<30}{_percentile(writes, 0.99):>9.2f} ms")
+        print(f"{'front page read, median':<30}{statistics.median(reads):>9.2f} ms")
+        print(f"{'front page read, p99':<30}{_percentile(reads, 0.99):>9.2f} ms")
+        print(f"{'reads':<30}{len(reads):>9,}")
+        print(f"{'failed writes / reads':<30}{failed_writes:>5} / {failed_reads}")
+    finally:
+        generator.db.close()
+        for suffix in ("", "-wal", "-shm"):
+            Path(db_path + suffix).unlink(missing_ok=True)
+        shutil.rmtree(Path(db_path).parent / f"{WORLD_NAME.replace(' ', '_')}_world", ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,137 @@
+"""
+Benchmark: query plans and timings with and without the schema version 2 indexes.
+
+Run from the repository root:
+    python benchmarks/bench_db_indexes.py [events]
+
+Simulates ``events`` events into a throwaway world, then times the queries
+behind the newspaper pages, the Telegram buttons and the console views on the
+database without the version 2 indexes (as migrated to version 1) and after
+migrating it to the current version. Template events carry no Telegram
+details, so every event gets an event_details row first, as in a world run
+with the AI. Checks with EXPLAIN QUERY PLAN that each query uses its index
+afterwards and exits with status 1 if one does not.
+"""
+
+import contextlib
+import io
+import shutil
+import sqlite3
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from db_schema import migrate_database  # noqa: E402
+from simulation import run_simulation  # noqa: E402
+
+WORLD_NAME = "bench db indexes"
+RUNS = 20
+
+# (name, query, parameters, index the query must use)
+QUERIES = [
+    ("front page (latest + details)", """
+        SELECT e.id, e.headline, d.hidden_details, d.connections, d.plot_hooks, d.consequences
+        FROM events e LEFT JOIN event_details d ON d.event_id = e.id
+        ORDER BY e.id DESC LIMIT 1
+     """, (), "idx_event_details_event"),
+    ("sidebar (10 recent + details)", """
+        SELECT e.id, e.headline, d.hidden_details
+        FROM events e LEFT JOIN event_details d ON d.event_id = e.id
+        ORDER BY e.id DESC LIMIT 10
+     """, (), "idx_event_details_event"),
+    ("telegram button lookup", """
+        SELECT hidden_details, connections, plot_hooks, consequences
+        FROM event_details WHERE event_id = ?
+     """, ("middle",), "idx_event_details_event"),
+    ("characters by event_count", """
+        SELECT name, type, last_location, last_seen, event_count FROM characters
+        ORDER BY event_count DESC
+     """, (), "idx_characters_event_count"),
+    ("locations by event_count", """
+        SELECT name, last_event_id, last_seen, event_count, characters_present FROM locations
+        ORDER BY event_count DESC
+     """, (), "idx_locations_event_count"),
+    ("category counts", """
+        SELECT category, COUNT(*) FROM events GROUP BY category ORDER BY COUNT(*) DESC
+     """, (), "idx_events_category"),
+    ("events of one category", """
+        SELECT id, headline FROM events WHERE category = ? ORDER BY id DESC LIMIT 20
+     """, ("category",), "idx_events_category"),
+]
+
+VERSION_2_INDEXES = ("idx_event_details_event", "idx_characters_event_count",
+                     "idx_locations_event_count", "idx_events_category")
+
+
+def _measure(conn: sqlite3.Connection, values: dict):
+    results = {}
+    for name, query, params, index in QUERIES:
+        params = tuple(values[p] for p in params)
+        plan = " / ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params))
+        timings = []
+        for _ in range(RUNS):
+            start = time.perf_counter()
+            conn.execute(query, params).fetchall()
+            timings.append((time.perf_counter() - start) * 1000)
+        results[name] = (statistics.median(timings), plan, index in plan)
+    return results
+
+
+def main(events: int = 100_000) -> None:
+    with contextlib.redirect_stdout(io.StringIO()):
+        stats = run_simulation(WORLD_NAME, events, seed=37)
+    db_path = stats["db_path"]
+    try:
+        conn = sqlite3.connect(db_path)
+        conn.execute("""
+            INSERT INTO event_details (event_id, hidden_details, connections, plot_hooks, consequences)
+            SELECT id, 'hidden details', 'connections', 'plot hooks', 'consequences' FROM events
+            WHERE id NOT IN (SELECT event_id FROM event_details)
+        """)
+        conn.commit()
+        values = {"middle": events // 2,
+                  "category": conn.execute("SELECT category FROM events LIMIT 1").fetchone()[0]}
+        counts = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                  for table in ("events", "event_details", "characters", "locations")}
+
+        # Back to version 1
+        for index in VERSION_2_INDEXES:
+            conn.execute(f"DROP INDEX IF EXISTS {index}")
+        conn.execute("DELETE FROM schema_version WHERE version >= 2")
+        conn.commit()
+        conn.execute("ANALYZE")
+        before = _measure(conn, values)
+
+        start = time.perf_counter()
+        applied = migrate_database(conn.cursor())
+        conn.commit()
+        migrate_ms = (time.perf_counter() - start) * 1000
+        conn.execute("ANALYZE")
+        after = _measure(conn, values)
+        conn.close()
+
+        print(", ".join(f"{count:,} {table}" for table, count in counts.items()))
+        print(f"migration {applied} took {migrate_ms:.0f} ms\n")
+        print(f"{'query':<32}{'before':>11}{'after':>11}  index used")
+        failed = 0
+        for name, _, _, index in QUERIES:
+            used = after[name][2]
+            failed += not used
+            print(f"{name:<32}{before[name][0]:>8.2f} ms{after[name][0]:>8.2f} ms  "
+                  f"{'yes' if used else 'NO'} ({index})")
+        print("\nplans after migrating:")
+        for name, _, _, _ in QUERIES:
+            print(f"  {name}: {after[name][1]}")
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            Path(db_path + suffix).unlink(missing_ok=True)
+        shutil.rmtree(Path(db_path).parent / f"{WORLD_NAME.replace(' ', '_')}_world", ignore_errors=True)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
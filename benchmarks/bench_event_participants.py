@@ -0,0 +1,105 @@
+"""
+Benchmark: character and faction timelines from the JSON columns vs. the join tables.
+
+Run from the repository root:
+    python benchmarks/bench_event_participants.py [events]
+
+Simulates ``events`` events into a throwaway world, then times the same
+lookups answered by scanning events.characters / events.factions (LIKE, then
+parsing the JSON of every candidate row, as the history reads did before
+schema version 4) and by event_participants.py's index lookups in
+event_characters / event_factions. Also times the version 4 backfill of the
+join tables from the JSON lists.
+"""
+
+import contextlib
+import io
+import json
+import shutil
+import sqlite3
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from db_schema import migrate_database  # noqa: E402
+from event_participants import character_timeline, faction_timeline  # noqa: E402
+from simulation import run_simulation  # noqa: E402
+
+WORLD_NAME = "bench event participants"
+RUNS = 10
+
+
+def _median_ms(fn) -> float:
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def _json_character(conn: sqlite3.Connection, name: str, limit: int) -> list:
+    rows = conn.execute("SELECT id, characters FROM events WHERE characters LIKE ? ORDER BY id DESC",
+                        (f"%{name}%",))
+    return [event_id for event_id, characters in rows
+            if any(c.get("name") == name for c in json.loads(characters))][:limit]
+
+
+def _json_factions(conn: sqlite3.Connection, faction: str, other: str, limit: int) -> list:
+    rows = conn.execute("SELECT id, factions FROM events WHERE factions LIKE ? ORDER BY id DESC",
+                        (f"%{faction}%",))
+    return [event_id for event_id, factions in rows
+            if {faction, other} <= set(json.loads(factions))][:limit]
+
+
+def main(events: int = 100_000) -> None:
+    with contextlib.redirect_stdout(io.StringIO()):
+        stats = run_simulation(WORLD_NAME, events, seed=43)
+    db_path = stats["db_path"]
+    try:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        character, appearances = conn.execute('''
+            SELECT character, COUNT(*) FROM event_characters GROUP BY character ORDER BY COUNT(*) DESC
+        ''').fetchone()
+        faction, other, shared = conn.execute('''
+            SELECT p.faction, q.faction, COUNT(*) FROM event_factions p
+            JOIN event_factions q ON q.event_id = p.event_id AND q.faction > p.faction
+            GROUP BY p.faction, q.faction ORDER BY COUNT(*) DESC
+        ''').fetchone()
+
+        # Each pair must return the same events
+        cases = [
+            (f"{character}: newest 20", lambda: _json_character(conn, character, 20),
+             lambda: [e["id"] for e in character_timeline(cursor, character, 20)]),
+            (f"{character}: all {appearances}", lambda: _json_character(conn, character, events),
+             lambda: [e["id"] for e in character_timeline(cursor, character, events)]),
+            (f"{faction} + {other}: all {shared}", lambda: _json_factions(conn, faction, other, events),
+             lambda: [e["id"] for e in faction_timeline(cursor, faction, events, other=other)]),
+        ]
+        print(f"{events:,} events\n")
+        print(f"{'lookup':<56}{'JSON scan':>12}{'join table':>13}  same events")
+        for name, scan, lookup in cases:
+            same = scan() == lookup()
+            print(f"{name:<56}{_median_ms(scan):>9.2f} ms{_median_ms(lookup):>10.2f} ms  {'yes' if same else 'NO'}")
+
+        conn.execute("DROP TABLE event_characters")
+        conn.execute("DROP TABLE event_factions")
+        conn.execute("DELETE FROM schema_version WHERE version >= 4")
+        start = time.perf_counter()
+        migrate_database(conn.cursor())
+        conn.commit()
+        print(f"\nbackfilling the join tables (migration to version 4) took "
+              f"{(time.perf_counter() - start) * 1000:.0f} ms")
+        conn.close()
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            Path(db_path + suffix).unlink(missing_ok=True)
+        shutil.rmtree(Path(db_path).parent / f"{WORLD_NAME.replace(' ', '_')}_world", ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,72 @@
+"""
+Benchmark: full-text search of the event history.
+
+Run from the repository root:
+    python benchmarks/bench_event_search.py [events]
+
+Simulates ``events`` events into a throwaway world and times search_events()
+for a first page of 20 ranked results, against finding every matching event
+with a LIKE scan over the same columns, as searching history by hand did
+before the events_fts index (ranking needs every match). Reports how many
+events match each query.
+"""
+
+import contextlib
+import io
+import shutil
+import sqlite3
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from event_search import fts_query, search_events  # noqa: E402
+from simulation import run_simulation  # noqa: E402
+
+WORLD_NAME = "bench event search"
+RUNS = 10
+
+QUERIES = ["dragon", "merchant guild", "storm*", "the dragon", "the", "no such word"]
+
+
+def _median_ms(fn) -> float:
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def _like_scan(conn: sqlite3.Connection, text: str) -> list:
+    words = [word.rstrip("*") for word in text.split()]
+    where = " AND ".join("(headline LIKE ? OR description LIKE ? OR event_text LIKE ?)" for _ in words)
+    params = [f"%{word}%" for word in words for _ in range(3)]
+    return conn.execute(f"SELECT id, headline FROM events WHERE {where} ORDER BY id DESC", params).fetchall()
+
+
+def main(events: int = 100_000) -> None:
+    with contextlib.redirect_stdout(io.StringIO()):
+        stats = run_simulation(WORLD_NAME, events, seed=41)
+    db_path = stats["db_path"]
+    try:
+        conn = sqlite3.connect(db_path)
+        print(f"{events:,} events\n")
+        print(f"{'query':<16}{'matches':>9}{'LIKE scan':>13}{'ranked FTS5':>14}")
+        for text in QUERIES:
+            matches = conn.execute("SELECT COUNT(*) FROM events_fts WHERE events_fts MATCH ?",
+                                   (fts_query(text),)).fetchone()[0]
+            like_ms = _median_ms(lambda: _like_scan(conn, text))
+            fts_ms = _median_ms(lambda: search_events(conn.cursor(), text))
+            print(f"{text:<16}{matches:>9,}{like_ms:>10.1f} ms{fts_ms:>11.1f} ms")
+        conn.close()
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            Path(db_path + suffix).unlink(missing_ok=True)
+        shutil.rmtree(Path(db_path).parent / f"{WORLD_NAME.replace(' ', '_')}_world", ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,84 @@
+"""
+Benchmark: database commits and write latency per event.
+
+Run from the repository root:
+    python benchmarks/bench_event_transaction.py [events]
+
+Generates ``events`` events into a throwaway world, once with the default
+synchronous=NORMAL and once with synchronous=FULL, and counts the COMMITs the
+writer connection runs for each event. In WAL mode every commit under
+synchronous=FULL fsyncs the WAL file, so the commit count is the fsync count
+per event there; NORMAL only syncs at WAL checkpoints. Reports the time to
+save an event and persist its effects, and the commits per event.
+"""
+
+import contextlib
+import io
+import shutil
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import db_connections  # noqa: E402
+from Fantasy import FantasyWorldEventGenerator  # noqa: E402
+
+WORLD_NAME = "bench event transaction"
+
+
+def _percentile(values, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def run(events: int, synchronous: str) -> None:
+    db_connections.SYNCHRONOUS = synchronous
+    with contextlib.redirect_stdout(io.StringIO()):
+        generator = FantasyWorldEventGenerator(WORLD_NAME, seed=29)
+    generator.headless = True
+    db_path = generator.db_path
+    try:
+        # Commit each event inline (bench_background_writer.py covers group commit)
+        generator.db.stop_background_writer()
+        commits = 0
+
+        def count_commits(statement: str) -> None:
+            nonlocal commits
+            if statement.startswith("COMMIT"):
+                commits += 1
+
+        with generator.db.write() as conn:
+            conn.set_trace_callback(count_commits)
+
+        timings = []
+        commits = 0
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(events):
+                event, category = generator.generate_event()
+                event_data = generator.extract_event_data(event)
+                start = time.perf_counter()
+                generator.save_event(event, category, event_data)
+                timings.append((time.perf_counter() - start) * 1000)
+
+        print(f"synchronous={synchronous}")
+        print(f"  {'commits per event':<28}{commits / events:>9.2f}")
+        print(f"  {'save + persist, median':<28}{statistics.median(timings):>9.2f} ms")
+        print(f"  {'save + persist, p99':<28}{_percentile(timings, 0.99):>9.2f} ms")
+        print(f"  {'save + persist, mean':<28}{statistics.fmean(timings):>9.2f} ms")
+    finally:
+        generator.db.close()
+        for suffix in ("", "-wal", "-shm"):
+            Path(db_path + suffix).unlink(missing_ok=True)
+        shutil.rmtree(Path(db_path).parent / f"{WORLD_NAME.replace(' ', '_')}_world", ignore_errors=True)
+
+
+def main(events: int = 2_000) -> None:
+    print(f"{events:,} events\n")
+    for synchronous in ("NORMAL", "FULL"):
+        run(events, synchronous)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,81 @@
+"""
+Benchmark: Aho-Corasick EntityIndex vs. the original per-entity substring loops.
+
+Run from the repository root:
+    python benchmarks/bench_extract.py [texts]
+
+Measures short template events and long AI-style passages (several events run
+together), and reports how many results differ because of word boundaries.
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fantasy_events_data import event_categories, locations, factions, characters  # noqa: E402
+from entity_index import EntityIndex  # noqa: E402
+from bench_fill_template import build_engine  # noqa: E402
+
+
+def legacy_extract(event_text: str) -> dict:
+    """The pre-automaton extract_event_data, kept verbatim for comparison."""
+    data = {'location': '', 'characters': [], 'factions': []}
+    for location in locations:
+        if location in event_text:
+            data['location'] = location
+            break
+    for char_type, chars in characters.items():
+        for char in chars:
+            if char in event_text:
+                data['characters'].append({'name': char, 'type': char_type})
+    for faction in factions:
+        if faction in event_text:
+            data['factions'].append(faction)
+    return data
+
+
+def bench(label: str, texts, index: EntityIndex) -> None:
+    start = time.perf_counter()
+    for text in texts:
+        legacy_extract(text)
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for text in texts:
+        index.extract(text)
+    new = time.perf_counter() - start
+
+    avg_len = sum(map(len, texts)) / len(texts)
+    print(f"{label} (avg {avg_len:,.0f} chars):")
+    print(f"  substring loops : {len(texts) / legacy:>10,.0f} texts/sec")
+    print(f"  Aho-Corasick    : {len(texts) / new:>10,.0f} texts/sec  ({legacy / new:.1f}x)")
+
+
+def main(n: int = 20_000) -> None:
+    random.seed(5)
+    engine = build_engine()
+    templates = [t for ts in event_categories.values() for t in ts]
+    short = [engine.render_template(random.choice(templates), random) for _ in range(n)]
+    long = [" ".join(random.sample(short, 12)) for _ in range(n // 10)]
+
+    start = time.perf_counter()
+    index = EntityIndex.from_world(locations, factions, characters)
+    print(f"Automaton built in {(time.perf_counter() - start) * 1000:.2f} ms\n")
+
+    bench("Template events", short, index)
+    bench("AI-length passages", long, index)
+
+    # Substring false positives the old loops reported, e.g. "Whisper" in "Whispering Woods"
+    differing = sum(
+        1 for text in short
+        if sorted(c['name'] for c in legacy_extract(text)['characters'])
+        != sorted(name for name, _ in index.extract(text)['character'])
+    )
+    print(f"\nTemplate events whose character matches changed: {differing:,} of {len(short):,}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
@@ -0,0 +1,51 @@
+"""
+Benchmark: per-event generate_event() + extract_event_data() vs. batched generate_events(n).
+
+Run from the repository root:
+    python benchmarks/bench_generate_events.py [events] [batch_size]
+
+Creates a throwaway world next to Fantasy.py and removes it afterwards.
+"""
+
+import shutil
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from Fantasy import FantasyWorldEventGenerator  # noqa: E402
+
+WORLD_NAME = "bench generate events"
+
+
+def main(n: int = 100_000, batch_size: int = 10_000) -> None:
+    generator = FantasyWorldEventGenerator(WORLD_NAME, seed=7)
+    try:
+        def per_event(extract: bool) -> float:
+            start = time.perf_counter()
+            for _ in range(n):
+                event, category = generator.generate_event()
+                if extract:
+                    generator.extract_event_data(event)
+            return time.perf_counter() - start
+
+        def batched(extract: bool) -> float:
+            start = time.perf_counter()
+            produced = 0
+            while produced < n:
+                produced += len(generator.generate_events(min(batch_size, n - produced), extract=extract))
+            return time.perf_counter() - start
+
+        for label, extract in (("generation only", False), ("with extraction", True)):
+            single, batch = per_event(extract), batched(extract)
+            print(f"{label}:")
+            print(f"  generate_event()        : {n / single:>10,.0f} events/sec")
+            print(f"  generate_events({batch_size:,}) : {n / batch:>10,.0f} events/sec  ({single / batch:.1f}x)")
+    finally:
+        Path(generator.db_path).unlink(missing_ok=True)
+        shutil.rmtree(generator.world_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,68 @@
+"""
+Benchmark: world-state bytes written per event, journal vs. full snapshots.
+
+Run from the repository root:
+    python benchmarks/bench_journal.py [events] [window]
+
+Simulates a throwaway world and reports, for every ``window`` events, the
+average bytes written to world_journal and to world_state checkpoint
+sections per event, next to the size of one full snapshot -- what
+update_world_state() used to write after every single event.
+"""
+
+import contextlib
+import io
+import shutil
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from simulation import run_simulation  # noqa: E402
+
+WORLD_NAME = "bench journal"
+
+
+def main(n: int = 100_000, window: int = 10_000) -> None:
+    with contextlib.redirect_stdout(io.StringIO()):
+        stats = run_simulation(WORLD_NAME, n, seed=5)
+    db_path = stats["db_path"]
+    try:
+        conn = sqlite3.connect(db_path)
+        journal = dict(conn.execute('''
+            SELECT (event_id - 1) / ?, SUM(LENGTH(delta_json)) FROM world_journal GROUP BY 1
+        ''', (window,)).fetchall())
+        # Bytes of the sections each checkpoint wrote, and the size of the whole
+        # state it stands for (the newest row of every section up to it)
+        checkpoints = {}
+        for event_id, written, whole in conn.execute('''
+            SELECT w.event_id,
+                   (SELECT SUM(LENGTH(state_json)) FROM world_state_sections WHERE checkpoint_id = w.id),
+                   (SELECT SUM(LENGTH(state_json)) FROM world_state_sections
+                    WHERE id IN (SELECT MAX(id) FROM world_state_sections
+                                 WHERE checkpoint_id <= w.id GROUP BY section))
+            FROM world_state w WHERE w.event_id > 0
+        ''').fetchall():
+            total, largest = checkpoints.get((event_id - 1) // window, (0, 0))
+            checkpoints[(event_id - 1) // window] = (total + written, max(largest, whole))
+        conn.close()
+
+        print(f"{n:,} events, {stats['events_per_sec']:,.0f} events/sec\n")
+        print(f"{'events':>15}  {'journal B/ev':>12}  {'checkpoint B/ev':>15}  {'total B/ev':>10}  {'snapshot B/ev':>13}")
+        snapshot = 0
+        for bucket in range((n + window - 1) // window):
+            journal_bytes = journal.get(bucket, 0)
+            checkpoint_bytes, largest = checkpoints.get(bucket, (0, None))
+            snapshot = largest or snapshot
+            events = min(window, n - bucket * window)
+            label = f"{bucket * window + 1:,}-{bucket * window + events:,}"
+            print(f"{label:>15}  {journal_bytes / events:>12,.0f}  {checkpoint_bytes / events:>15,.0f}  "
+                  f"{(journal_bytes + checkpoint_bytes) / events:>10,.0f}  {snapshot:>13,}")
+    finally:
+        Path(db_path).unlink(missing_ok=True)
+        shutil.rmtree(Path(db_path).parent / f"{WORLD_NAME.replace(' ', '_')}_world", ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,63 @@
+"""
+Benchmark: matching events to plots with the keyword index.
+
+Run from the repository root:
+    python benchmarks/bench_plots.py [plots] [events]
+
+Builds ``plots`` synthetic plots with keywords drawn from a fixed vocabulary
+and matches ``events`` synthetic event texts against them, once with the
+linear scan the generator used to do (every keyword of every plot against
+the event text) and once with PlotIndex. Reports the time per event for each.
+"""
+
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from plot_index import PlotIndex, plot_keywords  # noqa: E402
+
+VOCABULARY_SIZE = 20_000
+EVENT_WORDS = 40
+
+
+def _linear_match(plots, text):
+    text = text.lower()
+    for position, plot in enumerate(plots):
+        if any(keyword in text for keyword in plot['keywords']):
+            return position
+    return None
+
+
+def _median_us(func, texts, repeats: int = 5) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for text in texts:
+            func(text)
+        timings.append((time.perf_counter() - start) / len(texts) * 1_000_000)
+    return statistics.median(timings)
+
+
+def main(n: int = 10_000, events: int = 2_000) -> None:
+    rng = random.Random(7)
+    vocabulary = [f"word{i:05d}" for i in range(VOCABULARY_SIZE)]
+    plots = [{'id': i, 'keywords': plot_keywords(' '.join(rng.sample(vocabulary, 5)))} for i in range(n)]
+    texts = [' '.join(rng.choices(vocabulary, k=EVENT_WORDS)) for _ in range(events)]
+
+    start = time.perf_counter()
+    index = PlotIndex(plots)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    mismatches = sum(_linear_match(plots, text) != index.match(text) for text in texts)
+    print(f"{n:,} plots, {events:,} events of {EVENT_WORDS} words ({mismatches} differing matches)\n")
+    print(f"{'index build':<20}{build_ms:>12.1f} ms")
+    print(f"{'linear scan':<20}{_median_us(lambda t: _linear_match(plots, t), texts):>12.1f} us/event")
+    print(f"{'PlotIndex.match':<20}{_median_us(index.match, texts):>12.1f} us/event")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
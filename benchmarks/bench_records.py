@@ -0,0 +1,111 @@
+"""
+Benchmark: memory and field access of slotted world-state records.
+
+Run from the repository root:
+    python benchmarks/bench_records.py [characters] [repeats]
+
+Builds a synthetic world with ``characters`` characters (plus one location per
+ten characters and one plot per fifty) twice -- once with plain dict entries,
+as world_state held them before, and once with the records from
+world_records.py -- and reports the memory each takes (tracemalloc, and
+the size of one entry without its field values) and the time to read and
+update one field of every character.
+"""
+
+import gc
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import deque
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from world_records import CharacterState, LocationState, PlotState  # noqa: E402
+
+HISTORY_LIMIT = 50
+
+
+def _world(n: int, rng: random.Random):
+    """Return (characters, locations, plots) as lists of plain dicts."""
+    n_locations, n_plots = max(n // 10, 1), max(n // 50, 1)
+    characters = [{
+        'type': rng.choice(('noble', 'merchant', 'mage', 'peasant')),
+        'location': rng.randrange(n_locations),
+        'last_seen': '2026-01-01 12:00:00',
+        'events': deque(({'event_id': e, 'category': 'social'} for e in range(rng.randrange(4))), HISTORY_LIMIT),
+        'event_total': rng.randrange(100),
+        'developments': deque((), HISTORY_LIMIT),
+    } for _ in range(n)]
+    locations = [{
+        'events': deque((), HISTORY_LIMIT),
+        'event_total': rng.randrange(100),
+        'notable_features': [],
+        'characters_present': [rng.randrange(n) for _ in range(3)],
+    } for _ in range(n_locations)]
+    plots = [{
+        'id': i, 'name': f"Plot {i}", 'description': '', 'keywords': ['plot'], 'status': 'active',
+        'events': deque((), HISTORY_LIMIT), 'last_event': 0, 'characters': [], 'locations': [],
+    } for i in range(n_plots)]
+    return characters, locations, plots
+
+
+def _build(n: int, records: bool):
+    characters, locations, plots = _world(n, random.Random(3))
+    if records:
+        return ({i: CharacterState.from_dict(c) for i, c in enumerate(characters)},
+                {i: LocationState.from_dict(loc) for i, loc in enumerate(locations)},
+                [PlotState.from_dict(p) for p in plots])
+    return dict(enumerate(characters)), dict(enumerate(locations)), plots
+
+
+def _memory_mb(n: int, records: bool):
+    gc.collect()
+    tracemalloc.start()
+    world = _build(n, records)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return world, size / 1024 / 1024
+
+
+def _median_ms(func, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main(n: int = 50_000, repeats: int = 10) -> None:
+    (dict_chars, _, _), dict_mb = _memory_mb(n, records=False)
+    (record_chars, _, _), record_mb = _memory_mb(n, records=True)
+    entries = list(dict_chars.values())
+    records = list(record_chars.values())
+
+    def dict_access():
+        for data in entries:
+            data['event_total'] = data['event_total'] + (data['location'] is None)
+
+    def record_attribute_access():
+        for data in records:
+            data.event_total = data.event_total + (data.location is None)
+
+    def record_item_access():
+        for data in records:
+            data['event_total'] = data['event_total'] + (data['location'] is None)
+
+    print(f"{n:,} characters, {max(n // 10, 1):,} locations, {max(n // 50, 1):,} plots\n")
+    print(f"{'memory, dict entries':<34}{dict_mb:>10.1f} MB")
+    print(f"{'memory, slotted records':<34}{record_mb:>10.1f} MB")
+    print(f"{'one character, dict':<34}{sys.getsizeof(entries[0]):>10} bytes")
+    print(f"{'one character, record':<34}{sys.getsizeof(records[0]):>10} bytes")
+    print(f"{'read+update, dict entries':<34}{_median_ms(dict_access, repeats):>10.2f} ms")
+    print(f"{'read+update, record attributes':<34}{_median_ms(record_attribute_access, repeats):>10.2f} ms")
+    print(f"{'read+update, record[field]':<34}{_median_ms(record_item_access, repeats):>10.2f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,75 @@
+"""
+Benchmark: FactionRelations matrix vs. the old "A_B" string-keyed relations dict.
+
+Run from the repository root:
+    python benchmarks/bench_relations.py
+
+For growing faction counts, compares snapshot size, lookup cost and the cost of
+finding every hostile pair.
+"""
+
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from faction_relations import FactionRelations  # noqa: E402
+
+STATUS_WEIGHTS = ['friendly', 'neutral', 'neutral', 'neutral', 'hostile']
+
+
+def build(num_factions: int):
+    rng = random.Random(num_factions)
+    names = [f"Faction of the {i}th Banner" for i in range(num_factions)]
+    legacy = {}
+    matrix = FactionRelations(range(num_factions))
+    for i in range(num_factions):
+        for j in range(i + 1, num_factions):
+            status = rng.choice(STATUS_WEIGHTS)
+            legacy[f"{names[i]}_{names[j]}"] = {'status': status, 'events': []}
+            matrix.set_status(i, j, status)
+    return names, legacy, matrix
+
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> None:
+    print(f"{'factions':>8}  {'dict JSON':>10}  {'matrix JSON':>11}  {'dict hostile':>12}  "
+          f"{'matrix hostile':>14}  {'lookup dict':>11}  {'lookup matrix':>13}")
+    for num_factions in (15, 55, 200, 500):
+        names, legacy, matrix = build(num_factions)
+        dict_bytes = len(json.dumps(legacy))
+        matrix_bytes = len(json.dumps(matrix.to_dict()))
+
+        dict_hostile = timed(lambda: [k for k, v in legacy.items() if v['status'] == 'hostile'], 5)
+        matrix_hostile = timed(lambda: matrix.pairs_with_status('hostile'), 5)
+
+        rng = random.Random(1)
+        pairs = [tuple(rng.sample(range(num_factions), 2)) for _ in range(20_000)]
+
+        def dict_lookups():
+            # The old code only found a pair stored in the same order
+            for a, b in pairs:
+                legacy.get(f"{names[a]}_{names[b]}") or legacy.get(f"{names[b]}_{names[a]}")
+
+        def matrix_lookups():
+            for a, b in pairs:
+                matrix.status(a, b)
+
+        dict_lookup = timed(dict_lookups, 1) / len(pairs)
+        matrix_lookup = timed(matrix_lookups, 1) / len(pairs)
+        print(f"{num_factions:>8}  {dict_bytes / 1024:>8,.0f}KB  {matrix_bytes / 1024:>9,.0f}KB  "
+              f"{dict_hostile * 1000:>10.2f}ms  {matrix_hostile * 1000:>12.2f}ms  "
+              f"{dict_lookup * 1e6:>9.2f}us  {matrix_lookup * 1e6:>11.2f}us")
+
+
+if __name__ == "__main__":
+    main()
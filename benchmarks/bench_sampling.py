@@ -0,0 +1,73 @@
+"""
+Benchmark: per-draw cost of alias-table category/template sampling.
+
+Run from the repository root:
+    python benchmarks/bench_sampling.py [draws]
+
+Compares the old uniform random.choice() picks with weighted AliasTable draws
+(scalar and NumPy batch), plus the cost of the no-repeat window.
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fantasy_events_data import event_categories  # noqa: E402
+from sampling import AliasTable, RecentWindow  # noqa: E402
+
+
+def main(n: int = 500_000) -> None:
+    rng = random.Random(3)
+    names = tuple(event_categories)
+    wartime = {name: 1.0 for name in names}
+    wartime.update(conflict=4.0, political=2.0, social=0.5)
+    category_table = AliasTable([wartime[name] for name in names])
+    template_tables = {name: AliasTable([1.0] * len(ts)) for name, ts in event_categories.items()}
+
+    start = time.perf_counter()
+    for _ in range(n):
+        category = rng.choice(names)
+        rng.choice(event_categories[category])
+    uniform = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(n):
+        category = names[category_table.sample(rng)]
+        event_categories[category][template_tables[category].sample(rng)]
+    alias = time.perf_counter() - start
+
+    window = RecentWindow(20)
+    start = time.perf_counter()
+    for _ in range(n):
+        category = names[category_table.sample(rng)]
+        table = template_tables[category]
+        template = event_categories[category][table.sample(rng)]
+        while template in window:
+            template = event_categories[category][table.sample(rng)]
+        window.add(template)
+    windowed = time.perf_counter() - start
+
+    np_rng = np.random.default_rng(3)
+    start = time.perf_counter()
+    drawn = category_table.sample_many(np_rng, n)
+    batch = time.perf_counter() - start
+
+    print(f"random.choice (uniform)      : {n / uniform:>12,.0f} draws/sec")
+    print(f"AliasTable.sample (weighted) : {n / alias:>12,.0f} draws/sec")
+    print(f"  + no-repeat window of 20   : {n / windowed:>12,.0f} draws/sec")
+    print(f"AliasTable.sample_many       : {n / batch:>12,.0f} draws/sec")
+
+    counts = np.bincount(drawn, minlength=len(names)) / n
+    total = sum(wartime.values())
+    print("\nWartime category shares (expected vs drawn):")
+    for name, share in zip(names, counts):
+        print(f"  {name:<10} {wartime[name] / total:6.1%}  {share:6.1%}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500_000)
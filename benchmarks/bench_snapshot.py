@@ -0,0 +1,53 @@
+"""
+Benchmark: world_state snapshot size and serialization time, IDs vs. names.
+
+Run from the repository root:
+    python benchmarks/bench_snapshot.py [events]
+
+Simulates a throwaway world, then compares the ID-based snapshot that
+update_world_state() writes with the name-keyed layout used before entity
+interning (rebuilt from the same state with named_state()).
+"""
+
+import contextlib
+import io
+import json
+import shutil
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from Fantasy import FantasyWorldEventGenerator  # noqa: E402
+from history import json_default  # noqa: E402
+from simulation import run_simulation  # noqa: E402
+
+WORLD_NAME = "bench snapshot"
+
+
+def dumps_ms(state, runs: int = 20) -> float:
+    start = time.perf_counter()
+    for _ in range(runs):
+        json.dumps(state, default=json_default)
+    return (time.perf_counter() - start) / runs * 1000
+
+
+def main(n: int = 3000) -> None:
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_simulation(WORLD_NAME, n, seed=11)
+        generator = FantasyWorldEventGenerator(WORLD_NAME)
+    try:
+        interned = generator.snapshot_state()
+        named = generator.named_state()
+        for label, state in (("names (before)", named), ("entity IDs", interned)):
+            size = len(json.dumps(state, default=json_default))
+            print(f"{label:<15} {size / 1024:10,.1f} KB  {dumps_ms(state):8.2f} ms per json.dumps")
+        print(f"\nEntities registered: {len(generator.entities)} after {n:,} events")
+    finally:
+        Path(generator.db_path).unlink(missing_ok=True)
+        shutil.rmtree(generator.world_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3000)
@@ -0,0 +1,59 @@
+"""
+Benchmark: world-state checkpoint size and encode/decode time per codec.
+
+Run from the repository root:
+    python benchmarks/bench_state_codec.py [events] [repeats]
+
+Simulates a throwaway world, then encodes and decodes its final checkpoint
+with every codec available here (msgpack only if it is installed) and reports
+the stored size and the median time of each.
+"""
+
+import contextlib
+import io
+import shutil
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from Fantasy import FantasyWorldEventGenerator  # noqa: E402
+from simulation import run_simulation  # noqa: E402
+from state_codec import available_codecs, decode_state, encode_state  # noqa: E402
+
+WORLD_NAME = "bench state codec"
+
+
+def _median_ms(func, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main(n: int = 20_000, repeats: int = 20) -> None:
+    with contextlib.redirect_stdout(io.StringIO()):
+        stats = run_simulation(WORLD_NAME, n, seed=7)
+        generator = FantasyWorldEventGenerator(WORLD_NAME)
+    db_path = stats["db_path"]
+    try:
+        state = generator.snapshot_state()
+        print(f"{n:,} events, {len(state['entities']):,} entities\n")
+        print(f"{'codec':>8}  {'bytes':>10}  {'encode ms':>9}  {'decode ms':>9}")
+        for codec in available_codecs():
+            encoded = encode_state(state, codec)
+            size = len(encoded.encode() if isinstance(encoded, str) else encoded)
+            encode_ms = _median_ms(lambda: encode_state(state, codec), repeats)
+            decode_ms = _median_ms(lambda: decode_state(encoded, codec), repeats)
+            print(f"{codec:>8}  {size:>10,}  {encode_ms:>9.2f}  {decode_ms:>9.2f}")
+    finally:
+        Path(db_path).unlink(missing_ok=True)
+        shutil.rmtree(Path(db_path).parent / f"{WORLD_NAME.replace(' ', '_')}_world", ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
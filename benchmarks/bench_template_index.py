@@ -0,0 +1,58 @@
+"""
+Benchmark: load-time cost of validating and compiling every template.
+
+Run from the repository root:
+    python benchmarks/bench_template_index.py [runs]
+
+Times building the event and location-feature engines and compiling all of
+their templates (the same work FantasyWorldEventGenerator does at startup),
+then shows the error a misspelled placeholder produces.
+"""
+
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fantasy_events_data import (  # noqa: E402
+    event_categories, location_feature_templates, location_feature_fill_ins,
+)
+from template_engine import TemplateEngine, TemplateError  # noqa: E402
+from bench_fill_template import build_engine  # noqa: E402
+
+
+def load_templates():
+    engine = build_engine()
+    compiled = engine.compile_all(event_categories)
+    feature_engine = TemplateEngine(location_feature_fill_ins)
+    feature_engine.compile_all({"location_feature_templates": location_feature_templates})
+    return engine, compiled, feature_engine
+
+
+def main(runs: int = 50) -> None:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        engine, compiled, feature_engine = load_templates()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    templates = sum(len(ts) for ts in compiled.values())
+    nested = len(engine.index) - templates
+    pools = len({name for ph in engine.index.values() for name in ph})
+    print(f"Event templates      : {templates} ({nested} nested fill-in templates)")
+    print(f"Feature templates    : {len(feature_engine.index)}")
+    print(f"Placeholders indexed : {pools}")
+    print(f"Startup (validate + compile), {runs} runs: "
+          f"median {statistics.median(timings):.2f} ms, max {max(timings):.2f} ms")
+
+    print("\nA misspelled placeholder is rejected at load:")
+    try:
+        engine.compile_all({"political": ["The {factoin} have declared war on the {faction2}!"]})
+    except TemplateError as e:
+        print(e)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
@@ -0,0 +1,52 @@
+"""
+Benchmark: time-travel replay with world_at().
+
+Run from the repository root:
+    python benchmarks/bench_world_at.py [events] [queries]
+
+Simulates a throwaway world, then rebuilds it as of random past events (from
+the nearest checkpoint plus the journal) and reports the replay latency.
+"""
+
+import contextlib
+import io
+import random
+import shutil
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from simulation import run_simulation  # noqa: E402
+from world_journal import load_world_at  # noqa: E402
+
+WORLD_NAME = "bench world at"
+
+
+def main(n: int = 100_000, queries: int = 200) -> None:
+    with contextlib.redirect_stdout(io.StringIO()):
+        stats = run_simulation(WORLD_NAME, n, seed=13)
+    db_path = stats["db_path"]
+    try:
+        rng = random.Random(1)
+        timings = []
+        for event_id in [rng.randint(1, n) for _ in range(queries)]:
+            start = time.perf_counter()
+            world = load_world_at(db_path, event_id)
+            timings.append((time.perf_counter() - start) * 1000)
+            assert world is not None and world["event_history"][-1]["event_id"] == event_id
+
+        timings.sort()
+        print(f"world_at() over a {n:,}-event world, {queries} random events")
+        print(f"  median {statistics.median(timings):7.1f} ms")
+        print(f"  p95    {timings[int(len(timings) * 0.95) - 1]:7.1f} ms")
+        print(f"  max    {timings[-1]:7.1f} ms")
+    finally:
+        Path(db_path).unlink(missing_ok=True)
+        shutil.rmtree(Path(db_path).parent / f"{WORLD_NAME.replace(' ', '_')}_world", ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
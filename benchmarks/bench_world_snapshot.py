@@ -0,0 +1,105 @@
+"""
+Benchmark: publishing copy-on-write world snapshots.
+
+Run from the repository root:
+    python benchmarks/bench_world_snapshot.py [characters] [events]
+
+Simulates a small throwaway world, pads it to ``characters`` characters, then
+applies ``events`` more events while a reader thread summarizes the latest
+snapshot the way /api/world does, twenty times a second. Reports the time to copy the whole
+state against the per-event cost of publishing with structural sharing, and
+checks that every snapshot the reader saw was consistent (its newest
+event_history entry is its own event).
+"""
+
+import contextlib
+import io
+import shutil
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from Fantasy import FantasyWorldEventGenerator  # noqa: E402
+from world_records import CharacterState  # noqa: E402
+from world_snapshot import take_snapshot  # noqa: E402
+
+WORLD_NAME = "bench world snapshot"
+
+
+def main(n: int = 50_000, events: int = 500) -> None:
+    with contextlib.redirect_stdout(io.StringIO()):
+        generator = FantasyWorldEventGenerator(WORLD_NAME, seed=19)
+    generator.headless = True
+    db_path = generator.db_path
+    try:
+        characters = generator.world_state['character_status']
+        for i in range(len(characters), n):
+            char_id = generator.entities.intern(f"Bench Character {i}")
+            characters[char_id] = CharacterState(type='peasant', location=None,
+                                                 events=generator._new_history('character_events'),
+                                                 developments=generator._new_history('developments'))
+
+        start = time.perf_counter()
+        generator.publish_snapshot()
+        full_ms = (time.perf_counter() - start) * 1000
+
+        publish = generator.publish_snapshot
+        timings = []
+
+        def timed_publish(ops=None):
+            start = time.perf_counter()
+            snapshot = publish(ops)
+            timings.append((time.perf_counter() - start) * 1000)
+            return snapshot
+
+        generator.publish_snapshot = timed_publish
+
+        reads, inconsistent = [], 0
+        done = threading.Event()
+
+        def reader():
+            nonlocal inconsistent
+            while not done.is_set():
+                start = time.perf_counter()
+                snapshot = generator.snapshot
+                summary = snapshot.summary()
+                reads.append((time.perf_counter() - start) * 1000)
+                history = snapshot['event_history']
+                if history and history[-1]['event_id'] != summary['event_count']:
+                    inconsistent += 1
+                time.sleep(0.05)
+
+        thread = threading.Thread(target=reader)
+        thread.start()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(events):
+                event, category = generator.generate_event()
+                event_data = generator.extract_event_data(event)
+                generator.save_event_to_db(event, category, event_data)
+                generator.apply_event_to_world(event, category, event_data)
+                generator.persist_event_effects(event_data)
+        done.set()
+        thread.join()
+
+        start = time.perf_counter()
+        take_snapshot(generator.event_count, generator.world_state, generator.relations, generator.entities.names)
+        copy_ms = (time.perf_counter() - start) * 1000
+
+        print(f"{len(characters):,} characters, {events:,} events\n")
+        print(f"{'first snapshot':<34}{full_ms:>10.2f} ms")
+        print(f"{'full copy after the run':<34}{copy_ms:>10.2f} ms")
+        print(f"{'publish per event, median':<34}{statistics.median(timings):>10.3f} ms")
+        print(f"{'publish per event, max':<34}{max(timings):>10.3f} ms")
+        print(f"{'reader summaries':<34}{len(reads):>10,} (median {statistics.median(reads):.1f} ms)")
+        print(f"{'inconsistent snapshots seen':<34}{inconsistent:>10,}")
+    finally:
+        Path(db_path).unlink(missing_ok=True)
+        shutil.rmtree(Path(db_path).parent / f"{WORLD_NAME.replace(' ', '_')}_world", ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,377 @@
+"""
+Shared SQLite connections for the Fantasy World Event Generator.
+
+Every world database gets one ConnectionManager (see connections()) holding:
+
+    - one long-lived writer connection, used by whichever thread holds the
+      write lock; write() wraps a unit of work in a transaction
+    - unit_of_work(), which collects the writes of one event (the event row,
+      its journal row, its character and location upserts) and applies them
+      with executemany() in a single transaction, so an event costs one
+      commit and is saved either completely or not at all
+    - one read connection per thread (the generator, the Flask request
+      threads, the Telegram poller), opened on first use by read(); the
+      manager keeps track of all of them so close() can close every one
+    - optionally a BackgroundWriter (start_background_writer()): a thread
+      that applies finished units of work from a bounded queue, so the event
+      loop does not wait for the disk
+
+The database runs in WAL mode, so readers never wait for the writer and the
+writer never waits for readers; only concurrent writers (the checkpoint
+compaction job) queue up, for at most BUSY_TIMEOUT_MS. With WAL,
+synchronous=NORMAL is still crash-safe (a power loss can only lose the last
+commits, never corrupt the file) and saves an fsync per commit.
+
+With a background writer, a thread that submitted units of work has them
+flushed before its next read(), so it always reads its own writes; other
+threads (the web server) see them once the writer has committed them. A unit
+the writer cannot commit is reported when it fails and raised, as a
+WriteError, from the next unit_of_work() or flush() of the manager.
+
+Read connections see the database as of the start of each statement; fetch
+results completely (fetchall()/fetchone()) so no read transaction is left
+open, which would also keep the WAL file from being checkpointed.
+"""
+
+import atexit
+import contextlib
+import queue
+import sqlite3
+import threading
+import weakref
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+# How long a connection waits for a lock before "database is locked"
+BUSY_TIMEOUT_MS = 5000
+SYNCHRONOUS = "NORMAL"
+
+# Finished units of work waiting for the background writer; submitting one
+# more blocks until it catches up
+WRITE_QUEUE_SIZE = 256
+# Most units of work the background writer commits in one transaction
+GROUP_COMMIT_UNITS = 64
+
+
+class WriteError(sqlite3.Error):
+    """Units of work the background writer could not commit; ``errors`` holds
+    the error of each, oldest first."""
+
+    def __init__(self, errors: List[Exception]):
+        self.errors = errors
+        super().__init__(f"{len(errors)} unit(s) of work could not be written, "
+                         f"the first because of: {errors[0]}")
+
+
+def open_connection(db_path: str, check_same_thread: bool = True,
+                    factory: type = sqlite3.Connection) -> sqlite3.Connection:
+    """Open a connection with the busy timeout and sync level used for world databases."""
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=check_same_thread,
+                           factory=factory)
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA synchronous = {SYNCHRONOUS}")
+    return conn
+
+
+class _ReadConnection(sqlite3.Connection):
+    """A per-thread read connection (a subclass only so a WeakSet can hold it)."""
+
+
+class UnitOfWork:
+    """Writes collected to be applied together in one transaction.
+
+    Consecutive add()s of the same statement are sent as one executemany().
+    """
+
+    def __init__(self):
+        # [sql, rows] for statements, [function, None] for call()
+        self._steps: List[list] = []
+
+    def add(self, sql: str, params: Union[tuple, dict] = ()) -> None:
+        """Queue one execution of ``sql``."""
+        self.add_many(sql, [params])
+
+    def add_many(self, sql: str, rows: Iterable[Union[tuple, dict]]) -> None:
+        """Queue one execution of ``sql`` for each of ``rows``."""
+        if self._steps and self._steps[-1][0] == sql:
+            self._steps[-1][1].extend(rows)
+        else:
+            self._steps.append([sql, list(rows)])
+
+    def call(self, function: Callable[[sqlite3.Cursor], None]) -> None:
+        """Queue ``function(cursor)``, for writes that need the result of an
+        earlier one (such as its lastrowid)."""
+        self._steps.append([function, None])
+
+    def __len__(self) -> int:
+        return len(self._steps)
+
+    def apply(self, cursor: sqlite3.Cursor) -> None:
+        for step, rows in self._steps:
+            if rows is None:
+                step(cursor)
+            else:
+                cursor.executemany(step, rows)
+
+
+class BackgroundWriter:
+    """Thread applying units of work from a bounded queue, with group commit.
+
+    Whatever is queued when the writer picks up a unit (up to
+    GROUP_COMMIT_UNITS) is applied with it in one transaction, so a burst of
+    events costs one commit. If that transaction fails, its units are applied
+    again one by one, so a bad unit only loses its own writes. The error of a
+    unit that fails on its own is printed, passed to ``on_error`` and kept
+    until raise_errors() hands it to the submitting side.
+    """
+
+    def __init__(self, manager: "ConnectionManager",
+                 on_error: Optional[Callable[[Exception], None]] = None):
+        self.manager = manager
+        self.on_error = on_error
+        self.commits = 0
+        self.units = 0
+        self.failed = 0
+        self._errors: List[Exception] = []
+        self._errors_lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[UnitOfWork]]" = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, unit: UnitOfWork) -> None:
+        """Queue a unit of work, blocking while the queue is full."""
+        self._queue.put(unit)
+
+    def flush(self) -> None:
+        """Wait until every unit submitted so far is committed."""
+        self._queue.join()
+
+    def stop(self) -> None:
+        """Flush the queue and end the thread."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def raise_errors(self) -> None:
+        """Raise a WriteError for the units that failed since the last call, if any."""
+        with self._errors_lock:
+            errors, self._errors = self._errors, []
+        if errors:
+            raise WriteError(errors)
+
+    def _run(self) -> None:
+        running = True
+        while running:
+            group = [self._queue.get()]
+            while group[-1] is not None and len(group) < GROUP_COMMIT_UNITS:
+                try:
+                    group.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if group[-1] is None:
+                running = False
+            units = [unit for unit in group if unit is not None]
+            try:
+                if units:
+                    self._apply(units)
+            finally:
+                for _ in group:
+                    self._queue.task_done()
+
+    def _apply(self, units: List[UnitOfWork]) -> None:
+        try:
+            with self.manager.write() as conn:
+                cursor = conn.cursor()
+                for unit in units:
+                    unit.apply(cursor)
+            self.commits += 1
+            self.units += len(units)
+        except Exception as e:
+            if len(units) > 1:
+                for unit in units:
+                    self._apply([unit])
+                return
+            self.failed += 1
+            print(f"[db_connections] Error writing to {self.manager.db_path}, a unit of work was lost: {e}")
+            with self._errors_lock:
+                self._errors.append(e)
+            if self.on_error is not None:
+                self.on_error(e)
+
+
+class ConnectionManager:
+    """The writer connection and the per-thread read connections of one database."""
+
+    def __init__(self, db_path: Union[str, Path]):
+        self.db_path = str(db_path)
+        self._writer = None
+        self._write_lock = threading.RLock()
+        self._local = threading.local()
+        # Every thread's reader, for close(); a reader goes away with its thread
+        self._readers = weakref.WeakSet()
+        self._readers_lock = threading.Lock()
+        self.background_writer: Optional[BackgroundWriter] = None
+
+    def _open_writer(self) -> sqlite3.Connection:
+        # Shared by the threads that take the write lock, one at a time
+        conn = open_connection(self.db_path, check_same_thread=False)
+        # Lets state_retention.py hand freed pages back to the file system in
+        # small steps. Only takes effect on a new, still empty database, and
+        # has to come before the switch to WAL
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("PRAGMA journal_mode = WAL")
+        return conn
+
+    @contextlib.contextmanager
+    def write(self) -> Iterator[sqlite3.Connection]:
+        """Yield the writer connection for one unit of work.
+
+        Commits when the block finishes and rolls back if it raises. Nested
+        calls from the same thread join the outer unit of work. Units queued
+        for the background writer are committed first, to keep writes in order.
+        """
+        if getattr(self._local, "write_depth", 0) == 0:
+            self._sync()
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = self._open_writer()
+            depth = getattr(self._local, "write_depth", 0)
+            self._local.write_depth = depth + 1
+            try:
+                yield self._writer
+                if depth == 0:
+                    self._writer.commit()
+            except BaseException:
+                if depth == 0:
+                    self._writer.rollback()
+                raise
+            finally:
+                self._local.write_depth = depth
+
+    @contextlib.contextmanager
+    def unit_of_work(self) -> Iterator[UnitOfWork]:
+        """Yield a UnitOfWork and apply it in one transaction when the block ends.
+
+        Nested calls from the same thread add to the outer unit. If the block
+        raises, nothing collected is written; if applying fails, the
+        transaction is rolled back and the error raised. With a background
+        writer the unit is queued for it instead (see BackgroundWriter), and
+        a WriteError is raised, after queueing, if earlier units failed.
+        """
+        unit = getattr(self._local, "unit", None)
+        if unit is not None:
+            yield unit
+            return
+        unit = self._local.unit = UnitOfWork()
+        try:
+            yield unit
+        finally:
+            self._local.unit = None
+        if not unit:
+            return
+        if self.background_writer is not None:
+            self.background_writer.submit(unit)
+            self._local.unsynced = True
+            self.background_writer.raise_errors()
+        else:
+            with self.write() as conn:
+                unit.apply(conn.cursor())
+
+    def start_background_writer(self, on_error: Optional[Callable[[Exception], None]] = None) -> BackgroundWriter:
+        """Apply units of work on a BackgroundWriter thread from now on.
+
+        Returns the running writer if there already is one. Its queue is
+        flushed when the interpreter exits.
+        """
+        if self.background_writer is None:
+            self.background_writer = BackgroundWriter(self, on_error)
+            atexit.register(self.background_writer.stop)
+        return self.background_writer
+
+    def stop_background_writer(self) -> None:
+        """Flush the background writer and apply units of work inline again.
+
+        Raises a WriteError if any of its units failed and were not reported yet.
+        """
+        writer, self.background_writer = self.background_writer, None
+        if writer is not None:
+            writer.stop()
+            atexit.unregister(writer.stop)
+            writer.raise_errors()
+
+    def flush(self) -> None:
+        """Wait until the background writer has committed everything queued.
+
+        Raises a WriteError if any of its units failed and were not reported yet.
+        """
+        if self.background_writer is not None:
+            self.background_writer.flush()
+        self._local.unsynced = False
+        if self.background_writer is not None:
+            self.background_writer.raise_errors()
+
+    def _sync(self) -> None:
+        # Read-your-writes: commit this thread's queued units before it reads.
+        # Failures are left for the next flush() or unit_of_work() to raise
+        if getattr(self._local, "unsynced", False):
+            if self.background_writer is not None:
+                self.background_writer.flush()
+            self._local.unsynced = False
+
+    def read(self) -> sqlite3.Connection:
+        """Return the calling thread's read connection, opening it on first use.
+
+        Closed when the thread ends, or by close(); after close() the next
+        read() opens a new one.
+        """
+        self._sync()
+        conn = getattr(self._local, "reader", None)
+        if conn is None or conn not in self._readers:
+            # Only this thread uses it; close() may close it from another one
+            conn = self._local.reader = open_connection(self.db_path, check_same_thread=False,
+                                                        factory=_ReadConnection)
+            with self._readers_lock:
+                self._readers.add(conn)
+        return conn
+
+    def close(self) -> None:
+        """Stop the background writer, then close the read connections of
+        every thread and the writer.
+
+        The WAL is checkpointed into the database and truncated first, so the
+        database file alone holds everything written.
+        """
+        try:
+            self.stop_background_writer()
+        finally:
+            with self._readers_lock:
+                readers = list(self._readers)
+                self._readers.clear()
+            for reader in readers:
+                reader.close()
+            with self._write_lock:
+                if self._writer is not None:
+                    self._writer.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+                    self._writer.close()
+                    self._writer = None
+
+
+_managers: Dict[str, ConnectionManager] = {}
+_managers_lock = threading.Lock()
+
+
+def connections(db_path: Union[str, Path]) -> ConnectionManager:
+    """Return the ConnectionManager shared by everything in this process using ``db_path``."""
+    path = Path(db_path)
+    key = str(path.resolve())
+    with _managers_lock:
+        manager = _managers.get(key)
+        # A database deleted and created again (throwaway benchmark worlds) needs new connections
+        if manager is None or not path.exists():
+            if manager is not None:
+                try:
+                    manager.close()
+                except sqlite3.Error as e:
+                    print(f"[db_connections] Error closing the connections to the deleted {manager.db_path}: {e}")
+            manager = _managers[key] = ConnectionManager(db_path)
+        return manager
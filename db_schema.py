@@ -0,0 +1,288 @@
+"""
+Database schema versions for the Fantasy World Event Generator.
+
+The schema_version table records every migration applied to a world's
+database. migrate_database() runs the ones after the newest recorded version
+in order, so starting the generator on an up-to-date database costs one
+query. Databases from before the table existed count as version 0; the
+migrations check what is actually there (IF NOT EXISTS, missing columns), so
+they are safe to run on any of those older layouts, and again if one was
+interrupted.
+
+The world_state checkpoints inside the database have their own versions
+(world_schema.py).
+
+Versions:
+    1 - the tables as of the journal, sectioned checkpoints and history archive
+    2 - indexes for the web pages, Telegram buttons and console views:
+        event_details.event_id, characters/locations.event_count, events.category
+    3 - events_fts, the full-text index searched by event_search.py, kept in
+        step with events and event_details by triggers (skipped where SQLite
+        is built without FTS5; search is then unavailable)
+    4 - event_characters and event_factions, one row per name and event behind
+        the character and faction timelines (event_participants.py),
+        backfilled from the events' JSON lists
+"""
+
+import datetime
+import sqlite3
+from typing import Callable, Dict, List, Tuple
+
+from event_participants import CHARACTER_INSERT, FACTION_INSERT, participant_rows
+
+DATABASE_VERSION = 4
+
+
+def _fts5_available() -> bool:
+    try:
+        sqlite3.connect(":memory:").execute("CREATE VIRTUAL TABLE probe USING fts5(text)")
+        return True
+    except sqlite3.Error:
+        return False
+
+
+FTS5_SUPPORT = _fts5_available()
+
+# The Telegram details of event {event} as one text
+_DETAILS_TEXT = """COALESCE((
+        SELECT group_concat(COALESCE(d.hidden_details, '') || ' ' || COALESCE(d.connections, '') || ' ' ||
+                            COALESCE(d.plot_hooks, '') || ' ' || COALESCE(d.consequences, ''), ' ')
+        FROM event_details d WHERE d.event_id = {event}), '')"""
+
+
+def _add_columns(cursor: sqlite3.Cursor, table: str, columns: Dict[str, str]) -> None:
+    cursor.execute(f"PRAGMA table_info({table})")
+    existing = {row[1] for row in cursor.fetchall()}
+    for name, definition in columns.items():
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+
+def _to_v1(cursor: sqlite3.Cursor) -> None:
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS events (
+        id INTEGER PRIMARY KEY,
+        timestamp TEXT,
+        category TEXT,
+        event_text TEXT,
+        location TEXT,
+        characters TEXT,
+        factions TEXT,
+        image_path TEXT,
+        headline TEXT DEFAULT '',
+        description TEXT DEFAULT ''
+    )
+    ''')
+    _add_columns(cursor, "events", {"headline": "TEXT DEFAULT ''", "description": "TEXT DEFAULT ''"})
+
+    # World-state checkpoints, each covering the world_journal rows up to
+    # journal_id. The state is stored with the world's codec (see
+    # state_codec.py): as text in state_json, or as bytes in state_data.
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS world_state (
+        id INTEGER PRIMARY KEY,
+        timestamp TEXT,
+        state_json TEXT,
+        event_id INTEGER,
+        journal_id INTEGER,
+        state_data BLOB,
+        codec TEXT,
+        schema_version INTEGER
+    )
+    ''')
+    # Checkpoint tables from before the journal and codecs existed
+    _add_columns(cursor, "world_state", {"event_id": "INTEGER", "journal_id": "INTEGER", "state_data": "BLOB",
+                                         "codec": "TEXT", "schema_version": "INTEGER"})
+
+    # The sections of checkpoints whose state_json and state_data are both
+    # NULL; a checkpoint only writes its changed sections, the others are the
+    # newest earlier row (see world_sections.py)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS world_state_sections (
+        id INTEGER PRIMARY KEY,
+        checkpoint_id INTEGER NOT NULL,
+        section TEXT NOT NULL,
+        state_json TEXT,
+        state_data BLOB,
+        codec TEXT
+    )
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_world_state_sections
+    ON world_state_sections (section, checkpoint_id)
+    ''')
+
+    # One row of world-state changes per event (see world_journal.py)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS world_journal (
+        id INTEGER PRIMARY KEY,
+        event_id INTEGER,
+        timestamp TEXT,
+        delta_json TEXT
+    )
+    ''')
+
+    # Data used by the Telegram buttons
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS event_details (
+        id INTEGER PRIMARY KEY,
+        event_id INTEGER,
+        hidden_details TEXT,
+        connections TEXT,
+        plot_hooks TEXT,
+        consequences TEXT,
+        FOREIGN KEY (event_id) REFERENCES events (id)
+    )
+    ''')
+
+    # History entries evicted from the in-memory ring buffers that are not
+    # rows of the events table (world changes, developments, plot events)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS history_archive (
+        id INTEGER PRIMARY KEY,
+        collection TEXT NOT NULL,
+        owner TEXT,
+        entry_json TEXT
+    )
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_history_archive_owner
+    ON history_archive (collection, owner)
+    ''')
+
+    # One row per unique character, updated on each appearance
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS characters (
+        id INTEGER PRIMARY KEY,
+        name TEXT UNIQUE NOT NULL,
+        type TEXT,
+        last_location TEXT,
+        last_seen TEXT,
+        event_count INTEGER DEFAULT 0
+    )
+    ''')
+
+    # One row per unique location, updated on each appearance
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS locations (
+        id INTEGER PRIMARY KEY,
+        name TEXT UNIQUE NOT NULL,
+        last_event_id INTEGER,
+        last_seen TEXT,
+        event_count INTEGER DEFAULT 0,
+        characters_present TEXT
+    )
+    ''')
+
+
+def _to_v2(cursor: sqlite3.Cursor) -> None:
+    # Every newspaper page LEFT JOINs the details, every Telegram button looks them up
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_event_details_event ON event_details (event_id)")
+    # The character and location views list the busiest first
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_characters_event_count ON characters (event_count)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_locations_event_count ON locations (event_count)")
+    # Category statistics and filters
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_category ON events (category)")
+
+
+def _to_v3(cursor: sqlite3.Cursor) -> None:
+    if not FTS5_SUPPORT:
+        return
+    # rowid is the event ID
+    cursor.execute('''
+    CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(
+        headline, description, event_text, details,
+        tokenize = 'porter unicode61'
+    )
+    ''')
+    new_details, old_details = _DETAILS_TEXT.format(event="new.event_id"), _DETAILS_TEXT.format(event="old.event_id")
+    for trigger in (f'''
+    CREATE TRIGGER IF NOT EXISTS events_fts_insert AFTER INSERT ON events BEGIN
+        INSERT INTO events_fts (rowid, headline, description, event_text, details)
+        VALUES (new.id, new.headline, new.description, new.event_text, {_DETAILS_TEXT.format(event="new.id")});
+    END
+    ''', '''
+    CREATE TRIGGER IF NOT EXISTS events_fts_update AFTER UPDATE OF headline, description, event_text ON events BEGIN
+        UPDATE events_fts SET headline = new.headline, description = new.description, event_text = new.event_text
+        WHERE rowid = new.id;
+    END
+    ''', '''
+    CREATE TRIGGER IF NOT EXISTS events_fts_delete AFTER DELETE ON events BEGIN
+        DELETE FROM events_fts WHERE rowid = old.id;
+    END
+    ''', f'''
+    CREATE TRIGGER IF NOT EXISTS event_details_fts_insert AFTER INSERT ON event_details BEGIN
+        UPDATE events_fts SET details = {new_details} WHERE rowid = new.event_id;
+    END
+    ''', f'''
+    CREATE TRIGGER IF NOT EXISTS event_details_fts_update AFTER UPDATE ON event_details BEGIN
+        UPDATE events_fts SET details = {old_details} WHERE rowid = old.event_id;
+        UPDATE events_fts SET details = {new_details} WHERE rowid = new.event_id;
+    END
+    ''', f'''
+    CREATE TRIGGER IF NOT EXISTS event_details_fts_delete AFTER DELETE ON event_details BEGIN
+        UPDATE events_fts SET details = {old_details} WHERE rowid = old.event_id;
+    END
+    '''):
+        cursor.execute(trigger)
+    # Index the events written so far (again, if an earlier run was interrupted)
+    cursor.execute("DELETE FROM events_fts")
+    cursor.execute(f'''
+    INSERT INTO events_fts (rowid, headline, description, event_text, details)
+    SELECT e.id, e.headline, e.description, e.event_text, {_DETAILS_TEXT.format(event="e.id")}
+    FROM events e
+    ''')
+
+
+def _to_v4(cursor: sqlite3.Cursor) -> None:
+    # Keyed by name first: a timeline is a range of the primary key
+    for table, column in (("event_characters", "character"), ("event_factions", "faction")):
+        cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {table} (
+            {column} TEXT NOT NULL,
+            event_id INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            PRIMARY KEY ({column}, event_id)
+        ) WITHOUT ROWID
+        ''')
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_event ON {table} (event_id)")
+    # Backfill from the JSON lists (OR IGNORE: again, if an earlier run was interrupted)
+    character_rows, faction_rows = [], []
+    for event_id, characters, factions in cursor.connection.execute("SELECT id, characters, factions FROM events"):
+        characters, factions = participant_rows(event_id, characters, factions)
+        character_rows.extend(characters)
+        faction_rows.extend(factions)
+    cursor.executemany(CHARACTER_INSERT, character_rows)
+    cursor.executemany(FACTION_INSERT, faction_rows)
+
+
+# MIGRATIONS[n] upgrades a version-n database to version n + 1
+MIGRATIONS: List[Tuple[str, Callable[[sqlite3.Cursor], None]]] = [
+    ("tables", _to_v1),
+    ("indexes on event_details.event_id, event_count and events.category", _to_v2),
+    ("events_fts full-text index", _to_v3),
+    ("event_characters and event_factions join tables", _to_v4),
+]
+
+
+def database_version(cursor: sqlite3.Cursor) -> int:
+    """Return the newest migration applied to the database (0 before versioning)."""
+    cursor.execute("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER PRIMARY KEY, "
+                   "description TEXT, applied TEXT)")
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    return cursor.fetchone()[0]
+
+
+def migrate_database(cursor: sqlite3.Cursor) -> List[int]:
+    """Bring the database up to DATABASE_VERSION; returns the versions applied."""
+    version = database_version(cursor)
+    if version > DATABASE_VERSION:
+        raise ValueError(f"Database schema version {version} is newer than this generator's "
+                         f"({DATABASE_VERSION}); please update the generator")
+    applied = []
+    for new_version, (description, migrate) in enumerate(MIGRATIONS[version:], version + 1):
+        migrate(cursor)
+        cursor.execute("INSERT INTO schema_version (version, description, applied) VALUES (?, ?, ?)",
+                       (new_version, description, datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+        applied.append(new_version)
+    return applied
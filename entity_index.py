@@ -0,0 +1,173 @@
+"""
+Multi-pattern entity matcher for the Fantasy World Event Generator.
+
+Builds one Aho-Corasick automaton over every location, faction and character name
+so extract_event_data can find all of them in a single linear scan of the event
+text, instead of one substring search per entity.
+"""
+
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class EntityIndex:
+    """Aho-Corasick automaton mapping entity names to their kinds.
+
+    Each name can carry several ``(kind, detail)`` labels; for example "Emerald
+    Enclave" is both a location and a faction, and "Seraphina" is both a wizard
+    and a cleric. Matches only count on word boundaries, so "Vex" is not found in
+    "Vexing", and overlapping matches resolve to the leftmost, longest name.
+    """
+
+    def __init__(self):
+        # Trie / automaton tables, indexed by state number
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Length of the name spelled by each state (0 = not a complete name)
+        self._terminal: List[int] = [0]
+        # Length of the longest name ending at each state, following fail links
+        self._output: List[int] = [0]
+        self._delta: List[Dict[str, int]] = [{}]
+        self._labels: Dict[str, List[Tuple[str, Optional[str]]]] = {}
+        self._built = False
+
+    @classmethod
+    def from_world(cls, locations: Iterable[str], factions: Iterable[str],
+                   characters: Dict[str, Sequence[str]]) -> "EntityIndex":
+        """Build an index over the world's locations, factions and characters."""
+        index = cls()
+        for location in locations:
+            index.add(location, "location")
+        for faction in factions:
+            index.add(faction, "faction")
+        for char_type, names in characters.items():
+            for name in names:
+                index.add(name, "character", char_type)
+        index.build()
+        return index
+
+    def add(self, name: str, kind: str, detail: Optional[str] = None) -> None:
+        """Register ``name`` under ``kind`` (and optional detail such as a character type)."""
+        if not name:
+            return
+        labels = self._labels.setdefault(name, [])
+        if (kind, detail) in labels:
+            return
+        labels.append((kind, detail))
+
+        state = 0
+        for ch in name:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._terminal.append(0)
+            state = nxt
+        self._terminal[state] = len(name)
+        self._built = False
+
+    def build(self) -> None:
+        """Compute failure links. Called automatically before the first search."""
+        goto, fail = self._goto, self._fail
+        output = self._output = list(self._terminal)
+        queue = deque()
+        for state in goto[0].values():
+            fail[state] = 0
+            queue.append(state)
+        # Breadth-first, so every fail target is finished before it is inherited from
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                if not output[nxt]:
+                    output[nxt] = output[fail[nxt]]
+        # Full transition table, filled in lazily by find() as characters are seen
+        self._delta = [dict(edges) for edges in goto]
+        self._built = True
+
+    def _transition(self, state: int, ch: str) -> int:
+        """Follow failure links from ``state`` until ``ch`` can be consumed."""
+        goto, fail = self._goto, self._fail
+        while state and ch not in goto[state]:
+            state = fail[state]
+        return goto[state].get(ch, 0)
+
+    def find(self, text: str) -> List[Tuple[int, str]]:
+        """Return ``(start, name)`` for every whole-word entity name in ``text``.
+
+        Matches are ordered by position and never overlap; where two names overlap,
+        the one starting first wins, then the longer one.
+        """
+        if not self._built:
+            self.build()
+
+        delta, fail, output = self._delta, self._fail, self._output
+        length = len(text)
+        candidates = []
+        state = 0
+        for end, ch in enumerate(text, 1):
+            state_delta = delta[state]
+            nxt = state_delta.get(ch)
+            if nxt is None:
+                nxt = state_delta[ch] = self._transition(state, ch)
+            state = nxt
+            if not output[state]:
+                continue
+            # Walk the output chain: every name that ends here
+            s = state
+            while s:
+                size = output[s]
+                if not size:
+                    break
+                start = end - size
+                if (start == 0 or not _is_word_char(text[start - 1])) and \
+                        (end == length or not _is_word_char(text[end])):
+                    candidates.append((start, end))
+                # Move to the next shorter name ending at this position
+                s = fail[s]
+                while s and output[s] == size:
+                    s = fail[s]
+
+        if not candidates:
+            return []
+
+        # Leftmost-longest, non-overlapping
+        candidates.sort(key=lambda span: (span[0], -span[1]))
+        matches = []
+        last_end = -1
+        for start, end in candidates:
+            if start >= last_end:
+                matches.append((start, text[start:end]))
+                last_end = end
+        return matches
+
+    def labels(self, name: str) -> List[Tuple[str, Optional[str]]]:
+        """Return the ``(kind, detail)`` labels registered for ``name``."""
+        return self._labels.get(name, [])
+
+    def extract(self, text: str) -> Dict[str, List]:
+        """Group the entities found in ``text`` by kind.
+
+        Returns ``{'location': [...], 'faction': [...], 'character': [(name, type), ...]}``
+        in order of first appearance, without duplicates.
+        """
+        found: Dict[str, List] = {"location": [], "faction": [], "character": []}
+        seen = set()
+        for _, name in self.find(text):
+            for kind, detail in self._labels[name]:
+                item = (name, detail) if kind == "character" else name
+                if (kind, item) in seen:
+                    continue
+                seen.add((kind, item))
+                found.setdefault(kind, []).append(item)
+        return found
@@ -0,0 +1,173 @@
+"""
+Entity name interning for the Fantasy World Event Generator.
+
+world_state refers to locations, factions and characters by compact integer IDs
+instead of repeating their full names in every status entry, faction relation
+and plot. EntityRegistry owns the ID <-> name mapping, is saved inside the world
+state as a plain list (the list index is the ID), and translates back to names
+only where people or the AI read the state.
+
+Event summaries are interned the same way: the text lives once in
+event_history, and character and location event entries carry only its event_id.
+"""
+
+import copy
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from world_records import Record
+
+
+def _strip_summaries(events: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [{k: v for k, v in event.items() if k != "summary"} for event in events]
+
+
+def _fields(data: Any) -> Dict[str, Any]:
+    """Return the fields of a world_state entry, a record or (in replayed states) a dict."""
+    return data.to_dict() if isinstance(data, Record) else data
+
+
+def split_relation_key(key: str, factions: Iterable[str]) -> Tuple[str, str]:
+    """Split an old ``"<faction>_<faction>"`` relation key into its two names.
+
+    Faction names may contain "_" themselves, so the key is split where both
+    halves are known faction names; failing that, where one half is, or at
+    its only "_". Raises ValueError if no split, or more than one, fits.
+    """
+    factions = set(factions)
+    splits = [(key[:i], key[i + 1:]) for i, ch in enumerate(key) if ch == "_" and 0 < i < len(key) - 1]
+    candidates = ([split for split in splits if split[0] in factions and split[1] in factions]
+                  or [split for split in splits if split[0] in factions or split[1] in factions]
+                  or (splits if len(splits) == 1 else []))
+    if len(candidates) != 1:
+        found = " or ".join(f"{first!r} and {second!r}" for first, second in candidates) or "no two factions"
+        raise ValueError(f"Cannot tell which factions the relation key {key!r} names: {found}")
+    return candidates[0]
+
+
+def _with_summaries(events: Iterable[Dict[str, Any]], summaries: Dict[Any, str]) -> List[Dict[str, Any]]:
+    return [dict(event, summary=summaries.get(event.get("event_id"), "")) for event in events]
+
+
+class EntityRegistry:
+    """Assigns stable integer IDs to entity names.
+
+    IDs are list positions and are never reused or reordered, so a registry
+    rebuilt from a saved ``names`` list maps every ID to the same name again.
+    """
+
+    def __init__(self, names: Iterable[str] = ()):
+        self.names: List[str] = []
+        self._ids: Dict[str, int] = {}
+        for name in names:
+            self.intern(name)
+
+    @classmethod
+    def from_world(cls, locations: Iterable[str], factions: Iterable[str],
+                   characters: Dict[str, Sequence[str]]) -> "EntityRegistry":
+        """Build a registry over every location, faction and character name."""
+        registry = cls()
+        registry.add_world(locations, factions, characters)
+        return registry
+
+    def add_world(self, locations: Iterable[str], factions: Iterable[str],
+                  characters: Dict[str, Sequence[str]]) -> None:
+        """Intern any world names not registered yet, e.g. after the data module grew."""
+        for name in locations:
+            self.intern(name)
+        for name in factions:
+            self.intern(name)
+        for names in characters.values():
+            for name in names:
+                self.intern(name)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._ids
+
+    def intern(self, name: str) -> int:
+        """Return the ID for ``name``, assigning the next free one if it is new."""
+        entity_id = self._ids.get(name)
+        if entity_id is None:
+            entity_id = self._ids[name] = len(self.names)
+            self.names.append(name)
+        return entity_id
+
+    def get(self, name: str) -> Optional[int]:
+        """Return the ID for ``name`` without registering it, or None."""
+        return self._ids.get(name)
+
+    def name(self, entity_id: Optional[int]) -> str:
+        """Return the name for ``entity_id``; None (no entity) maps to ''."""
+        if entity_id is None:
+            return ""
+        return self.names[entity_id]
+
+    # --- world_state conversion ---------------------------------------------
+
+    def intern_state(self, state: Dict[str, Any],
+                     factions: Iterable[str] = ()) -> List[Tuple[int, int, Dict[str, Any]]]:
+        """Convert a name-keyed world state (saved before IDs existed) in place.
+
+        The old relations are taken out of the state and returned as
+        ``(faction1, faction2, {"status", "events"})`` per entry, for
+        FactionRelations.from_legacy(). ``factions`` are the world's faction
+        names, used to split their keys (see split_relation_key()).
+        """
+        intern = self.intern
+        state["character_status"] = {
+            intern(name): dict(data, location=intern(data["location"]) if data.get("location") else None,
+                               events=_strip_summaries(data.get("events", [])))
+            for name, data in state.get("character_status", {}).items()
+        }
+        state["location_status"] = {
+            intern(name): dict(data, characters_present=[intern(c) for c in data.get("characters_present", [])],
+                               events=_strip_summaries(data.get("events", [])))
+            for name, data in state.get("location_status", {}).items()
+        }
+        factions = set(factions)
+        relations = []
+        for key, data in state.pop("relations", {}).items():
+            faction1, faction2 = split_relation_key(key, factions)
+            relations.append((intern(faction1), intern(faction2), data))
+        for plot in state.get("active_plots", []):
+            plot["characters"] = [intern(c) for c in plot.get("characters", [])]
+            plot["locations"] = [intern(loc) for loc in plot.get("locations", [])]
+        return relations
+
+    @staticmethod
+    def restore_int_keys(state: Dict[str, Any]) -> None:
+        """Turn the string keys JSON gives back for ID-keyed sections into ints."""
+        for section in ("character_status", "location_status"):
+            if section in state:
+                state[section] = {int(k): v for k, v in state[section].items()}
+
+    def named_view(self, state: Dict[str, Any], summaries: Optional[Dict[int, str]] = None) -> Dict[str, Any]:
+        """Return a copy of ``state`` with every entity ID replaced by its name.
+
+        Used wherever the state is shown to people or sent to the AI; the live
+        state is never modified. ``summaries`` supplies the text of events no
+        longer held in event_history.
+        """
+        name = self.name
+        summaries = dict(summaries or {})
+        summaries.update((e.get("event_id"), e.get("summary", "")) for e in state.get("event_history", []))
+        view = dict(state)
+        view["character_status"] = {
+            name(cid): dict(_fields(data), location=name(data.get("location")),
+                            events=_with_summaries(data.get("events", []), summaries))
+            for cid, data in state.get("character_status", {}).items()
+        }
+        view["location_status"] = {
+            name(lid): dict(_fields(data), characters_present=[name(c) for c in data.get("characters_present", [])],
+                            events=_with_summaries(data.get("events", []), summaries))
+            for lid, data in state.get("location_status", {}).items()
+        }
+        plots = copy.deepcopy([_fields(plot) for plot in state.get("active_plots", [])])
+        for plot in plots:
+            plot["characters"] = [name(c) for c in plot.get("characters", [])]
+            plot["locations"] = [name(loc) for loc in plot.get("locations", [])]
+        view["active_plots"] = plots
+        view.pop("entities", None)
+        return view
@@ -0,0 +1,84 @@
+"""
+Who took part in each event: the event_characters and event_factions tables.
+
+events.characters and events.factions keep the names as JSON, which can only
+be searched by scanning and parsing every event. The join tables
+(db_schema.py, version 4) hold one row per name and event, keyed by
+(name, event_id), so a character's or faction's timeline is a range of the
+primary key, newest first, and the events two factions share are one lookup
+per event of the first. Rows are written with the event's own row (see
+participant_rows()); position is the name's place in the event's list, the
+first two factions being the pair whose relation the event affects.
+"""
+
+import json
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from event_search import display_headline
+
+CHARACTER_INSERT = "INSERT OR IGNORE INTO event_characters (character, event_id, position) VALUES (?, ?, ?)"
+FACTION_INSERT = "INSERT OR IGNORE INTO event_factions (faction, event_id, position) VALUES (?, ?, ?)"
+
+
+def _names(entries: Any) -> List[str]:
+    # Characters are {'name', 'type'} dicts, factions plain names; either may come as JSON text
+    if isinstance(entries, str):
+        try:
+            entries = json.loads(entries)
+        except ValueError:
+            return []
+    names = []
+    for entry in entries if isinstance(entries, list) else []:
+        name = entry.get('name') if isinstance(entry, dict) else entry
+        if isinstance(name, str) and name.strip():
+            names.append(name.strip())
+    return names
+
+
+def participant_rows(event_id: int, characters: Any, factions: Any) -> Tuple[List[tuple], List[tuple]]:
+    """The event_characters and event_factions rows of one event, for
+    CHARACTER_INSERT and FACTION_INSERT."""
+    return ([(name, event_id, position) for position, name in enumerate(_names(characters))],
+            [(name, event_id, position) for position, name in enumerate(_names(factions))])
+
+
+def _timeline(cursor: sqlite3.Cursor, join: str, where: str, params: Iterable[Any],
+              limit: int, before: Optional[int]) -> List[Dict[str, Any]]:
+    cursor.execute(f'''
+    SELECT e.id, e.timestamp, e.category, e.location, e.headline, e.event_text
+    FROM {join}
+    JOIN events e ON e.id = p.event_id
+    WHERE {where} AND p.event_id < ?
+    ORDER BY p.event_id DESC
+    LIMIT ?
+    ''', (*params, before if before is not None else 1 << 62, limit))
+    return [{
+        "id": event_id,
+        "timestamp": timestamp,
+        "category": category,
+        "location": location or "Unknown",
+        "headline": display_headline(headline, event_text, category),
+        "event_text": event_text,
+    } for event_id, timestamp, category, location, headline, event_text in cursor.fetchall()]
+
+
+def character_timeline(cursor: sqlite3.Cursor, name: str, limit: int = 20,
+                       before: Optional[int] = None) -> List[Dict[str, Any]]:
+    """The newest events involving character ``name`` (with IDs below ``before``), newest first."""
+    return _timeline(cursor, "event_characters p", "p.character = ?", (name,), limit, before)
+
+
+def faction_timeline(cursor: sqlite3.Cursor, faction: str, limit: int = 20, before: Optional[int] = None,
+                     other: Optional[str] = None, relation_only: bool = False) -> List[Dict[str, Any]]:
+    """The newest events involving ``faction`` (with IDs below ``before``), newest first.
+
+    With ``other``, only the events both factions took part in; with
+    ``relation_only`` as well, only those where they are the first two
+    factions named, the events that affect their relation.
+    """
+    if other is None:
+        return _timeline(cursor, "event_factions p", "p.faction = ?", (faction,), limit, before)
+    join = "event_factions p JOIN event_factions q ON q.event_id = p.event_id AND q.faction = ?"
+    where = "p.faction = ? AND p.position < 2 AND q.position < 2" if relation_only else "p.faction = ?"
+    return _timeline(cursor, join, where, (other, faction), limit, before)
@@ -0,0 +1,92 @@
+"""
+Full-text search over a world's event history.
+
+Searches the events_fts table (db_schema.py, version 3), which indexes every
+event's headline, description, text and Telegram details; triggers keep it in
+step with the events and event_details tables. Words are stemmed, so "battle"
+also finds "battles"; results are ranked with BM25, a match in the headline
+counting most.
+
+Every matching event is ranked, so a page further down the results is still
+ordered against the whole history; events ranked equal come newest first.
+Ranking reads only the index, and snippets are only made for the page of
+results returned.
+
+Search text is reduced to its words (each one must occur) before it reaches
+FTS5, so quotes and operators typed by a user can never make a query fail;
+a word ending in * matches every word starting with it.
+"""
+
+import re
+import sqlite3
+from typing import Any, Dict, List, Optional, Tuple
+
+# BM25 weights of the indexed columns: headline, description, event_text, details
+COLUMN_WEIGHTS = (4.0, 2.0, 1.0, 1.0)
+
+# Default markers around matched words in a result's snippet
+SNIPPET_MARKS = ("[", "]")
+
+_WORD = re.compile(r"(\w+)(\*?)")
+
+
+def fts_query(text: str) -> str:
+    """Turn search text into an FTS5 query matching events that contain all of its words."""
+    return " ".join(f'"{word}"{star}' for word, star in _WORD.findall(text))
+
+
+def search_available(cursor: sqlite3.Cursor) -> bool:
+    """Whether the database has the full-text index (SQLite may lack FTS5)."""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'events_fts'")
+    return cursor.fetchone() is not None
+
+
+def display_headline(headline: Optional[str], event_text: Optional[str], category: Optional[str],
+                     max_length: int = 120) -> str:
+    """The event's headline, or else the first line of its text."""
+    headline = (headline or "").strip()
+    if headline:
+        return headline
+    body_lines = [line for line in (event_text or "").split("\n") if line.strip() and not line.startswith("[")]
+    if body_lines:
+        first = body_lines[0]
+        return first if len(first) <= max_length else first[:max_length - 3] + "..."
+    return f"{(category or 'Unknown').capitalize()} event"
+
+
+def search_events(cursor: sqlite3.Cursor, text: str, limit: int = 20, offset: int = 0,
+                  marks: Tuple[str, str] = SNIPPET_MARKS) -> List[Dict[str, Any]]:
+    """Return the events best matching ``text``, best first (newest first among equals).
+
+    Each result has the event's id, timestamp, category, location and
+    headline, and a snippet of the best matching column with the matched
+    words between ``marks``.
+    """
+    query = fts_query(text)
+    if not query:
+        return []
+    cursor.execute('''
+    SELECT rowid FROM events_fts
+    WHERE events_fts MATCH ? AND rank MATCH ?
+    ORDER BY rank, rowid DESC
+    LIMIT ? OFFSET ?
+    ''', (query, f"bm25({', '.join(map(str, COLUMN_WEIGHTS))})", limit, offset))
+    ranked = [row[0] for row in cursor.fetchall()]
+    if not ranked:
+        return []
+    cursor.execute(f'''
+    SELECT e.id, e.timestamp, e.category, e.location, e.headline, e.event_text,
+           snippet(events_fts, -1, ?, ?, '…', 16)
+    FROM events_fts
+    JOIN events e ON e.id = events_fts.rowid
+    WHERE events_fts MATCH ? AND events_fts.rowid IN ({", ".join("?" * len(ranked))})
+    ''', (*marks, query, *ranked))
+    results = {event_id: {
+        "id": event_id,
+        "timestamp": timestamp,
+        "category": category,
+        "location": location or "Unknown",
+        "headline": display_headline(headline, event_text, category),
+        "snippet": snippet,
+    } for event_id, timestamp, category, location, headline, event_text, snippet in cursor.fetchall()}
+    return [results[event_id] for event_id in ranked if event_id in results]
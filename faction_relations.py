@@ -0,0 +1,195 @@
+"""
+Faction relations for the Fantasy World Event Generator.
+
+Relations are a symmetric NumPy matrix of small status codes, one row and column
+per faction, plus a sparse log of the events that touched each pair. Lookups
+are O(1) and independent of argument order, queries such as "every hostile
+pair" are a single vectorized comparison, and the snapshot form stores one
+digit per pair.
+"""
+
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from history import bounded, push, trim
+
+# Status names by code; code 0 (neutral) is the default for every pair
+RELATION_STATUSES = ("neutral", "friendly", "hostile", "allied", "trading")
+_STATUS_CODES = {status: code for code, status in enumerate(RELATION_STATUSES)}
+
+
+class FactionRelations:
+    """Pairwise faction relations keyed by faction entity ID.
+
+    Faction IDs are whatever the caller uses (the world's EntityRegistry IDs);
+    each one is given a matrix row on first use. A faction's relation with
+    itself is always neutral and cannot be changed. Each pair's log keeps at
+    most ``history_limit`` entries (None = unbounded).
+    """
+
+    def __init__(self, factions: Iterable[int] = (), history_limit: Optional[int] = None):
+        self.factions: List[int] = []
+        self.history_limit = history_limit
+        self._rows: Dict[int, int] = {}
+        self._status = np.zeros((0, 0), dtype=np.int8)
+        # (row, row) with the smaller row first -> ring buffer of log entries
+        self._log: Dict[Tuple[int, int], deque] = {}
+        for faction in factions:
+            self.add_faction(faction)
+
+    def __len__(self) -> int:
+        return len(self.factions)
+
+    def add_faction(self, faction: int) -> int:
+        """Register ``faction`` if needed and return its matrix row."""
+        row = self._rows.get(faction)
+        if row is not None:
+            return row
+        row = self._rows[faction] = len(self.factions)
+        self.factions.append(faction)
+        capacity = self._status.shape[0]
+        if row >= capacity:
+            grown = np.zeros((max(8, capacity * 2),) * 2, dtype=np.int8)
+            grown[:capacity, :capacity] = self._status
+            self._status = grown
+        return row
+
+    def _pair(self, faction1: int, faction2: int) -> Tuple[int, int]:
+        a, b = self.add_faction(faction1), self.add_faction(faction2)
+        return (a, b) if a <= b else (b, a)
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """The live ``n x n`` status-code matrix (a view, not a copy)."""
+        n = len(self.factions)
+        return self._status[:n, :n]
+
+    def status(self, faction1: int, faction2: int) -> str:
+        """Return the relation status between two factions, in either order."""
+        a, b = self._rows.get(faction1), self._rows.get(faction2)
+        if a is None or b is None:
+            return RELATION_STATUSES[0]
+        return RELATION_STATUSES[self._status[a, b]]
+
+    def set_status(self, faction1: int, faction2: int, status: str) -> None:
+        """Set the relation status between two different factions."""
+        code = _STATUS_CODES.get(status)
+        if code is None:
+            raise ValueError(f"Unknown relation status '{status}', expected one of {RELATION_STATUSES}")
+        if faction1 == faction2:
+            return
+        a, b = self._pair(faction1, faction2)
+        self._status[a, b] = self._status[b, a] = code
+
+    def record(self, faction1: int, faction2: int, entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Append ``entry`` to the event log of a faction pair.
+
+        Returns an evicted entry that has to be archived, if any (see history.push()).
+        """
+        if faction1 == faction2:
+            return None
+        pair = self._pair(faction1, faction2)
+        log = self._log.get(pair)
+        if log is None:
+            log = self._log[pair] = bounded(limit=self.history_limit)
+        return push("relation_events", log, entry)
+
+    def set_history_limit(self, limit: Optional[int]) -> List[Tuple[int, int, Dict[str, Any]]]:
+        """Re-bound every pair's log to ``limit`` entries.
+
+        Returns ``(faction1, faction2, entry)`` for each trimmed entry that has to
+        be archived.
+        """
+        self.history_limit = limit
+        evicted = []
+        factions = self.factions
+        for (a, b), log in self._log.items():
+            self._log[(a, b)], overflow = trim("relation_events", log, limit)
+            evicted.extend((factions[a], factions[b], entry) for entry in overflow)
+        return evicted
+
+    def history(self, faction1: int, faction2: int) -> List[Dict[str, Any]]:
+        """Return the in-memory event log of a faction pair (empty if nothing happened)."""
+        a, b = self._rows.get(faction1), self._rows.get(faction2)
+        if a is None or b is None:
+            return []
+        return list(self._log.get((a, b) if a <= b else (b, a), ()))
+
+    def pairs_with_status(self, status: str) -> List[Tuple[int, int]]:
+        """Return every unordered faction pair currently in ``status``."""
+        rows, cols = np.nonzero(np.triu(self.matrix == _STATUS_CODES[status], k=1))
+        factions = self.factions
+        return [(factions[a], factions[b]) for a, b in zip(rows.tolist(), cols.tolist())]
+
+    def notable_pairs(self) -> List[Tuple[int, int, str]]:
+        """Return ``(faction1, faction2, status)`` for every pair that is not neutral."""
+        matrix = self.matrix
+        rows, cols = np.nonzero(np.triu(matrix, k=1))
+        factions = self.factions
+        return [(factions[a], factions[b], RELATION_STATUSES[matrix[a, b]])
+                for a, b in zip(rows.tolist(), cols.tolist())]
+
+    def status_counts(self) -> Dict[str, int]:
+        """Count faction pairs per status."""
+        n = len(self.factions)
+        codes = self.matrix[np.triu_indices(n, k=1)]
+        counts = np.bincount(codes, minlength=len(RELATION_STATUSES))
+        return {status: int(count) for status, count in zip(RELATION_STATUSES, counts)}
+
+    def random_pair(self, rng: Any) -> Optional[Tuple[int, int]]:
+        """Pick two different factions with ``rng``, or None if there are fewer than two."""
+        n = len(self.factions)
+        if n < 2:
+            return None
+        a = rng.randrange(n)
+        b = rng.randrange(n - 1)
+        if b >= a:
+            b += 1
+        return self.factions[a], self.factions[b]
+
+    # --- serialization -------------------------------------------------------
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a JSON-ready snapshot: the upper triangle as one digit per pair."""
+        n = len(self.factions)
+        codes = self.matrix[np.triu_indices(n, k=1)]
+        factions = self.factions
+        return {
+            "factions": list(factions),
+            "status": (codes + ord("0")).astype(np.uint8).tobytes().decode("ascii"),
+            "log": [[factions[a], factions[b], list(entries)] for (a, b), entries in self._log.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FactionRelations":
+        """Rebuild relations from to_dict() output, with unbounded logs."""
+        relations = cls(data.get("factions", []))
+        n = len(relations.factions)
+        codes = np.frombuffer(data.get("status", "").encode("ascii"), dtype=np.uint8) - ord("0")
+        if codes.size:
+            rows, cols = np.triu_indices(n, k=1)
+            matrix = relations.matrix
+            matrix[rows, cols] = codes
+            matrix[cols, rows] = codes
+        for faction1, faction2, entries in data.get("log", []):
+            relations._log[relations._pair(faction1, faction2)] = bounded(entries)
+        return relations
+
+    @classmethod
+    def from_legacy(cls, relations: Iterable[Tuple[int, int, Dict[str, Any]]],
+                    factions: Iterable[int] = ()) -> "FactionRelations":
+        """Convert the entries of the old relations dict, given as
+        ``(faction1, faction2, {"status", "events"})`` with faction IDs.
+
+        Both orderings of a pair used to be separate entries; their logs are merged.
+        """
+        converted = cls(factions)
+        for faction1, faction2, data in relations:
+            status = data.get("status", "neutral")
+            if status != "neutral" and status in _STATUS_CODES:
+                converted.set_status(faction1, faction2, status)
+            for entry in data.get("events", []):
+                converted.record(faction1, faction2, entry)
+        return converted
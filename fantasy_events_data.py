@@ -252,6 +252,24 @@ event_categories = {
     ]
 }
 
+# Relative category weights for generate_event (1.0 = the default share).
+# Raise "conflict" and lower "social" for a world at war, for example.
+category_weights = {
+    "political": 1.0,
+    "magical": 1.0,
+    "social": 1.0,
+    "economic": 1.0,
+    "natural": 1.0,
+    "conflict": 1.0,
+    "mystery": 1.0,
+    "religious": 1.0,
+    "legendary": 1.0,
+}
+
+# Optional per-template weights: category -> one weight per template in
+# event_categories[category]. Categories left out pick templates uniformly.
+template_weights = {}
+
 # Locations in the fantasy world
 locations = [
     "Dragonspire Citadel", "Whispering Woods", "Mistfall Harbor", "Sunhaven", "Gloomhollow",
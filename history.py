@@ -0,0 +1,81 @@
+"""
+Bounded in-memory histories for the Fantasy World Event Generator.
+
+Every history list in world_state (event_history, each character's and
+location's events, faction relation logs, plot events, developments and the
+world-change lists) is a fixed-capacity ring buffer, so snapshot size and
+per-event cost stop growing with the age of the world.
+
+Entries evicted from a buffer are not lost:
+- entries of EVENT_TABLE_COLLECTIONS that carry an ``event_id`` are rows of the
+  events table and are simply dropped, since they can be queried from there;
+- anything else (world changes, developments, plot event ids, political notes)
+  is handed back to the caller to be spilled to the history_archive table.
+"""
+
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from world_records import Record
+
+# Default number of entries kept in memory per collection (None = unbounded)
+DEFAULT_HISTORY_LIMITS: Dict[str, Optional[int]] = {
+    "event_history": 100,
+    "character_events": 25,
+    "location_events": 25,
+    "relation_events": 25,
+    "plot_events": 50,
+    "developments": 10,
+    "social_events": 25,
+    "economic_events": 25,
+    "magical_events": 25,
+    "realm_shifts": 25,
+}
+
+# Collections whose event entries can be rebuilt from the events table
+EVENT_TABLE_COLLECTIONS = frozenset({"event_history", "character_events", "location_events", "relation_events"})
+
+# Top-level world_state lists that are bounded as a whole
+WORLD_HISTORIES = ("event_history", "social_events", "economic_events", "magical_events", "realm_shifts")
+
+
+def bounded(entries: Iterable[Any] = (), limit: Optional[int] = None) -> deque:
+    """Return ``entries`` as a ring buffer keeping only the newest ``limit``."""
+    return deque(entries, maxlen=limit)
+
+
+def needs_archive(collection: str, entry: Any) -> bool:
+    """True if ``entry`` would be lost for good when evicted from ``collection``."""
+    return collection not in EVENT_TABLE_COLLECTIONS or not isinstance(entry, dict) or "event_id" not in entry
+
+
+def push(collection: str, entries: deque, entry: Any) -> Optional[Any]:
+    """Append ``entry`` and return the evicted entry if it must be archived.
+
+    Returns None when nothing was evicted or the evicted entry is in the events table.
+    """
+    if entries.maxlen == 0:
+        return entry if needs_archive(collection, entry) else None
+    evicted = None
+    if entries.maxlen is not None and len(entries) == entries.maxlen:
+        oldest = entries[0]
+        if needs_archive(collection, oldest):
+            evicted = oldest
+    entries.append(entry)
+    return evicted
+
+
+def trim(collection: str, entries: Iterable[Any], limit: Optional[int]) -> Tuple[deque, List[Any]]:
+    """Bound an existing history, returning the ring buffer and the entries to archive."""
+    entries = list(entries)
+    overflow = entries[:len(entries) - limit] if limit is not None and len(entries) > limit else []
+    return bounded(entries, limit), [entry for entry in overflow if needs_archive(collection, entry)]
+
+
+def json_default(value: Any) -> Any:
+    """``json.dumps(default=...)`` hook that writes ring buffers as plain lists and records as dicts."""
+    if isinstance(value, deque):
+        return list(value)
+    if isinstance(value, Record):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
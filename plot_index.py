@@ -0,0 +1,98 @@
+"""
+Plot keyword index and lifecycle for the Fantasy World Event Generator.
+
+Each plot in world_state['active_plots'] has a few keywords; an event that
+contains one of them advances the plot. PlotIndex is an inverted index from
+keyword to plot ID, so matching an event costs one lookup per word of the event
+instead of a scan over every keyword of every plot.
+
+Plots move through three states:
+
+    active    - advanced within the last PLOT_DORMANT_AFTER events
+    dormant   - no related event for PLOT_DORMANT_AFTER events; a related
+                event makes the plot active again
+    resolved  - dormant for another PLOT_RESOLVED_AFTER events; the plot is
+                moved to the history_archive table and out of world_state
+
+Only active plots are shown in the menus and sent to the AI.
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+PLOT_STATUSES = ("active", "dormant", "resolved")
+
+# Unrelated events before an active plot goes dormant ...
+PLOT_DORMANT_AFTER = 50
+# ... and further events before a dormant plot is resolved and archived
+PLOT_RESOLVED_AFTER = 200
+# Plot lifecycles are checked once every this many events
+PLOT_SWEEP_INTERVAL = 10
+
+# Keywords are the first few words of at least this many letters
+KEYWORD_MIN_LENGTH = 5
+MAX_KEYWORDS = 5
+
+_WORD = re.compile(r"\w+")
+
+
+def words(text: str) -> Set[str]:
+    """Return the distinct lowercase words of ``text``."""
+    return set(_WORD.findall(text.lower()))
+
+
+def plot_keywords(text: str) -> List[str]:
+    """Return the keywords a plot created from ``text`` is matched by."""
+    keywords: List[str] = []
+    for word in _WORD.findall(text.lower()):
+        if len(word) >= KEYWORD_MIN_LENGTH and word not in keywords:
+            keywords.append(word)
+            if len(keywords) == MAX_KEYWORDS:
+                break
+    return keywords
+
+
+def live_plots(plots: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Return the active plots, most recently advanced first."""
+    return sorted((plot for plot in plots if plot.get("status", "active") == "active"),
+                  key=lambda plot: plot.get("last_event", 0), reverse=True)
+
+
+class PlotIndex:
+    """Inverted index from keyword to plot ID over world_state['active_plots'].
+
+    Also maps each plot ID to the plot's position in that list, which is what
+    journal paths use. Call rebuild() after plots were removed from the list.
+    """
+
+    def __init__(self, plots: Iterable[Dict[str, Any]] = ()):
+        self._plots: Dict[str, Set[int]] = {}
+        self._positions: Dict[int, int] = {}
+        self.rebuild(plots)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def rebuild(self, plots: Iterable[Dict[str, Any]]) -> None:
+        """Index ``plots`` from scratch."""
+        self._plots = {}
+        self._positions = {}
+        for position, plot in enumerate(plots):
+            self.add(plot, position)
+
+    def add(self, plot: Dict[str, Any], position: int) -> None:
+        """Index a plot stored at ``position`` in the plot list."""
+        self._positions[plot["id"]] = position
+        for keyword in plot.get("keywords", []):
+            self._plots.setdefault(keyword, set()).add(plot["id"])
+
+    def match(self, text: str) -> Optional[int]:
+        """Return the list position of the first plot with a keyword in ``text``, or None."""
+        positions = self._positions
+        found = None
+        for word in words(text):
+            for plot_id in self._plots.get(word, ()):
+                position = positions[plot_id]
+                if found is None or position < found:
+                    found = position
+        return found
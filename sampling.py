@@ -0,0 +1,114 @@
+"""
+Weighted sampling helpers for the Fantasy World Event Generator.
+
+AliasTable implements Walker's alias method: building the table is O(n), after
+which every weighted draw costs one uniform number and one comparison, however
+many options there are. RecentWindow remembers the last K picks so a caller can
+avoid repeating them.
+"""
+
+from collections.abc import Hashable
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+class AliasTable:
+    """O(1) sampling of indices ``0..n-1`` in proportion to ``weights``.
+
+    Weights need not sum to one. Zero weights are allowed (that option is never
+    drawn) as long as at least one weight is positive.
+    """
+
+    __slots__ = ("weights", "size", "_prob", "_alias", "_prob_array", "_alias_array")
+
+    def __init__(self, weights: Sequence[float]):
+        weights = [float(w) for w in weights]
+        if not weights:
+            raise ValueError("AliasTable needs at least one weight")
+        if any(w < 0 for w in weights):
+            raise ValueError(f"Weights must be non-negative, got {weights}")
+        total = sum(weights)
+        if total <= 0:
+            raise ValueError("At least one weight must be positive")
+
+        n = len(weights)
+        self.weights = tuple(weights)
+        self.size = n
+        scaled = [w * n / total for w in weights]
+        prob = [1.0] * n
+        alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            prob[s] = scaled[s]
+            alias[s] = l
+            # The large option donates the rest of the small one's column
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+        # Whatever is left over is 1.0 up to rounding error
+        for i in small + large:
+            prob[i] = 1.0
+
+        self._prob: List[float] = prob
+        self._alias: List[int] = alias
+        self._prob_array = np.array(prob)
+        self._alias_array = np.array(alias, dtype=np.int64)
+
+    def sample(self, rng: Any) -> int:
+        """Draw one index using a single ``rng.random()`` call."""
+        x = rng.random() * self.size
+        i = int(x)
+        return i if x - i < self._prob[i] else self._alias[i]
+
+    def sample_many(self, np_rng: "np.random.Generator", n: int) -> "np.ndarray":
+        """Draw ``n`` indices at once from a NumPy generator."""
+        x = np_rng.random(n) * self.size
+        i = x.astype(np.int64)
+        return np.where(x - i < self._prob_array[i], i, self._alias_array[i])
+
+
+class RecentWindow:
+    """The last ``size`` items seen, in a fixed-size ring buffer with a hash index.
+
+    ``item in window`` and ``window.add(item)`` are both O(1); adding to a full
+    window evicts the oldest item. The index counts occurrences, so an item that
+    was added twice stays a member until both copies are evicted. A size of 0
+    disables the window entirely.
+    """
+
+    __slots__ = ("size", "_ring", "_pos", "_members")
+
+    def __init__(self, size: int = 0):
+        if size < 0:
+            raise ValueError(f"Window size must be >= 0, got {size}")
+        self.size = size
+        self._ring: List[Optional[Hashable]] = [None] * size
+        self._pos = 0
+        self._members: Dict[Hashable, int] = {}
+
+    def __contains__(self, item: Hashable) -> bool:
+        return item in self._members
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def add(self, item: Hashable) -> None:
+        if not self.size:
+            return
+        members = self._members
+        oldest = self._ring[self._pos]
+        if oldest is not None:
+            if members[oldest] == 1:
+                del members[oldest]
+            else:
+                members[oldest] -= 1
+        self._ring[self._pos] = item
+        members[item] = members.get(item, 0) + 1
+        self._pos = (self._pos + 1) % self.size
+
+    def clear(self) -> None:
+        self._ring = [None] * self.size
+        self._pos = 0
+        self._members.clear()
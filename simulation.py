@@ -0,0 +1,189 @@
+"""
+Headless bulk simulation for the Fantasy World Event Generator.
+
+Drives the template pipeline (generate -> extract -> save -> apply -> persist) as
+fast as possible, with no console clearing, bell, wait menu, AI or Telegram, and
+reports throughput and per-stage timings. Used for capacity planning: world-state
+growth, database size and web performance on realistic history lengths.
+
+Usage:
+    python Fantasy.py --simulate 10000 [--world "Simulation"] [--seed 42]
+    python Fantasy.py --simulate 10000 --worlds "Alpha,Beta,Gamma" [--workers 8]
+"""
+
+import contextlib
+import io
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional
+
+from db_connections import WriteError
+from Fantasy import FantasyWorldEventGenerator
+
+# Pipeline stages in the order they run, as reported by run_simulation(); "flush"
+# is the final wait for the background writer to commit what is still queued
+SIMULATION_STAGES = ("generate", "extract", "save_event", "apply", "persist", "flush")
+
+
+def run_simulation(world_name: str, num_events: int, progress_every: int = 0,
+                   seed: Optional[int] = None, no_repeat_window: int = 0,
+                   state_codec: Optional[str] = None) -> Dict[str, Any]:
+    """Generate ``num_events`` template events for ``world_name`` without any I/O pauses.
+
+    Passing ``seed`` for a new world makes the run reproducible: the same seed
+    yields the same event sequence, which keeps benchmark comparisons honest.
+    ``no_repeat_window`` and ``state_codec`` are passed through to the generator.
+
+    Returns a stats dict with the event count, total elapsed seconds, events/sec,
+    per-stage seconds and the resulting database size in bytes. The generator's
+    connections are closed when it returns.
+    """
+    generator = FantasyWorldEventGenerator(world_name, seed=seed, no_repeat_window=no_repeat_window,
+                                           state_codec=state_codec)
+    generator.headless = True
+
+    stage_times = {stage: 0.0 for stage in SIMULATION_STAGES}
+    clock = time.perf_counter
+
+    start = clock()
+    for i in range(1, num_events + 1):
+        t0 = clock()
+        event, category = generator.generate_event()
+        t1 = clock()
+        event_data = generator.extract_event_data(event)
+        t2 = clock()
+        # One transaction per event, committed at the end of persist; if it
+        # fails, the world goes back to what was saved before the event
+        try:
+            with generator.event_transaction():
+                if generator.save_event_to_db(event, category, event_data) is None:
+                    continue
+                t3 = clock()
+                generator.apply_event_to_world(event, category, event_data)
+                t4 = clock()
+                generator.persist_event_effects(event_data)
+        except WriteError as e:
+            # This event is queued; an earlier one was lost and the next save checkpoints the world
+            print(f"  Error writing earlier events to the database: {e}")
+        t5 = clock()
+
+        stage_times["generate"] += t1 - t0
+        stage_times["extract"] += t2 - t1
+        stage_times["save_event"] += t3 - t2
+        stage_times["apply"] += t4 - t3
+        stage_times["persist"] += t5 - t4
+
+        if progress_every and i % progress_every == 0:
+            print(f"  {i:,}/{num_events:,} events ({i / (clock() - start):,.0f} events/sec)")
+    t0 = clock()
+    try:
+        generator.db.flush()
+    except WriteError as e:
+        print(f"  Error writing the last events to the database: {e}")
+    stage_times["flush"] = clock() - t0
+    elapsed = clock() - start
+    # Checkpoints the world if writes were lost, and the WAL into the
+    # database file, which is measured below
+    generator.close()
+
+    return {
+        "world_name": world_name,
+        "seed": generator.rng_seed,
+        "events": num_events,
+        "elapsed": elapsed,
+        "events_per_sec": num_events / elapsed if elapsed > 0 else 0.0,
+        "stage_times": stage_times,
+        "db_path": generator.db_path,
+        "db_bytes": sum(os.path.getsize(path) for path in (generator.db_path, generator.db_path + "-wal")
+                        if os.path.exists(path)),
+    }
+
+
+def print_simulation_report(stats: Dict[str, Any]) -> None:
+    """Print the throughput and per-stage breakdown of a simulation run."""
+    events = stats["events"] or 1
+    print(f"\n=== SIMULATION REPORT: {stats['world_name']} ===\n")
+    print(f"Seed             : {stats['seed']}")
+    print(f"Events generated : {stats['events']:,}")
+    print(f"Elapsed          : {stats['elapsed']:.2f} s")
+    print(f"Throughput       : {stats['events_per_sec']:,.1f} events/sec")
+    print(f"Database         : {stats['db_path']} ({stats['db_bytes'] / 1_048_576:.1f} MB)")
+    print("\nPer-stage timings:")
+    total = sum(stats["stage_times"].values()) or 1.0
+    for stage in SIMULATION_STAGES:
+        seconds = stats["stage_times"][stage]
+        print(f"  {stage:<11} {seconds:8.2f} s  {seconds / events * 1000:8.3f} ms/event  {seconds / total:6.1%}")
+
+
+def _simulate_world_quietly(world_name: str, num_events: int, seed: Optional[int],
+                            no_repeat_window: int = 0, state_codec: Optional[str] = None) -> Dict[str, Any]:
+    """Process-pool worker: run one world's simulation with its console output discarded."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return run_simulation(world_name, num_events, seed=seed, no_repeat_window=no_repeat_window,
+                              state_codec=state_codec)
+
+
+def simulate_worlds(world_names: List[str], num_events: int, workers: Optional[int] = None,
+                    seed: Optional[int] = None, no_repeat_window: int = 0,
+                    state_codec: Optional[str] = None) -> Dict[str, Any]:
+    """Simulate ``num_events`` events in each world, spread across a process pool.
+
+    Every world already has its own ``<world>_events.db``, so each worker process
+    owns one SQLite database at a time and no writes contend. ``workers`` defaults
+    to the CPU count. With a ``seed``, each world gets its own seed derived from it
+    and the world name, so the whole run is reproducible.
+
+    Returns aggregate stats plus the per-world stats from run_simulation().
+    """
+    workers = workers or os.cpu_count() or 1
+    results = []
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for name in world_names:
+            world_seed = random.Random(f"{seed}:{name}").getrandbits(63) if seed is not None else None
+            futures[pool.submit(_simulate_world_quietly, name, num_events, world_seed, no_repeat_window,
+                                 state_codec)] = name
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                stats = future.result()
+            except Exception as e:
+                print(f"  [{done}/{len(futures)}] {futures[future]} failed: {e}")
+                continue
+            results.append(stats)
+            print(f"  [{done}/{len(futures)}] {stats['world_name']}: {stats['events_per_sec']:,.0f} events/sec")
+    elapsed = time.perf_counter() - start
+
+    total_events = sum(r["events"] for r in results)
+    return {
+        "worlds": len(results),
+        "failed": len(world_names) - len(results),
+        "workers": workers,
+        "events": total_events,
+        "elapsed": elapsed,
+        "events_per_sec": total_events / elapsed if elapsed > 0 else 0.0,
+        "stage_times": {stage: sum(r["stage_times"][stage] for r in results) for stage in SIMULATION_STAGES},
+        "db_bytes": sum(r["db_bytes"] for r in results),
+        "results": sorted(results, key=lambda r: r["world_name"]),
+    }
+
+
+def print_multi_world_report(stats: Dict[str, Any]) -> None:
+    """Print aggregated throughput for a simulate_worlds() run."""
+    print("\n=== MULTI-WORLD SIMULATION REPORT ===\n")
+    print(f"Worlds           : {stats['worlds']:,} ({stats['failed']} failed) on {stats['workers']} workers")
+    print(f"Events generated : {stats['events']:,}")
+    print(f"Wall time        : {stats['elapsed']:.2f} s")
+    print(f"Throughput       : {stats['events_per_sec']:,.1f} events/sec (aggregate)")
+    print(f"Databases        : {stats['db_bytes'] / 1_048_576:.1f} MB total")
+    print("\nPer-world throughput:")
+    for r in stats["results"]:
+        print(f"  {r['world_name']:<30} {r['events_per_sec']:10,.1f} events/sec")
+    print("\nCPU time per stage (summed over workers):")
+    total = sum(stats["stage_times"].values()) or 1.0
+    for stage in SIMULATION_STAGES:
+        seconds = stats["stage_times"][stage]
+        print(f"  {stage:<11} {seconds:8.2f} s  {seconds / total:6.1%}")
@@ -0,0 +1,115 @@
+"""
+World-state snapshot codecs for the Fantasy World Event Generator.
+
+Checkpoints in the world_state table can be stored as:
+
+- ``json``    - plain JSON text in ``state_json`` (the original format, readable
+                by any SQLite client)
+- ``marshal`` - Python's marshal format, zlib-compressed, in ``state_data``
+- ``msgpack`` - MessagePack, zlib-compressed, in ``state_data`` (needs the
+                optional ``msgpack`` package)
+
+The codec is chosen per world and recorded on every row, so rows written with
+different codecs can be read side by side. marshal data is only guaranteed to be
+readable by the Python version that wrote it; use json or msgpack for worlds
+that move between machines.
+"""
+
+import json
+import marshal
+import zlib
+from collections import deque
+from typing import Any, Dict, Optional, Tuple, Union
+
+from history import json_default
+from world_records import Record
+
+# Try to import the optional MessagePack library
+MSGPACK_SUPPORT = False
+
+try:
+    import msgpack
+    MSGPACK_SUPPORT = True
+except ImportError:
+    pass
+
+DEFAULT_CODEC = "json"
+CODECS = ("json", "marshal", "msgpack")
+
+# zlib level 1 is nearly as small as the default level for this data, at a fraction of the time
+COMPRESSION_LEVEL = 1
+
+
+def available_codecs() -> Tuple[str, ...]:
+    """Return the codecs that can be used in this environment."""
+    return tuple(codec for codec in CODECS if codec != "msgpack" or MSGPACK_SUPPORT)
+
+
+def check_codec(codec: str) -> str:
+    """Return ``codec`` if it can be used here, else raise ValueError."""
+    if codec not in CODECS:
+        raise ValueError(f"Unknown state codec {codec!r}; expected one of {', '.join(CODECS)}")
+    if codec not in available_codecs():
+        raise ValueError(f"State codec {codec!r} needs the msgpack package (pip install msgpack)")
+    return codec
+
+
+def _plain(value: Any) -> Any:
+    """Copy ``value`` with ring buffers as lists and records as dicts (marshal has no hooks).
+
+    History entries never hold ring buffers themselves, so a deque is copied
+    without walking its entries; that skips almost all of a large state.
+    """
+    if isinstance(value, deque):
+        return list(value)
+    if isinstance(value, Record):
+        value = value.to_dict()
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+    return value
+
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, deque):
+        return list(value)
+    if isinstance(value, Record):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not MessagePack serializable")
+
+
+def encode_state(state: Dict[str, Any], codec: str = DEFAULT_CODEC) -> Union[str, bytes]:
+    """Encode a world state: text for json, compressed bytes for the binary codecs."""
+    if codec == "json":
+        return json.dumps(state, default=json_default)
+    if codec == "marshal":
+        return zlib.compress(marshal.dumps(_plain(state)), COMPRESSION_LEVEL)
+    if codec == "msgpack":
+        check_codec(codec)
+        return zlib.compress(msgpack.packb(state, default=_msgpack_default), COMPRESSION_LEVEL)
+    raise ValueError(f"Unknown state codec {codec!r}")
+
+
+def decode_state(data: Union[str, bytes], codec: Optional[str] = DEFAULT_CODEC) -> Dict[str, Any]:
+    """Decode what encode_state() produced; a missing codec means json (older rows)."""
+    codec = codec or "json"
+    if codec == "json":
+        return json.loads(data)
+    if codec == "marshal":
+        return marshal.loads(zlib.decompress(data))
+    if codec == "msgpack":
+        check_codec(codec)
+        return msgpack.unpackb(zlib.decompress(data), strict_map_key=False)
+    raise ValueError(f"Unknown state codec {codec!r}")
+
+
+def state_columns(state: Dict[str, Any], codec: str) -> Tuple[Optional[str], Optional[bytes]]:
+    """Return the ``(state_json, state_data)`` column values for a world_state row."""
+    encoded = encode_state(state, codec)
+    return (encoded, None) if codec == "json" else (None, encoded)
+
+
+def row_payload(state_json: Optional[str], state_data: Optional[bytes]) -> Union[str, bytes, None]:
+    """Return whichever of a world_state row's two payload columns is set."""
+    return state_json if state_json is not None else state_data
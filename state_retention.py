@@ -0,0 +1,232 @@
+"""
+World-state checkpoint retention for the Fantasy World Event Generator.
+
+Long-running worlds pile up world_state checkpoints (and, for worlds created
+before the journal, one full snapshot per event) that dominate the database
+file. compact_world_state() thins them out with a tiered retention policy:
+
+    younger than a day   - every checkpoint
+    up to a week old     - the newest checkpoint of each hour
+    older                - the newest checkpoint of each day
+
+The newest and the oldest checkpoint are always kept, so the world still loads
+and world_at() can still reach every journaled event; it just replays the
+journal from further back. Sections of a removed checkpoint (see
+world_sections.py) that a kept one still reads are moved to it. Rows are deleted in small batches, each its own short
+transaction, and the freed pages are returned to the file system with
+incremental VACUUM, so the event loop and web reads are never blocked for long.
+
+World databases run in WAL mode (see db_connections.py): the deletes and the
+vacuumed pages go to the -wal file first and only shrink the database once
+they are checkpointed back into it. The job checkpoints with TRUNCATE before
+measuring and after vacuuming, and counts the -wal file in both sizes, so the
+reported savings are what the world's files really lost.
+
+start_compaction_thread() runs the job periodically in a daemon thread;
+``python Fantasy.py --compact`` runs it once in the foreground.
+"""
+
+import bisect
+import datetime
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# (age, bucket) pairs, youngest first: checkpoints younger than ``age`` keep the
+# newest row of every ``bucket``; None as bucket keeps every row, None as age
+# covers everything older than the previous tier
+RETENTION_TIERS: Tuple[Tuple[Optional[datetime.timedelta], Optional[datetime.timedelta]], ...] = (
+    (datetime.timedelta(days=1), None),
+    (datetime.timedelta(days=7), datetime.timedelta(hours=1)),
+    (None, datetime.timedelta(days=1)),
+)
+
+# Rows deleted per transaction, and the pause between transactions
+DELETE_BATCH_SIZE = 200
+BATCH_PAUSE = 0.05
+# Pages released per incremental_vacuum step
+VACUUM_STEP_PAGES = 256
+# How often start_compaction_thread() runs the job
+COMPACTION_INTERVAL = 6 * 60 * 60
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def expired_checkpoints(rows: Iterable[Tuple[int, Optional[str]]], now: datetime.datetime,
+                        tiers: Sequence[Tuple[Optional[datetime.timedelta],
+                                              Optional[datetime.timedelta]]] = RETENTION_TIERS) -> List[int]:
+    """Return the ids of the ``(id, timestamp)`` world_state rows the policy drops.
+
+    Rows without a readable timestamp are kept.
+    """
+    rows = sorted(rows)
+    if len(rows) <= 2:
+        return []
+    keep_always = {rows[0][0], rows[-1][0]}
+    newest_in_bucket: Dict[tuple, int] = {}
+    candidates = []
+    for row_id, timestamp in rows:
+        try:
+            when = datetime.datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+        except (TypeError, ValueError):
+            continue
+        age = now - when
+        for tier, (max_age, bucket) in enumerate(tiers):
+            if max_age is None or age < max_age:
+                break
+        else:
+            continue
+        if bucket is None:
+            continue
+        # Rows are in id order, so the last row seen in a bucket is its newest
+        key = (tier, int((when - datetime.datetime.min) / bucket))
+        newest_in_bucket[key] = row_id
+        candidates.append((row_id, key))
+    return [row_id for row_id, key in candidates
+            if newest_in_bucket[key] != row_id and row_id not in keep_always]
+
+
+def _file_size(db_path: str) -> int:
+    """Size of the database together with its -wal file."""
+    size = 0
+    for path in (db_path, db_path + "-wal"):
+        try:
+            size += os.path.getsize(path)
+        except OSError:
+            pass
+    return size
+
+
+def _checkpoint(conn: sqlite3.Connection) -> None:
+    # Copy the WAL into the database and empty it; a no-op outside WAL mode.
+    # Readers in the middle of a query can keep it from finishing, in which
+    # case the rest stays in the WAL (and is counted by _file_size)
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+
+
+def _drop_sections(cursor: sqlite3.Cursor, checkpoint_ids: List[int], kept: List[int]) -> int:
+    """Delete the section rows of ``checkpoint_ids`` that no kept checkpoint reads.
+
+    A section row is what every later checkpoint up to the next rewrite of that
+    section reads, so one still needed by the next kept checkpoint is moved to
+    it instead. Returns the size of the deleted rows.
+    """
+    marks = ','.join('?' * len(checkpoint_ids))
+    cursor.execute(f'''
+    SELECT id, checkpoint_id, section, COALESCE(LENGTH(state_json), 0) + COALESCE(LENGTH(state_data), 0)
+    FROM world_state_sections WHERE checkpoint_id IN ({marks})
+    ''', checkpoint_ids)
+    deleted = 0
+    for section_id, checkpoint_id, section, size in cursor.fetchall():
+        # The newest checkpoint is always kept, so there is a next one
+        successor = kept[bisect.bisect_right(kept, checkpoint_id)]
+        cursor.execute('''
+        SELECT 1 FROM world_state_sections
+        WHERE section = ? AND checkpoint_id > ? AND checkpoint_id <= ?
+        LIMIT 1
+        ''', (section, checkpoint_id, successor))
+        if cursor.fetchone():
+            cursor.execute("DELETE FROM world_state_sections WHERE id = ?", (section_id,))
+            deleted += size
+        else:
+            cursor.execute("UPDATE world_state_sections SET checkpoint_id = ? WHERE id = ?", (successor, section_id))
+    return deleted
+
+
+def compact_world_state(db_path: str, tiers=RETENTION_TIERS, batch_size: int = DELETE_BATCH_SIZE,
+                        pause: float = BATCH_PAUSE, convert: bool = False,
+                        now: Optional[datetime.datetime] = None) -> Dict[str, int]:
+    """Delete the checkpoints ``tiers`` drops and release the space they used.
+
+    Databases created before incremental vacuum was enabled keep the freed
+    pages for reuse by later writes unless ``convert`` is set, which switches
+    them over with a one-off full VACUUM (this blocks other writers while it
+    runs, so it is only done on request).
+
+    Returns a dict with 'deleted' (checkpoints), 'payload_bytes' (size of the
+    deleted snapshots and sections) and 'bytes_reclaimed' (how much smaller the
+    database and its -wal file got together).
+    """
+    report = {'deleted': 0, 'payload_bytes': 0, 'bytes_reclaimed': 0}
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        _checkpoint(conn)
+        size_before = _file_size(db_path)
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, timestamp FROM world_state")
+        rows = cursor.fetchall()
+        expired = expired_checkpoints(rows, now or datetime.datetime.now(), tiers)
+        kept = sorted(set(row_id for row_id, _ in rows).difference(expired))
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'world_state_sections'")
+        has_sections = cursor.fetchone() is not None
+
+        for start in range(0, len(expired), batch_size):
+            batch = expired[start:start + batch_size]
+            marks = ','.join('?' * len(batch))
+            if has_sections:
+                report['payload_bytes'] += _drop_sections(cursor, batch, kept)
+            cursor.execute(f'''
+            SELECT COALESCE(SUM(COALESCE(LENGTH(state_json), 0) + COALESCE(LENGTH(state_data), 0)), 0)
+            FROM world_state WHERE id IN ({marks})
+            ''', batch)
+            report['payload_bytes'] += cursor.fetchone()[0]
+            cursor.execute(f"DELETE FROM world_state WHERE id IN ({marks})", batch)
+            conn.commit()
+            report['deleted'] += len(batch)
+            if pause:
+                time.sleep(pause)
+
+        cursor.execute("PRAGMA auto_vacuum")
+        if cursor.fetchone()[0] != 2 and convert:
+            cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            cursor.execute("VACUUM")
+        cursor.execute("PRAGMA auto_vacuum")
+        if cursor.fetchone()[0] == 2:
+            previous = None
+            while True:
+                cursor.execute("PRAGMA freelist_count")
+                free_pages = cursor.fetchone()[0]
+                # Stop once done, or if other writers keep the count from dropping
+                if not free_pages or (previous is not None and free_pages >= previous):
+                    break
+                previous = free_pages
+                # executescript() steps the pragma to the end; execute() would
+                # stop after the first step and release a single page
+                conn.executescript(f"PRAGMA incremental_vacuum({VACUUM_STEP_PAGES})")
+                if pause:
+                    time.sleep(pause)
+        # Vacuumed pages only leave the database file once checkpointed
+        _checkpoint(conn)
+    finally:
+        conn.close()
+    report['bytes_reclaimed'] = max(size_before - _file_size(db_path), 0)
+    return report
+
+
+def format_report(report: Dict[str, int]) -> str:
+    """One-line summary of a compact_world_state() report."""
+    return (f"Compacted world states: {report['deleted']:,} checkpoints removed "
+            f"({report['payload_bytes'] / 1024 / 1024:,.1f} MB of snapshots), "
+            f"{report['bytes_reclaimed'] / 1024 / 1024:,.1f} MB returned to disk")
+
+
+def start_compaction_thread(db_path: str, interval: float = COMPACTION_INTERVAL) -> threading.Thread:
+    """Run compact_world_state() on ``db_path`` every ``interval`` seconds in a daemon thread.
+
+    Returns the thread object (already started).
+    """
+    def _run():
+        while True:
+            try:
+                report = compact_world_state(db_path)
+                if report['deleted']:
+                    print(f"\n{format_report(report)}")
+            except Exception as e:
+                print(f"[state_retention] Error compacting world states: {e}")
+            time.sleep(interval)
+
+    t = threading.Thread(target=_run, daemon=True)
+    t.start()
+    return t
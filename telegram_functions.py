@@ -373,7 +373,7 @@ class TelegramFunctions:
             return None
 
         try:
-            import sqlite3
+            from db_connections import connections
 
             # Extract numeric ID from the event_id string
             try:
@@ -383,8 +383,7 @@ class TelegramFunctions:
                 return None
 
             # Connect to the database
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            cursor = connections(self.db_path).read().cursor()
 
             # Query the telegram_event_details table
             cursor.execute('''
@@ -394,7 +393,6 @@ class TelegramFunctions:
             ''', (db_event_id,))
 
             result = cursor.fetchone()
-            conn.close()
 
             if result:
                 self.debug_print(f"Successfully loaded event details from database for event ID: {event_id}")
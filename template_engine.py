@@ -0,0 +1,459 @@
+"""
+Compiled template engine for the Fantasy World Event Generator.
+
+Event templates such as "The {faction} have declared war on the {faction2}!" are
+parsed once into a list of literal parts with precomputed slot indices. Rendering
+an event is then a handful of random choices followed by a single ''.join(),
+instead of repeatedly scanning the template for every known placeholder.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_PLACEHOLDER_RE = re.compile(r"\{(\w+)\}")
+
+# Placeholders that are drawn once per event and reused for every occurrence.
+# Everything else ({location}, {faction} and the fill_ins) is drawn per occurrence.
+SHARED_PLACEHOLDERS = frozenset({
+    "location2", "faction2",
+    "character_type", "character_name", "character_name2",
+    "magic_field", "resource", "valuable_resource",
+    "monster_type", "other_realm", "inn_name",
+})
+
+# Second-entity placeholders and the placeholder they must differ from
+DISTINCT_FROM = {
+    "location2": "location",
+    "faction2": "faction",
+    "character_name2": "character_name",
+}
+
+# Per-occurrence placeholders whose first value is remembered for DISTINCT_FROM
+_TRACKED_FIRST = frozenset(DISTINCT_FROM.values())
+
+# Placeholders that are filled from the characters dict rather than a flat pool
+CHARACTER_PLACEHOLDERS = frozenset({"character_type", "character_name", "character_name2"})
+
+
+class TemplateError(ValueError):
+    """Raised at load time for templates that cannot be rendered: placeholders
+    with no fill-in pool or an empty one, and unbalanced braces."""
+
+
+class CompiledTemplate:
+    """A template parsed into literal parts and the slots that need filling.
+
+    ``parts`` holds the literal text with an empty string at every slot position,
+    and ``slots`` holds ``(index, name, pool)`` tuples. ``pool`` is set only for
+    plain per-occurrence fill-ins, which the renderer can fill with a bare
+    ``choice()``; every other slot goes through the engine's resolver.
+    ``placeholders`` is the set of names the template fills.
+    """
+
+    __slots__ = ("source", "parts", "slots", "placeholders")
+
+    def __init__(self, source: str, parts: List[str], slots: Tuple[Tuple[int, str, Optional[tuple]], ...]):
+        self.source = source
+        self.parts = parts
+        self.slots = slots
+        self.placeholders = frozenset(name for _, name, _ in slots)
+
+    def __repr__(self) -> str:
+        return f"CompiledTemplate({self.source!r})"
+
+
+class NumpyChooser:
+    """A ``random()``/``choice()`` source backed by pre-drawn NumPy uniforms.
+
+    Stands in for random.Random where the renderer needs scalar draws during batch
+    rendering, refilling its buffer in chunks so NumPy still does the sampling.
+    """
+
+    __slots__ = ("_rng", "_chunk", "_buffer", "_pos")
+
+    def __init__(self, np_rng: "np.random.Generator", chunk: int = 4096):
+        self._rng = np_rng
+        self._chunk = chunk
+        self._buffer: List[float] = []
+        self._pos = 0
+
+    def random(self) -> float:
+        if self._pos >= len(self._buffer):
+            self._buffer = self._rng.random(self._chunk).tolist()
+            self._pos = 0
+        u = self._buffer[self._pos]
+        self._pos += 1
+        return u
+
+    def choice(self, seq: Sequence[Any]) -> Any:
+        return seq[int(self.random() * len(seq))]
+
+
+class TemplateEngine:
+    """Compiles and renders templates against a fixed set of fill-in pools.
+
+    Args:
+        pools: Mapping of placeholder name to the options it is filled from.
+            Option strings may themselves contain placeholders; those are compiled
+            too and rendered in the same event context.
+        characters: Mapping of character type to names, used for
+            {character_type}, {character_name} and {character_name2}.
+    """
+
+    def __init__(self, pools: Dict[str, Sequence[str]],
+                 characters: Optional[Dict[str, Sequence[str]]] = None):
+        self.characters = {ctype: tuple(names) for ctype, names in (characters or {}).items()}
+        self._character_types = tuple(self.characters)
+        self._character_count = sum(len(names) for names in self.characters.values())
+        self._cache: Dict[str, CompiledTemplate] = {}
+        self._pool_arrays: Dict[str, "np.ndarray"] = {}
+        # Character types, names per type, offsets into and the flat list of names
+        self._character_arrays: Optional[Tuple["np.ndarray", ...]] = None
+        self._batch_plans: Dict[CompiledTemplate, Optional[tuple]] = {}
+
+        self.pools: Dict[str, tuple] = {name: tuple(options) for name, options in pools.items()}
+
+        # Pools whose options are all literal text can be sampled directly;
+        # the rest carry CompiledTemplate options that are rendered on demand.
+        self._plain_pools: Dict[str, tuple] = {
+            name: options for name, options in self.pools.items()
+            if not any("{" in opt for opt in options)
+        }
+        self._values: Dict[str, tuple] = {}
+        for name, options in self.pools.items():
+            self._values[name] = tuple(self.compile(opt) if "{" in opt else opt for opt in options)
+
+        # Nested fill-ins are templates too: reject typos before anything renders
+        self.validate({f"fill-in {name!r}": options for name, options in self.pools.items()})
+
+    def is_known(self, name: str) -> bool:
+        """Return True if the engine knows how to fill ``{name}``."""
+        if name in CHARACTER_PLACEHOLDERS:
+            return bool(self._character_types)
+        return name in self.pools
+
+    def unknown_placeholders(self, template: str) -> List[str]:
+        """Return the placeholders in ``template`` that no pool can fill, in order."""
+        unknown = []
+        for name in _PLACEHOLDER_RE.findall(template):
+            if not self.is_known(name) and name not in unknown:
+                unknown.append(name)
+        return unknown
+
+    def problems(self, template: str) -> List[str]:
+        """Describe what keeps ``template`` from rendering, if anything.
+
+        Reports placeholders no pool can fill, placeholders whose pool has no
+        options (or a character type with no names) and braces that do not
+        form a placeholder.
+        """
+        problems = []
+        unknown = self.unknown_placeholders(template)
+        if unknown:
+            problems.append("unknown " + ", ".join("{" + name + "}" for name in unknown))
+        empty = [name for name in dict.fromkeys(_PLACEHOLDER_RE.findall(template))
+                 if self.is_known(name) and self._is_empty(name)]
+        if empty:
+            problems.append("no options for " + ", ".join("{" + name + "}" for name in empty))
+        rest = _PLACEHOLDER_RE.sub("", template)
+        if "{" in rest or "}" in rest:
+            problems.append("unbalanced braces")
+        return problems
+
+    def _is_empty(self, name: str) -> bool:
+        if name in CHARACTER_PLACEHOLDERS:
+            return not all(self.characters.values())
+        return not self.pools[name]
+
+    def validate(self, groups: Dict[str, Sequence[str]]) -> None:
+        """Check every template in ``groups`` with problems().
+
+        ``groups`` maps a label used in the error message (such as a category
+        name) to its templates. Raises TemplateError listing every problem found.
+        """
+        problems = []
+        for label, templates in groups.items():
+            for i, template in enumerate(templates, 1):
+                found = self.problems(template)
+                if found:
+                    problems.append(f"  {label} #{i}: {'; '.join(found)} in {template!r}")
+        if problems:
+            raise TemplateError("Invalid templates:\n" + "\n".join(problems))
+
+    def compile_all(self, groups: Dict[str, Sequence[str]]) -> Dict[str, List[CompiledTemplate]]:
+        """Validate and compile a labelled set of templates at load time.
+
+        Returns the compiled templates per label. Each one carries its placeholder
+        set and the pools its slots draw from, so rendering only ever touches the
+        fill-in lists that template needs.
+        """
+        self.validate(groups)
+        return {label: [self.compile(template) for template in templates]
+                for label, templates in groups.items()}
+
+    @property
+    def index(self) -> Dict[str, frozenset]:
+        """Map every template compiled so far to the placeholders it fills."""
+        return {source: compiled.placeholders for source, compiled in self._cache.items()}
+
+    def compile(self, template: str) -> CompiledTemplate:
+        """Parse a template once into literal parts and slot indices.
+
+        Unknown placeholders are kept as literal text, matching the behaviour of
+        the old string-replace renderer; load-time templates go through
+        compile_all(), which rejects them instead.
+        """
+        compiled = self._cache.get(template)
+        if compiled is not None:
+            return compiled
+
+        parts: List[str] = []
+        slots = []
+        pos = 0
+        for match in _PLACEHOLDER_RE.finditer(template):
+            name = match.group(1)
+            if not self.is_known(name):
+                continue
+            if match.start() > pos:
+                parts.append(template[pos:match.start()])
+            tracked = name in SHARED_PLACEHOLDERS or name in _TRACKED_FIRST
+            slots.append((len(parts), name, None if tracked else self._plain_pools.get(name)))
+            parts.append("")
+            pos = match.end()
+        if pos < len(template) or not parts:
+            parts.append(template[pos:])
+
+        # Fill first-entity slots before the second-entity slots that must differ from them
+        slots.sort(key=lambda slot: slot[1] in DISTINCT_FROM)
+
+        compiled = CompiledTemplate(template, parts, tuple(slots))
+        self._cache[template] = compiled
+        return compiled
+
+    def render(self, compiled: CompiledTemplate, rng: Any, bound: Optional[Dict[str, str]] = None) -> str:
+        """Render a compiled template using ``rng.choice`` for every draw.
+
+        ``bound`` carries the per-event choices (shared placeholders and the first
+        {location}/{faction}) so nested fill-ins stay consistent with the outer
+        template. Callers normally leave it as None.
+        """
+        if not compiled.slots:
+            return compiled.source
+
+        choice = rng.choice
+        if bound is None:
+            bound = {}
+        parts = compiled.parts[:]
+        for index, name, pool in compiled.slots:
+            if pool is not None:
+                parts[index] = choice(pool)
+            else:
+                parts[index] = self._resolve(name, rng, bound)
+        return "".join(parts)
+
+    def render_template(self, template: str, rng: Any) -> str:
+        """Compile (cached) and render a raw template string."""
+        return self.render(self.compile(template), rng)
+
+    def render_batch(self, compiled_templates: Sequence[CompiledTemplate], np_rng: "np.random.Generator") -> List[str]:
+        """Render many compiled templates with vectorized NumPy draws.
+
+        Each placeholder is drawn for the whole batch with one ``integers()``
+        call over an array-backed copy of its pool: once per occurrence for
+        {location}, {faction} and the fill-ins, once per event for the shared
+        placeholders. Characters are drawn the same way from index arrays over
+        the characters dict. {location2}, {faction2} and {character_name2}
+        draws that collide with the event's first entity are redrawn, only
+        those rows, until none do. Templates with nested fill-ins are rendered
+        one by one instead, fed by a NumPy-buffered chooser.
+        """
+        count = len(compiled_templates)
+        rendered: List[Optional[str]] = [None] * count
+        groups: Dict[CompiledTemplate, List[int]] = {}
+        scalar = []
+        for event, compiled in enumerate(compiled_templates):
+            if not compiled.slots:
+                rendered[event] = compiled.source
+            elif self._batch_plan(compiled) is None:
+                scalar.append(event)
+            else:
+                groups.setdefault(compiled, []).append(event)
+
+        # Draws per occurrence, consumed slot by slot below; events per shared placeholder
+        draws: Dict[str, int] = {}
+        shared_events: Dict[str, List[int]] = {}
+        for compiled, events in groups.items():
+            occurrence_slots, shared_slots, shared_names = self._batch_plan(compiled)
+            for _, name, _ in occurrence_slots:
+                draws[name] = draws.get(name, 0) + len(events)
+            for name in shared_names:
+                shared_events.setdefault(name, []).extend(events)
+        drawn = {}
+        for name, total in draws.items():
+            pool = self._pool_array(name)
+            drawn[name] = pool[np_rng.integers(0, len(pool), size=total)]
+        offsets = dict.fromkeys(drawn, 0)
+
+        # Per event: the first {location}/{faction} and the shared values
+        values = {name: np.full(count, None, dtype=object) for name in (*_TRACKED_FIRST, *shared_events)}
+        parts = {}
+        for compiled, events in groups.items():
+            rows = np.array(events)
+            event_parts = [compiled.parts[:] for _ in events]
+            parts[compiled] = event_parts
+            for index, name, first in self._batch_plan(compiled)[0]:
+                start = offsets[name]
+                offsets[name] = start + len(events)
+                slot_values = drawn[name][start:start + len(events)]
+                if first:
+                    values[name][rows] = slot_values
+                for event_part, value in zip(event_parts, slot_values.tolist()):
+                    event_part[index] = value
+
+        # Characters as (type, name) pairs, then the other shared placeholders,
+        # second entities last so they can differ from the first
+        character_events = sorted(set(shared_events.get("character_type", ()))
+                                  | set(shared_events.get("character_name", ())))
+        if character_events:
+            rows = np.array(character_events)
+            values.setdefault("character_type", np.full(count, None, dtype=object))
+            values.setdefault("character_name", np.full(count, None, dtype=object))
+            values["character_type"][rows], values["character_name"][rows] = self._draw_characters(
+                np_rng, len(rows))
+        for name in sorted(shared_events, key=lambda name: name in DISTINCT_FROM):
+            if name in ("character_type", "character_name"):
+                continue
+            rows = np.array(shared_events[name])
+            avoid = values[DISTINCT_FROM[name]][rows] if name in DISTINCT_FROM else None
+            if name == "character_name2":
+                values[name][rows] = self._draw_characters(np_rng, len(rows), avoid)[1]
+                continue
+            pool = self._pool_array(name)
+            name_values = pool[np_rng.integers(0, len(pool), size=len(rows))]
+            if avoid is not None and len(set(self.pools[name])) > 1:
+                self._redraw_collisions(np_rng, pool, name_values, avoid)
+            values[name][rows] = name_values
+
+        for compiled, events in groups.items():
+            rows = np.array(events)
+            event_parts = parts[compiled]
+            for index, name in self._batch_plan(compiled)[1]:
+                for event_part, value in zip(event_parts, values[name][rows].tolist()):
+                    event_part[index] = value
+            for event, event_part in zip(events, event_parts):
+                rendered[event] = "".join(event_part)
+
+        if scalar:
+            chooser = NumpyChooser(np_rng)
+            for event in scalar:
+                rendered[event] = self.render(compiled_templates[event], chooser)
+        return rendered
+
+    def _batch_plan(self, compiled: CompiledTemplate) -> Optional[tuple]:
+        """How render_batch() fills ``compiled``, or None if it has nested fill-ins.
+
+        A tuple of the per-occurrence slots as (index, name, first {location}
+        or {faction}), the shared slots as (index, name) and the shared names.
+        """
+        if compiled in self._batch_plans:
+            return self._batch_plans[compiled]
+        plan = None
+        if all(name in CHARACTER_PLACEHOLDERS or name in self._plain_pools for _, name, _ in compiled.slots):
+            occurrence_slots, shared_slots, seen = [], [], set()
+            for index, name, _ in compiled.slots:
+                if name in SHARED_PLACEHOLDERS:
+                    shared_slots.append((index, name))
+                else:
+                    occurrence_slots.append((index, name, name in _TRACKED_FIRST and name not in seen))
+                seen.add(name)
+            plan = (tuple(occurrence_slots), tuple(shared_slots),
+                    tuple(dict.fromkeys(name for _, name in shared_slots)))
+        self._batch_plans[compiled] = plan
+        return plan
+
+    def _pool_array(self, name: str) -> "np.ndarray":
+        array = self._pool_arrays.get(name)
+        if array is None:
+            array = self._pool_arrays[name] = np.array(self._plain_pools[name], dtype=object)
+        return array
+
+    @staticmethod
+    def _redraw_collisions(np_rng: "np.random.Generator", pool: "np.ndarray", drawn: "np.ndarray",
+                           avoid: "np.ndarray") -> None:
+        # In place: redraw the rows of ``drawn`` equal to their ``avoid`` value (None: no constraint)
+        colliding = np.flatnonzero(drawn == avoid)
+        while colliding.size:
+            drawn[colliding] = pool[np_rng.integers(0, len(pool), size=colliding.size)]
+            colliding = colliding[drawn[colliding] == avoid[colliding]]
+
+    def _draw_characters(self, np_rng: "np.random.Generator", count: int,
+                         avoid: Optional["np.ndarray"] = None) -> Tuple["np.ndarray", "np.ndarray"]:
+        """Draw ``count`` (type, name) pairs as _draw_character() does: a type,
+        then a name of that type, redrawing both where the name is avoid[i]."""
+        if self._character_arrays is None:
+            sizes = np.array([len(self.characters[t]) for t in self._character_types], dtype=np.int64)
+            self._character_arrays = (
+                np.array(self._character_types, dtype=object), sizes, np.cumsum(sizes) - sizes,
+                np.array([name for t in self._character_types for name in self.characters[t]], dtype=object),
+            )
+        types, sizes, offsets, names = self._character_arrays
+
+        def draw(rows: int) -> Tuple["np.ndarray", "np.ndarray"]:
+            type_idx = np_rng.integers(0, len(types), size=rows)
+            name_idx = offsets[type_idx] + (np_rng.random(rows) * sizes[type_idx]).astype(np.int64)
+            return type_idx, names[name_idx]
+
+        type_idx, drawn = draw(count)
+        if avoid is not None and self._character_count > 1:
+            colliding = np.flatnonzero(drawn == avoid)
+            while colliding.size:
+                type_idx[colliding], drawn[colliding] = draw(colliding.size)
+                colliding = colliding[drawn[colliding] == avoid[colliding]]
+        return types[type_idx], drawn
+
+    def _draw(self, name: str, rng: Any, bound: Dict[str, str]) -> str:
+        value = rng.choice(self._values[name])
+        if type(value) is not str:
+            value = self.render(value, rng, bound)
+        return value
+
+    def _resolve(self, name: str, rng: Any, bound: Dict[str, str]) -> str:
+        """Fill a slot that needs more than a bare choice from its pool."""
+        if name in SHARED_PLACEHOLDERS:
+            value = bound.get(name)
+            if value is not None:
+                return value
+
+        if name in CHARACTER_PLACEHOLDERS:
+            if name == "character_name2":
+                value = self._draw_character(rng, avoid=bound.get("character_name"))[1]
+            else:
+                char_type, char_name = self._draw_character(rng)
+                bound["character_type"] = char_type
+                bound["character_name"] = char_name
+                return bound[name]
+        elif name in DISTINCT_FROM:
+            value = self._draw(name, rng, bound)
+            avoid = bound.get(DISTINCT_FROM[name])
+            if avoid is not None and len(set(self.pools[name])) > 1:
+                while value == avoid:
+                    value = self._draw(name, rng, bound)
+        else:
+            value = self._draw(name, rng, bound)
+
+        if name in SHARED_PLACEHOLDERS or name in _TRACKED_FIRST:
+            # Remember the shared value, or the first {location}/{faction} so the
+            # matching second-entity slot can differ from it.
+            bound.setdefault(name, value)
+        return value
+
+    def _draw_character(self, rng: Any, avoid: Optional[str] = None) -> Tuple[str, str]:
+        char_type = rng.choice(self._character_types)
+        char_name = rng.choice(self.characters[char_type])
+        if avoid is not None and self._character_count > 1:
+            while char_name == avoid:
+                char_type = rng.choice(self._character_types)
+                char_name = rng.choice(self.characters[char_type])
+        return char_type, char_name
@@ -0,0 +1,45 @@
+"""
+Shared fixtures for the test suite.
+
+Run from the repository root:
+    python -m pytest -q
+
+Every generator is created in a temporary directory, so tests never touch the
+worlds, databases or settings next to Fantasy.py.
+"""
+
+import contextlib
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import Fantasy  # noqa: E402
+
+
+@pytest.fixture
+def world_dir(tmp_path, monkeypatch):
+    """A temporary directory that stands in for the script directory."""
+    monkeypatch.setattr(Fantasy, "_SCRIPT_DIR", tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def make_generator(world_dir):
+    """Create generators in ``world_dir``; their connections are closed afterwards."""
+    generators = []
+
+    def make(world_name: str = "Test World", **kwargs) -> Fantasy.FantasyWorldEventGenerator:
+        kwargs.setdefault("seed", 7)
+        with contextlib.redirect_stdout(io.StringIO()):
+            generator = Fantasy.FantasyWorldEventGenerator(world_name, **kwargs)
+        generator.headless = True
+        generators.append(generator)
+        return generator
+
+    yield make
+    for generator in generators:
+        generator.db.close()
@@ -0,0 +1,118 @@
+"""Shared connections: every reader is closed, and failed units of work are never dropped silently."""
+
+import contextlib
+import io
+import sqlite3
+import threading
+
+import pytest
+
+from db_connections import ConnectionManager, WriteError, connections
+
+
+def _insert(manager, *ids):
+    with manager.unit_of_work() as unit:
+        unit.add_many("INSERT INTO items (id) VALUES (?)", [(item_id,) for item_id in ids])
+
+
+def test_failed_unit_is_raised_from_the_next_flush(tmp_path):
+    manager = ConnectionManager(tmp_path / "items.db")
+    with manager.write() as conn:
+        conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY)")
+    writer = manager.start_background_writer()
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            _insert(manager, 1)
+            _insert(manager, 1, 2)  # conflicts with the first
+            _insert(manager, 3)
+            with pytest.raises(WriteError) as raised:
+                manager.flush()
+        assert len(raised.value.errors) == 1
+        assert isinstance(raised.value.errors[0], sqlite3.IntegrityError)
+        assert "a unit of work was lost" in output.getvalue()
+        assert writer.failed == 1
+        # Reported once; the other units were committed
+        manager.flush()
+        assert [row[0] for row in manager.read().execute("SELECT id FROM items ORDER BY id")] == [1, 3]
+    finally:
+        with contextlib.redirect_stdout(io.StringIO()):
+            manager.close()
+
+
+def test_save_event_reports_an_earlier_event_that_was_lost(make_generator):
+    generator = make_generator()
+    # Takes the ID the next event will be saved under
+    conn = sqlite3.connect(generator.db_path)
+    conn.execute("INSERT INTO events (id, category) VALUES (?, 'taken')", (generator.event_count + 1,))
+    conn.commit()
+    conn.close()
+
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        for _ in range(2):
+            event, category = generator.generate_event()
+            event_id = generator.save_event(event, category, {})
+            generator.db.read()  # waits for the writer, which does not raise
+    assert event_id == generator.event_count == 2
+    assert "Error writing earlier events to the database" in output.getvalue()
+    generator.db.flush()
+    rows = generator.db.read().execute("SELECT id, category FROM events ORDER BY id").fetchall()
+    assert rows[0] == (1, "taken") and rows[1][0] == 2
+
+
+def _reader_in_thread(manager):
+    """Open a read connection on a thread that stays alive until released."""
+    opened, release, readers = threading.Event(), threading.Event(), []
+
+    def run():
+        readers.append(manager.read())
+        opened.set()
+        release.wait()
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    opened.wait()
+    return readers[0], release, thread
+
+
+def test_close_closes_the_readers_of_every_thread(tmp_path):
+    manager = ConnectionManager(tmp_path / "items.db")
+    with manager.write() as conn:
+        conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY)")
+    own = manager.read()
+    other, release, thread = _reader_in_thread(manager)
+    try:
+        manager.close()
+        for reader in (own, other):
+            with pytest.raises(sqlite3.ProgrammingError, match="closed database"):
+                reader.execute("SELECT 1")
+        # The next read opens a new connection
+        assert manager.read().execute("SELECT COUNT(*) FROM items").fetchone() == (0,)
+    finally:
+        release.set()
+        thread.join()
+        manager.close()
+
+
+def test_recreated_database_gets_new_connections_and_the_old_ones_are_closed(tmp_path):
+    path = tmp_path / "items.db"
+    old = connections(path)
+    with old.write() as conn:
+        conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY)")
+    reader = old.read()
+    assert connections(path) is old
+
+    for leftover in tmp_path.iterdir():
+        leftover.unlink()
+    new = connections(path)
+    try:
+        assert new is not old
+        with pytest.raises(sqlite3.ProgrammingError, match="closed database"):
+            reader.execute("SELECT 1")
+        assert old._writer is None
+        with new.write() as conn:
+            conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY)")
+        assert new.read().execute("SELECT COUNT(*) FROM items").fetchone() == (0,)
+    finally:
+        new.close()
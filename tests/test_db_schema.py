@@ -0,0 +1,102 @@
+"""Schema migrations and the queries the indexes are for."""
+
+import json
+import sqlite3
+
+import pytest
+
+from db_schema import DATABASE_VERSION, migrate_database
+
+# A world database as the generator created it before schema versions
+BASELINE_TABLES = [
+    '''CREATE TABLE events (
+        id INTEGER PRIMARY KEY, timestamp TEXT, category TEXT, event_text TEXT,
+        location TEXT, characters TEXT, factions TEXT, image_path TEXT)''',
+    "CREATE TABLE world_state (id INTEGER PRIMARY KEY, timestamp TEXT, state_json TEXT)",
+    '''CREATE TABLE event_details (
+        id INTEGER PRIMARY KEY, event_id INTEGER, hidden_details TEXT, connections TEXT,
+        plot_hooks TEXT, consequences TEXT, FOREIGN KEY (event_id) REFERENCES events (id))''',
+    '''CREATE TABLE characters (
+        id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL, type TEXT, last_location TEXT,
+        last_seen TEXT, event_count INTEGER DEFAULT 0)''',
+    '''CREATE TABLE locations (
+        id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL, last_event_id INTEGER, last_seen TEXT,
+        event_count INTEGER DEFAULT 0, characters_present TEXT)''',
+]
+
+CATEGORIES = ["political", "magical", "economic"]
+
+
+def _baseline_database() -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    for table in BASELINE_TABLES:
+        conn.execute(table)
+    conn.executemany("INSERT INTO events (id, category, event_text, characters, factions) VALUES (?, ?, ?, ?, ?)", [
+        (event_id, CATEGORIES[event_id % 3], f"Event #{event_id} in the realm",
+         json.dumps([{"name": "Xul", "type": "necromancer"}] + ([{"name": "Aldric", "type": "cleric"}] * (event_id % 2))),
+         json.dumps(["Crimson Brotherhood", "Order of the Silver Dragon"][:event_id % 3]))
+        for event_id in range(1, 31)
+    ])
+    conn.execute("INSERT INTO event_details (event_id, hidden_details) VALUES (7, 'a dragon sleeps below')")
+    conn.commit()
+    return conn
+
+
+def _names(conn, sql):
+    return {row[0] for row in conn.execute(sql)}
+
+
+def test_baseline_database_migrates_to_the_current_version():
+    conn = _baseline_database()
+    assert migrate_database(conn.cursor()) == list(range(1, DATABASE_VERSION + 1))
+    conn.commit()
+
+    versions = [row[0] for row in conn.execute("SELECT version FROM schema_version ORDER BY version")]
+    assert versions == list(range(1, DATABASE_VERSION + 1))
+    assert {"headline", "description"} <= _names(conn, "SELECT name FROM pragma_table_info('events')")
+    assert {"codec", "schema_version", "journal_id"} <= _names(conn, "SELECT name FROM pragma_table_info('world_state')")
+    assert {"world_journal", "world_state_sections", "history_archive",
+            "event_characters", "event_factions"} <= _names(conn, "SELECT name FROM sqlite_master WHERE type = 'table'")
+    assert {"idx_event_details_event", "idx_characters_event_count", "idx_locations_event_count",
+            "idx_events_category", "idx_event_characters_event",
+            "idx_event_factions_event"} <= _names(conn, "SELECT name FROM sqlite_master WHERE type = 'index'")
+
+    # Already current: nothing to apply
+    assert migrate_database(conn.cursor()) == []
+    conn.close()
+
+
+def test_newer_database_is_refused():
+    conn = _baseline_database()
+    migrate_database(conn.cursor())
+    conn.execute("INSERT INTO schema_version (version, description) VALUES (?, 'from the future')",
+                 (DATABASE_VERSION + 1,))
+    with pytest.raises(ValueError):
+        migrate_database(conn.cursor())
+    conn.close()
+
+
+# (query, parameters, index the plan must use)
+INDEXED_QUERIES = [
+    ('''SELECT e.id, d.hidden_details FROM events e LEFT JOIN event_details d ON d.event_id = e.id
+        ORDER BY e.id DESC LIMIT 10''', (), "idx_event_details_event"),
+    ("SELECT hidden_details, connections, plot_hooks, consequences FROM event_details WHERE event_id = ?",
+     (7,), "idx_event_details_event"),
+    ("SELECT name, type, last_location, last_seen, event_count FROM characters ORDER BY event_count DESC",
+     (), "idx_characters_event_count"),
+    ("SELECT name, last_event_id, last_seen, event_count FROM locations ORDER BY event_count DESC",
+     (), "idx_locations_event_count"),
+    ("SELECT category, COUNT(*) FROM events GROUP BY category ORDER BY COUNT(*) DESC", (), "idx_events_category"),
+    ("SELECT id, headline FROM events WHERE category = ? ORDER BY id DESC LIMIT 20",
+     ("magical",), "idx_events_category"),
+]
+
+
+@pytest.mark.parametrize("query, params, index", INDEXED_QUERIES)
+def test_query_uses_its_index(query, params, index):
+    conn = _baseline_database()
+    migrate_database(conn.cursor())
+    plan = " / ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params))
+    conn.close()
+    assert index in plan
+
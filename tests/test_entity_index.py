@@ -0,0 +1,80 @@
+"""The Aho-Corasick entity index finds what one word-bounded regex per name finds."""
+
+import random
+import re
+
+import pytest
+
+from entity_index import EntityIndex
+from fantasy_events_data import characters, factions, locations
+
+NAMES = ["Iron", "Iron Guard", "Guard Tower", "Vex", "Zoë", "Ærendil", "Emerald Enclave", "Iron_Guard"]
+
+
+def _index(names) -> EntityIndex:
+    index = EntityIndex()
+    for name in names:
+        index.add(name, "faction")
+    return index
+
+
+def regex_scan(names, text):
+    """One regex search per name, then leftmost-longest over the overlaps."""
+    spans = []
+    for name in names:
+        pattern = re.compile(r"(?<!\w)" + re.escape(name) + r"(?!\w)")
+        spans.extend((match.start(), match.end()) for match in pattern.finditer(text))
+    spans.sort(key=lambda span: (span[0], -span[1]))
+    found, last_end = [], -1
+    for start, end in spans:
+        if start >= last_end:
+            found.append((start, text[start:end]))
+            last_end = end
+    return found
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Vex was vexing the Vexillarii.", ["Vex"]),
+    ("(Vex) and Vex's cousin", ["Vex", "Vex"]),
+    ("The Iron Guard Tower fell", ["Iron Guard"]),
+    ("Iron, then Guard Tower", ["Iron", "Guard Tower"]),
+    ("the Iron_Guard marched", ["Iron_Guard"]),
+    ("iron guard and IRON", []),
+    ("Zoë met Zoëtrope and Ærendil.", ["Zoë", "Ærendil"]),
+    ("", []),
+])
+def test_find_matches_whole_names_leftmost_longest(text, expected):
+    found = _index(NAMES).find(text)
+    assert [name for _, name in found] == expected
+    assert found == regex_scan(NAMES, text)
+
+
+def test_find_agrees_with_the_regex_scan_on_generated_events(make_generator):
+    generator = make_generator()
+    index = EntityIndex.from_world(locations, factions, characters)
+    names = {*locations, *factions, *(name for names in characters.values() for name in names)}
+    texts = [generator.generate_event()[0] for _ in range(300)]
+    # Names glued to words or each other must not match
+    rng = random.Random(3)
+    texts += [f"{rng.choice(sorted(names))}{rng.choice(['s', '', ' ', '-', 'é'])}{rng.choice(sorted(names))}"
+              for _ in range(300)]
+    for text in texts:
+        assert index.find(text) == regex_scan(names, text)
+
+
+def test_extract_groups_every_label_once():
+    index = EntityIndex.from_world(["Emerald Enclave", "Ashford"], ["Emerald Enclave"],
+                                   {"wizard": ["Seraphina"], "cleric": ["Seraphina"]})
+    found = index.extract("Seraphina left Ashford for the Emerald Enclave; Seraphina never returned.")
+    assert found == {
+        "location": ["Ashford", "Emerald Enclave"],
+        "faction": ["Emerald Enclave"],
+        "character": [("Seraphina", "wizard"), ("Seraphina", "cleric")],
+    }
+
+
+def test_names_added_after_a_search_are_found():
+    index = _index(["Iron"])
+    assert index.find("Iron Guard") == [(0, "Iron")]
+    index.add("Iron Guard", "faction")
+    assert index.find("Iron Guard") == [(0, "Iron Guard")]
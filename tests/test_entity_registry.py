@@ -0,0 +1,51 @@
+"""Interning a name-keyed world state, old "<faction>_<faction>" relation keys included."""
+
+import pytest
+
+from entity_registry import EntityRegistry, split_relation_key
+
+FACTIONS = ["Iron_Guard", "Crimson Brotherhood", "Order of the Silver Dragon"]
+
+
+@pytest.mark.parametrize("key, expected", [
+    ("Iron_Guard_Crimson Brotherhood", ("Iron_Guard", "Crimson Brotherhood")),
+    ("Crimson Brotherhood_Iron_Guard", ("Crimson Brotherhood", "Iron_Guard")),
+    ("Order of the Silver Dragon_Crimson Brotherhood", ("Order of the Silver Dragon", "Crimson Brotherhood")),
+    # A faction no longer in the world: one half is still known
+    ("Iron_Guard_Old_Kings", ("Iron_Guard", "Old_Kings")),
+    # Neither half known, but only one place to split
+    ("Elves_Dwarves", ("Elves", "Dwarves")),
+])
+def test_relation_keys_split_at_known_faction_names(key, expected):
+    assert split_relation_key(key, FACTIONS) == expected
+
+
+@pytest.mark.parametrize("key, factions", [
+    ("A_B_C", ["A", "A_B", "B_C", "C"]),
+    ("Old_Kings_New_Kings", []),
+])
+def test_ambiguous_relation_keys_are_refused(key, factions):
+    with pytest.raises(ValueError, match="Cannot tell which factions"):
+        split_relation_key(key, factions)
+
+
+def test_intern_state_converts_names_to_ids():
+    state = {
+        "character_status": {"Xul": {"type": "necromancer", "location": "Ashford",
+                                     "events": [{"event_id": 3, "summary": "Xul rose"}]}},
+        "location_status": {"Ashford": {"characters_present": ["Xul"], "events": []}},
+        "relations": {"Iron_Guard_Crimson Brotherhood": {"status": "hostile", "events": ["raid"]}},
+        "active_plots": [{"characters": ["Xul"], "locations": ["Ashford"]}],
+    }
+    entities = EntityRegistry()
+    relations = entities.intern_state(state, FACTIONS)
+
+    xul, ashford = entities.get("Xul"), entities.get("Ashford")
+    assert state["character_status"] == {xul: {"type": "necromancer", "location": ashford,
+                                               "events": [{"event_id": 3}]}}
+    assert state["location_status"] == {ashford: {"characters_present": [xul], "events": []}}
+    guard, brotherhood = entities.get("Iron_Guard"), entities.get("Crimson Brotherhood")
+    assert relations == [(guard, brotherhood, {"status": "hostile", "events": ["raid"]})]
+    assert "relations" not in state
+    assert state["active_plots"] == [{"characters": [xul], "locations": [ashford]}]
+    assert "Iron" not in entities and "Guard_Crimson Brotherhood" not in entities
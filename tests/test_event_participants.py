@@ -0,0 +1,110 @@
+"""The event_characters and event_factions join tables and the timelines read from them."""
+
+import json
+import sqlite3
+
+from db_schema import migrate_database
+from event_participants import character_timeline, faction_timeline, participant_rows
+
+FACTIONS = ["Crimson Brotherhood", "Order of the Silver Dragon"]
+
+
+def _database() -> sqlite3.Connection:
+    """A database from before the join tables, migrated to the current version."""
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE events (id INTEGER PRIMARY KEY, timestamp TEXT, category TEXT, event_text TEXT, "
+                 "location TEXT, characters TEXT, factions TEXT, image_path TEXT)")
+    conn.executemany("INSERT INTO events (id, category, event_text, characters, factions) VALUES (?, ?, ?, ?, ?)", [
+        (event_id, "political", f"Event #{event_id} in the realm",
+         json.dumps([{"name": "Xul", "type": "necromancer"}] + ([{"name": "Aldric", "type": "cleric"}] * (event_id % 2))),
+         json.dumps(FACTIONS[:event_id % 3]))
+        for event_id in range(1, 31)
+    ])
+    migrate_database(conn.cursor())
+    return conn
+
+
+class _PlanCursor:
+    """Runs EXPLAIN QUERY PLAN for each statement before executing it."""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.plans = []
+
+    def execute(self, sql, params=()):
+        self.plans.append(" / ".join(row[3] for row in self.cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)))
+        return self.cursor.execute(sql, params)
+
+    def fetchall(self):
+        return self.cursor.fetchall()
+
+
+def test_migration_backfills_the_join_tables_once():
+    conn = _database()
+    count = "SELECT COUNT(*) FROM event_characters WHERE character = ?"
+    assert conn.execute(count, ("Xul",)).fetchone()[0] == 30
+    assert conn.execute(count, ("Aldric",)).fetchone()[0] == 15
+    assert conn.execute("SELECT COUNT(*) FROM event_factions WHERE faction = ?", (FACTIONS[1],)).fetchone()[0] == 10
+    assert conn.execute("SELECT position FROM event_characters WHERE character = 'Aldric' AND event_id = 3").fetchone() == (1,)
+
+    conn.execute("DELETE FROM schema_version WHERE version = 4")
+    assert migrate_database(conn.cursor()) == [4]
+    assert conn.execute("SELECT COUNT(*) FROM event_characters").fetchone()[0] == 45
+    conn.close()
+
+
+def test_participant_rows_take_names_from_any_saved_form():
+    characters, factions = participant_rows(
+        9, json.dumps([{"name": "Xul", "type": "necromancer"}, {"name": "  "}, {"type": "cleric"}, " Aldric "]),
+        FACTIONS)
+    assert characters == [("Xul", 9, 0), ("Aldric", 9, 1)]
+    assert factions == [(FACTIONS[0], 9, 0), (FACTIONS[1], 9, 1)]
+    assert participant_rows(9, "not json", None) == ([], [])
+
+
+def test_timelines_page_newest_first():
+    conn = _database()
+    cursor = conn.cursor()
+    assert [event["id"] for event in character_timeline(cursor, "Aldric", 3, before=25)] == [23, 21, 19]
+    assert character_timeline(cursor, "Nobody") == []
+    assert [event["id"] for event in faction_timeline(cursor, FACTIONS[1], 4)] == [29, 26, 23, 20]
+    conn.execute("INSERT INTO event_factions (faction, event_id, position) VALUES (?, 30, 2), (?, 30, 3)", FACTIONS)
+    # Every event both factions took part in, or only those naming them as the pair
+    assert [event["id"] for event in faction_timeline(cursor, FACTIONS[0], 2, other=FACTIONS[1])] == [30, 29]
+    assert [event["id"] for event in faction_timeline(cursor, FACTIONS[0], 2, other=FACTIONS[1],
+                                                      relation_only=True)] == [29, 26]
+    conn.close()
+
+
+def test_timelines_are_primary_key_ranges():
+    conn = _database()
+    cursor = _PlanCursor(conn.cursor())
+
+    assert [event["id"] for event in character_timeline(cursor, "Aldric", 3)] == [29, 27, 25]
+    assert [event["id"] for event in faction_timeline(cursor, FACTIONS[0], 3, other=FACTIONS[1])] == [29, 26, 23]
+    character_plan, faction_plan = cursor.plans
+    assert "SEARCH p USING PRIMARY KEY (character=? AND event_id<?)" in character_plan
+    assert "SEARCH p USING PRIMARY KEY (faction=? AND event_id<?)" in faction_plan
+    assert "SCAN" not in character_plan + faction_plan
+
+    plan = " / ".join(row[3] for row in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT character FROM event_characters WHERE event_id = ?", (7,)))
+    conn.close()
+    assert "idx_event_characters_event" in plan
+
+
+def test_saved_events_write_their_participants(make_generator):
+    generator = make_generator()
+    for _ in range(20):
+        event, category = generator.generate_event()
+        generator.save_event(event, category, generator.extract_event_data(event))
+    generator.db.flush()
+
+    conn = generator.db.read()
+    for event_id, characters, factions in conn.execute("SELECT id, characters, factions FROM events").fetchall():
+        expected_characters, expected_factions = participant_rows(event_id, characters, factions)
+        assert conn.execute("SELECT character, event_id, position FROM event_characters WHERE event_id = ? "
+                            "ORDER BY position", (event_id,)).fetchall() == expected_characters
+        assert conn.execute("SELECT faction, event_id, position FROM event_factions WHERE event_id = ? "
+                            "ORDER BY position", (event_id,)).fetchall() == expected_factions
+    assert conn.execute("SELECT COUNT(*) FROM event_characters").fetchone()[0] > 0
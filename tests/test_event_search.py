@@ -0,0 +1,73 @@
+"""Ranked full-text search over the event history."""
+
+import sqlite3
+
+import pytest
+
+from db_schema import FTS5_SUPPORT, migrate_database
+from event_search import fts_query, search_events
+
+pytestmark = pytest.mark.skipif(not FTS5_SUPPORT, reason="SQLite was built without FTS5")
+
+
+def _database(events=()) -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    migrate_database(conn.cursor())
+    conn.executemany("INSERT INTO events (id, category, headline, event_text) VALUES (?, 'magical', ?, ?)", events)
+    return conn
+
+
+def _ids(conn, text, **kwargs):
+    return [event["id"] for event in search_events(conn.cursor(), text, **kwargs)]
+
+
+def test_events_from_before_the_index_are_found():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE events (id INTEGER PRIMARY KEY, timestamp TEXT, category TEXT, event_text TEXT, "
+                 "location TEXT, characters TEXT, factions TEXT, image_path TEXT)")
+    conn.execute("CREATE TABLE event_details (id INTEGER PRIMARY KEY, event_id INTEGER, hidden_details TEXT, "
+                 "connections TEXT, plot_hooks TEXT, consequences TEXT)")
+    conn.executemany("INSERT INTO events (id, category, event_text) VALUES (?, 'political', ?)",
+                     [(event_id, f"Event #{event_id} in the realm") for event_id in range(1, 31)])
+    conn.execute("INSERT INTO event_details (event_id, hidden_details) VALUES (7, 'a dragon sleeps below')")
+    migrate_database(conn.cursor())
+
+    assert _ids(conn, "dragon") == [7]
+    # Triggers index what is written after the migration
+    conn.execute("INSERT INTO events (id, category, event_text) VALUES (31, 'magical', 'A comet falls')")
+    assert _ids(conn, "comet") == [31]
+    conn.execute("INSERT INTO event_details (event_id, plot_hooks) VALUES (31, 'Who saw the comet land?')")
+    assert "Who saw the comet [land]?" in search_events(conn.cursor(), "land")[0]["snippet"]
+    conn.close()
+
+
+def test_every_match_is_ranked_however_old():
+    # The best match is the oldest of twelve thousand
+    conn = _database([(1, "Dragon over Whiterun", "A dragon circles the city.")] + [
+        (event_id, f"Market day {event_id}", f"Traders talk of a dragon seen far away, years ago, event {event_id}.")
+        for event_id in range(2, 12_002)
+    ])
+    assert _ids(conn, "dragon", limit=3) == [1, 12_001, 12_000]
+    conn.close()
+
+
+def test_pages_follow_the_ranking():
+    conn = _database([(event_id, "Storm" if event_id % 5 == 0 else "Rain", f"A storm rolls in, event {event_id}.")
+                      for event_id in range(1, 51)])
+    ranked = _ids(conn, "storm", limit=50)
+    # Headline matches first, each group newest first
+    assert ranked == list(range(50, 0, -5)) + [event_id for event_id in range(50, 0, -1) if event_id % 5]
+    pages = [_ids(conn, "storm", limit=7, offset=offset) for offset in range(0, 50, 7)]
+    assert [event_id for page in pages for event_id in page] == ranked
+    assert _ids(conn, "storm", offset=50) == []
+    conn.close()
+
+
+def test_search_text_is_reduced_to_its_words():
+    assert fts_query('dragon" OR (storm*') == '"dragon" "OR" "storm"*'
+    assert fts_query("?!") == ""
+    conn = _database([(1, "Storms", "The dragon flies into storms or rain."), (2, "Rain", "A dragon sleeps.")])
+    # Operators are words like any other
+    assert _ids(conn, 'dragon" OR (storm*') == [1]
+    assert _ids(conn, "battle") == [] and _ids(conn, "?!") == []
+    conn.close()
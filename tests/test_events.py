@@ -0,0 +1,123 @@
+"""Saving events: IDs, rows and the world state stay in step."""
+
+import contextlib
+import io
+import json
+import os
+import sqlite3
+
+import pytest
+
+
+def _process(generator, event_text, category):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return generator.process_and_enhance_event(event_text, category)
+
+
+def test_ai_event_after_template_event_gets_its_own_row(make_generator, monkeypatch):
+    monkeypatch.setattr(os, "system", lambda command: 0)  # display_event clears the screen
+    generator = make_generator()
+
+    event, category = generator.generate_event()
+    assert "Event #1 " in event
+    _process(generator, event, category)
+    # Full-AI events skip generate_event() and come without the numbered header
+    _process(generator, "A dragon lands in the market square of Whiterun.", "legendary")
+    generator.db.flush()
+
+    assert generator.event_count == 2
+    conn = sqlite3.connect(generator.db_path)
+    rows = conn.execute("SELECT id, category FROM events ORDER BY id").fetchall()
+    journal = conn.execute("SELECT event_id FROM world_journal ORDER BY id").fetchall()
+    conn.close()
+    assert rows == [(1, category), (2, "legendary")]
+    assert [event_id for (event_id,) in journal][-2:] == [1, 2]
+    assert [entry["event_id"] for entry in generator.world_state["event_history"]] == [1, 2]
+
+
+def test_batched_events_are_numbered_with_the_ids_they_are_saved_under(make_generator):
+    generator = make_generator()
+    batch = generator.generate_events(5)
+    assert generator.event_count == 0
+    for number, (event, category, event_data) in enumerate(batch, 1):
+        assert f"Event #{number} " in event
+        assert generator.save_event(event, category, event_data) == number
+    generator.db.flush()
+
+    conn = sqlite3.connect(generator.db_path)
+    assert conn.execute("SELECT COUNT(*), MAX(id) FROM events").fetchone() == (5, 5)
+    conn.close()
+
+
+def _comparable(state):
+    return json.loads(json.dumps(state, default=list))
+
+
+def _save_events(generator, count):
+    for _ in range(count):
+        event, category = generator.generate_event()
+        generator.save_event(event, category, generator.extract_event_data(event))
+
+
+def _curse_category(generator):
+    """Make every insert of a 'cursed' event fail when it is committed."""
+    with generator.db.write() as conn:
+        conn.execute('''CREATE TRIGGER curse BEFORE INSERT ON events WHEN NEW.category = 'cursed'
+                        BEGIN SELECT RAISE(ABORT, 'cursed'); END''')
+
+
+def test_failed_event_leaves_no_trace_in_the_world(make_generator):
+    generator = make_generator()
+    generator.db.stop_background_writer()  # commit each event as it is saved
+    _save_events(generator, 10)
+    before = _comparable(generator.named_state())
+    _curse_category(generator)
+
+    event, _ = generator.generate_event()
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        assert generator.save_event(event, "cursed", generator.extract_event_data(event)) is None
+    assert "Error saving event 11: cursed" in output.getvalue()
+    assert generator.event_count == 10 and generator.snapshot.event_count == 10
+    assert _comparable(generator.named_state()) == before
+
+    # The ID was not used up, and the world saved after it is the live one
+    event, category = generator.generate_event()
+    assert generator.save_event(event, category, generator.extract_event_data(event)) == 11
+    _save_events(generator, 4)
+    live = _comparable(generator.named_state())
+    assert [row[0] for row in generator.db.read().execute("SELECT id FROM events ORDER BY id")] == list(range(1, 16))
+    generator.db.close()
+    assert _comparable(make_generator().named_state()) == live
+
+
+def test_event_row_saved_on_its_own_gets_its_id_once_committed(make_generator):
+    generator = make_generator()
+    generator.db.stop_background_writer()
+    _curse_category(generator)
+    assert generator.save_event_to_db("A curse falls", "cursed", {}) is None
+    assert generator.event_count == 0
+    assert generator.save_event_to_db("Rain falls", "weather", {}) == 1
+    assert generator.event_count == 1
+
+
+def test_event_that_raises_half_way_is_rolled_back(make_generator, monkeypatch):
+    generator = make_generator()
+    _save_events(generator, 10)
+    before = _comparable(generator.named_state())
+
+    def apply_then_fail(event_text, category, event_data):
+        generator._add_state(["events_since_season_change"], 1)
+        generator._set_state(["time", "weather"], "ashfall")
+        raise RuntimeError("bad event")
+
+    monkeypatch.setattr(generator, "apply_event_to_world", apply_then_fail)
+    event, category = generator.generate_event()
+    with pytest.raises(RuntimeError):
+        with generator.event_transaction():
+            generator.save_event_to_db(event, category, {})
+            generator.apply_event_to_world(event, category, {})
+    assert generator.event_count == 10
+    assert _comparable(generator.named_state()) == before
+    assert generator.db.read().execute("SELECT MAX(id) FROM events").fetchone() == (10,)
+    assert len(generator.journal) == 0
@@ -0,0 +1,50 @@
+"""Converting the old "A_B"-keyed relations dict to the relation matrix."""
+
+from entity_registry import EntityRegistry
+from faction_relations import FactionRelations
+from world_schema import upgrade_state
+
+
+def test_from_legacy_merges_both_orderings_of_a_pair():
+    relations = FactionRelations.from_legacy([
+        (0, 1, {"status": "hostile", "events": [{"event": "raid"}]}),
+        (1, 0, {"status": "hostile", "events": [{"event": "ambush"}]}),
+        (0, 2, {"status": "neutral", "events": []}),
+        (1, 2, {"status": "friendly", "events": []}),
+    ])
+    assert relations.status(1, 0) == "hostile"
+    assert [entry["event"] for entry in relations.history(0, 1)] == ["raid", "ambush"]
+    assert relations.status(0, 2) == "neutral"
+    assert relations.notable_pairs() == [(0, 1, "hostile"), (1, 2, "friendly")]
+
+
+def test_unversioned_state_with_an_underscored_faction_upgrades():
+    state = {
+        "character_status": {},
+        "location_status": {},
+        "active_plots": [],
+        "relations": {
+            "Iron_Guard_Crimson Brotherhood": {"status": "hostile", "events": [{"event": "raid"}]},
+            "Crimson Brotherhood_Iron_Guard": {"status": "hostile", "events": [{"event": "ambush"}]},
+            "Iron_Guard_Order of the Silver Dragon": {"status": "friendly", "events": []},
+            "Crimson Brotherhood_Order of the Silver Dragon": {"status": "neutral", "events": []},
+        },
+    }
+    upgrade_state(state, None)
+
+    entities = EntityRegistry(state["entities"])
+    assert "Iron" not in entities
+    relations = FactionRelations.from_dict(state["relations"])
+    guard, brotherhood, order = (entities.get(name) for name in
+                                 ("Iron_Guard", "Crimson Brotherhood", "Order of the Silver Dragon"))
+    assert relations.status(guard, brotherhood) == "hostile"
+    assert [entry["event"] for entry in relations.history(brotherhood, guard)] == ["raid", "ambush"]
+    assert relations.status(order, guard) == "friendly"
+    assert relations.status(brotherhood, order) == "neutral"
+
+
+def test_interned_state_with_id_keyed_relations_upgrades():
+    state = {"entities": ["Iron_Guard", "Crimson Brotherhood"], "character_status": {}, "location_status": {},
+             "active_plots": [], "relations": {"0_1": {"status": "friendly", "events": []}}}
+    upgrade_state(state, 1)
+    assert FactionRelations.from_dict(state["relations"]).status(1, 0) == "friendly"
@@ -0,0 +1,73 @@
+"""Bounded histories: entries pushed out of the ring buffers are read back through get_history()."""
+
+import contextlib
+import io
+
+import pytest
+
+
+def _run_events(generator, count):
+    for _ in range(count):
+        event, category = generator.generate_event()
+        generator.save_event(event, category, generator.extract_event_data(event))
+    generator.db.flush()
+
+
+def test_event_history_continues_into_events_table(make_generator):
+    generator = make_generator(history_limits={"event_history": 5})
+    _run_events(generator, 40)
+
+    assert len(generator.world_state["event_history"]) == 5
+    history = generator.get_history("event_history", limit=30)
+    assert [entry["event_id"] for entry in history] == list(range(40, 10, -1))
+    assert all(entry["summary"] for entry in history)
+    # AI prompts read the same layer
+    assert generator.get_recent_events(12) == [entry["summary"] for entry in history[:12]]
+
+
+def test_archived_entries_are_read_back_after_reload(make_generator):
+    generator = make_generator("Archive World", history_limits={"realm_shifts": 2})
+    _run_events(generator, 3)
+    before = len(generator.get_history("realm_shifts", limit=100))
+    for shift in range(6):
+        generator._record_history("realm_shifts", "", ["realm_shifts"], {
+            "type": "time warp", "timestamp": f"shift {shift}", "description": f"Shift {shift}"})
+    with generator.db.unit_of_work():
+        generator.update_world_state()
+    generator.db.flush()
+
+    assert len(generator.world_state["realm_shifts"]) == 2
+    expected = [f"Shift {shift}" for shift in range(5, -1, -1)]
+    history = generator.get_history("realm_shifts", limit=6 + before)
+    assert [entry["description"] for entry in history[:6]] == expected
+
+    # The world summary shows the newest three, one of them from the archive
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        generator.show_world_summary()
+    assert "Shift 5" in output.getvalue() and "Shift 3" in output.getvalue()
+
+    generator.db.close()
+    reloaded = make_generator("Archive World", history_limits={"realm_shifts": 2})
+    history = reloaded.get_history("realm_shifts", limit=6 + before)
+    assert [entry["description"] for entry in history[:6]] == expected
+
+
+def test_owned_histories_need_their_owner(make_generator):
+    generator = make_generator()
+    _run_events(generator, 200)
+
+    for owner in (None, "Ashen Hand", ("Ashen Hand",)):
+        with pytest.raises(ValueError, match="relation_events needs a pair of faction names"):
+            generator.get_history("relation_events", owner)
+    for collection in ("character_events", "developments", "location_events", "plot_events"):
+        with pytest.raises(ValueError, match=f"{collection} needs the name"):
+            generator.get_history(collection)
+
+    faction1, faction2 = generator.db.read().execute('''
+        SELECT p.faction, q.faction FROM event_factions p
+        JOIN event_factions q ON q.event_id = p.event_id AND q.faction > p.faction
+        WHERE p.position < 2 AND q.position < 2 LIMIT 1
+    ''').fetchone()
+    history = generator.get_history("relation_events", (faction1, faction2))
+    assert history and history == generator.get_history("relation_events", [faction2, faction1])
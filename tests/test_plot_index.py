@@ -0,0 +1,104 @@
+"""Plot matching and the active -> dormant -> resolved plot lifecycle."""
+
+import json
+
+from history import json_default
+from plot_index import (
+    PLOT_DORMANT_AFTER, PLOT_RESOLVED_AFTER, PLOT_SWEEP_INTERVAL, PlotIndex, live_plots, plot_keywords,
+)
+
+RISING = "The necromancer rises over the barrow"
+CARAVAN = "A merchant caravan vanished beyond the mountains"
+
+
+def _event(generator, text, plot_hooks="Something stirs"):
+    event_data = generator.extract_event_data(text)
+    if plot_hooks:
+        event_data.update(consequences="Unknown", plot_hooks=plot_hooks)
+    generator.save_event(text, "magical", event_data)
+
+
+def _quiet_until(generator, event_id):
+    while generator.event_count < event_id:
+        _event(generator, "Quiet days pass", plot_hooks=None)
+
+
+def _first_sweep_after(event_id):
+    return -(-event_id // PLOT_SWEEP_INTERVAL) * PLOT_SWEEP_INTERVAL
+
+
+def _plots(generator):
+    # Leaves out the plots a new world starts with
+    return {plot.name: plot for plot in generator.world_state["active_plots"]
+            if plot.name.startswith("Plot from Event #")}
+
+
+def test_index_matches_whole_keywords_at_their_list_positions():
+    plots = [{"id": 4, "keywords": plot_keywords(RISING)}, {"id": 9, "keywords": plot_keywords(CARAVAN)}]
+    index = PlotIndex(plots)
+    assert plot_keywords(RISING) == ["necromancer", "rises", "barrow"]
+    assert index.match("Another CARAVAN, and the necromancer again") == 0
+    assert index.match("The caravans were late") is None
+    index.rebuild(plots[1:])
+    assert len(index) == 1 and index.match("the necromancer") is None and index.match("caravan") == 0
+
+
+def test_plots_go_dormant_wake_up_and_are_resolved(make_generator):
+    generator = make_generator("Plot World")
+    _event(generator, RISING)
+    _event(generator, CARAVAN)
+    rising, caravan = (f"Plot from Event #{event_id}" for event_id in (1, 2))
+    assert [plot.status for plot in _plots(generator).values()] == ["active", "active"]
+
+    # Idle for PLOT_DORMANT_AFTER events: dormant, and no longer live
+    dormant_at = _first_sweep_after(2 + PLOT_DORMANT_AFTER)
+    _quiet_until(generator, dormant_at - 1)
+    assert _plots(generator)[caravan].status == "active"
+    _quiet_until(generator, dormant_at)
+    assert [plot.status for plot in _plots(generator).values()] == ["dormant", "dormant"]
+    assert live_plots(_plots(generator).values()) == []
+
+    # A matching event wakes the plot up
+    _event(generator, "The caravan limps home")
+    woken = _plots(generator)[caravan]
+    assert woken.status == "active" and woken.last_event == generator.event_count
+    assert list(woken.events) == [2, generator.event_count]
+    assert [plot.name for plot in live_plots(_plots(generator).values())] == [caravan]
+
+    # Dormant for PLOT_RESOLVED_AFTER more events: resolved and archived
+    resolved_at = _first_sweep_after(1 + PLOT_DORMANT_AFTER + PLOT_RESOLVED_AFTER)
+    _quiet_until(generator, resolved_at - 1)
+    assert rising in _plots(generator)
+    _quiet_until(generator, resolved_at)
+    assert list(_plots(generator)) == [caravan]
+    generator.db.flush()
+    archived = [json.loads(row[0]) for row in generator.db.read().execute(
+        "SELECT entry_json FROM history_archive WHERE collection = 'plots' AND owner = ?", (rising,))]
+    assert [(plot["status"], plot["events"]) for plot in archived] == [("resolved", [1])]
+
+
+def test_index_is_rebuilt_after_a_plot_is_removed(make_generator):
+    generator = make_generator("Plot World")
+    resolved_at = _first_sweep_after(1 + PLOT_DORMANT_AFTER + PLOT_RESOLVED_AFTER)
+    _event(generator, RISING)
+    # Created late enough to still be there when the first plot is resolved
+    _quiet_until(generator, resolved_at + PLOT_SWEEP_INTERVAL - PLOT_DORMANT_AFTER - PLOT_RESOLVED_AFTER)
+    _event(generator, CARAVAN)
+    caravan = f"Plot from Event #{generator.event_count}"
+    _quiet_until(generator, resolved_at)
+    assert [plot.name for plot in generator.world_state["active_plots"]] == [caravan]
+
+    # The caravan plot moved to position 0; the old keywords match nothing
+    _event(generator, "The caravan limps home")
+    assert _plots(generator)[caravan].last_event == generator.event_count
+    _event(generator, "The necromancer rises again")
+    assert list(_plots(generator)) == [caravan, f"Plot from Event #{generator.event_count}"]
+
+    # A reopened world indexes its plots the same way
+    live = json.dumps(list(_plots(generator).values()), default=json_default)
+    generator.db.close()
+    reloaded = make_generator("Plot World")
+    assert json.dumps(list(_plots(reloaded).values()), default=json_default) == live
+    _event(reloaded, "The necromancer is seen again")
+    assert list(_plots(reloaded)[f"Plot from Event #{reloaded.event_count - 1}"].events) == [
+        reloaded.event_count - 1, reloaded.event_count]
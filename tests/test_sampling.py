@@ -0,0 +1,40 @@
+"""Weighted template sampling and the no-repeat window."""
+
+import Fantasy
+from sampling import RecentWindow
+
+
+
+def test_no_repeat_fallback_keeps_to_weighted_templates(make_generator):
+    generator = make_generator(no_repeat_window=3)
+    templates = generator.compiled_categories["political"]
+    # Only the first four templates can be drawn; the window holds three of them
+    generator.set_template_weights({"political": (1.0,) * 4 + (0.0,) * (len(templates) - 4)})
+    allowed = set(templates[:4])
+
+    picks = []
+    for _ in range(200):
+        index = generator.template_tables["political"].sample(generator.template_rng)
+        picks.append(generator._pick_template("political", index, generator.template_rng))
+
+    assert set(picks) <= allowed
+    # The fallback always finds the one allowed template outside the window
+    assert all(len(set(picks[i:i + 4])) == 4 for i in range(len(picks) - 3))
+
+
+def test_no_repeat_fallback_follows_weights(make_generator, monkeypatch):
+    generator = make_generator(no_repeat_window=1)
+    templates = generator.compiled_categories["magical"]
+    generator.set_template_weights({"magical": (1.0, 1.0, 3.0) + (0.0,) * (len(templates) - 3)})
+    # Go straight to the fallback whenever the drawn template is in the window
+    monkeypatch.setattr(Fantasy, "NO_REPEAT_ATTEMPTS", 0)
+
+    counts = {}
+    for _ in range(4000):
+        generator.recent_templates = RecentWindow(1)
+        generator.recent_templates.add(templates[0])
+        template = generator._pick_template("magical", 0, generator.template_rng)
+        counts[template] = counts.get(template, 0) + 1
+
+    assert set(counts) == {templates[1], templates[2]}
+    assert 0.7 < counts[templates[2]] / 4000 < 0.8
@@ -0,0 +1,58 @@
+"""Headless simulation runs and their reports."""
+
+import contextlib
+import io
+import os
+import sqlite3
+
+import pytest
+
+import Fantasy
+from simulation import run_simulation, simulate_worlds
+
+
+def test_run_simulation_reports_the_checkpointed_database(world_dir):
+    with contextlib.redirect_stdout(io.StringIO()):
+        stats = run_simulation("Sim World", 300, seed=3)
+    db_path = stats["db_path"]
+
+    # Closed: everything was checkpointed out of the WAL into the database file
+    assert not os.path.exists(db_path + "-wal") or os.path.getsize(db_path + "-wal") == 0
+    assert stats["db_bytes"] == os.path.getsize(db_path) > 100_000
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM events").fetchone()[0] == 300
+    conn.close()
+
+
+def test_simulate_worlds_sums_database_sizes(world_dir):
+    with contextlib.redirect_stdout(io.StringIO()):
+        stats = simulate_worlds(["Alpha", "Beta"], 200, workers=2, seed=5)
+
+    assert stats["worlds"] == 2 and stats["failed"] == 0
+    sizes = [os.path.getsize(r["db_path"]) for r in stats["results"]]
+    assert stats["db_bytes"] == sum(sizes) > 2 * 50_000
+
+
+def test_headless_season_change_sends_no_telegram_message(make_generator, monkeypatch):
+    generator = make_generator()
+    generator.telegram.set_chat_id(12345)
+    sent = []
+    monkeypatch.setattr(generator.telegram, "send_message", lambda *args, **kwargs: sent.append(args))
+
+    generator.advance_season()
+    assert sent == []
+    generator.headless = False
+    with contextlib.redirect_stdout(io.StringIO()):
+        generator.advance_season()
+    assert len(sent) == 1
+
+
+def test_simulate_zero_events_stays_headless(world_dir, monkeypatch):
+    monkeypatch.setattr("builtins.input", lambda *args: pytest.fail("asked for input"))
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        Fantasy.main(["--simulate", "0", "--world", "Empty World"])
+    assert "FANTASY WORLD EVENT GENERATOR" not in output.getvalue()
+    conn = sqlite3.connect(world_dir / "empty_world_events.db")
+    assert conn.execute("SELECT COUNT(*) FROM events").fetchone()[0] == 0
+    conn.close()
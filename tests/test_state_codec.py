@@ -0,0 +1,156 @@
+"""World-state codecs and the schema upgrades that run on every older checkpoint."""
+
+import json
+
+import pytest
+
+from entity_registry import EntityRegistry
+from faction_relations import FactionRelations
+from history import WORLD_HISTORIES, json_default
+from state_codec import (
+    CODECS, MSGPACK_SUPPORT, check_codec, decode_state, encode_state, row_payload, state_columns,
+)
+from world_schema import MIGRATIONS, SCHEMA_VERSION, upgrade_state
+
+needs_codec = [pytest.param(codec, marks=pytest.mark.skipif(codec == "msgpack" and not MSGPACK_SUPPORT,
+                                                            reason="msgpack is not installed"))
+               for codec in CODECS]
+
+
+def _comparable(state):
+    # JSON keys are always strings, and ring buffers and records come back as lists and dicts
+    return json.loads(json.dumps(state, default=json_default))
+
+
+def _run_events(generator, count):
+    for _ in range(count):
+        event, category = generator.generate_event()
+        generator.save_event(event, category, generator.extract_event_data(event))
+    generator.db.flush()
+
+
+@pytest.mark.parametrize("codec", needs_codec)
+def test_codec_round_trips_a_generated_state(make_generator, codec):
+    generator = make_generator("Codec World")
+    _run_events(generator, 40)
+    state = generator.snapshot_state()
+    state_json, state_data = state_columns(state, codec)
+    assert (state_json is None) == (codec != "json")
+
+    decoded = decode_state(row_payload(state_json, state_data), codec)
+    assert _comparable(decoded) == _comparable(state)
+    if codec != "json":
+        # The binary codecs keep integer entity IDs as keys
+        assert set(decoded["character_status"]) == set(state["character_status"])
+
+
+@pytest.mark.parametrize("codec", needs_codec)
+def test_world_reopens_with_the_codec_it_was_saved_with(make_generator, codec):
+    generator = make_generator("Codec World", state_codec=codec)
+    generator.checkpoint_interval = 15
+    _run_events(generator, 40)
+    live = _comparable(generator.named_state())
+    generator.db.close()
+
+    reloaded = make_generator("Codec World")
+    assert reloaded.state_codec == codec
+    assert _comparable(reloaded.named_state()) == live
+
+
+@pytest.mark.parametrize("saved, opened", [("json", "marshal"), ("marshal", "json")])
+def test_world_reopened_with_another_codec_is_converted(make_generator, saved, opened):
+    generator = make_generator("Codec World", state_codec=saved)
+    generator.checkpoint_interval = 15
+    _run_events(generator, 40)
+    live = _comparable(generator.named_state())
+    generator.db.close()
+
+    converted = make_generator("Codec World", state_codec=opened)
+    converted.db.flush()
+    codecs = {row[0] for row in converted.db.read().execute("SELECT codec FROM world_state")}
+    assert codecs == {opened}
+    assert _comparable(converted.named_state()) == live
+    converted.db.close()
+    assert _comparable(make_generator("Codec World").named_state()) == live
+
+
+def test_unversioned_rows_decode_as_json():
+    state = {"time": {"season": "winter"}, "event_history": []}
+    assert decode_state(encode_state(state), None) == state
+
+
+@pytest.mark.parametrize("codec, message", [("pickle", "Unknown state codec"),
+                                            *([] if MSGPACK_SUPPORT else [("msgpack", "needs the msgpack package")])])
+def test_unusable_codecs_are_refused(codec, message):
+    with pytest.raises(ValueError, match=message):
+        check_codec(codec)
+
+
+def _version0_state():
+    """A world state as the generator saved it before schema versions."""
+    return {
+        "time": {"year": 1200, "season": "autumn", "time_of_day": "night", "weather": "fog"},
+        "world_description": "Codec World is a grim realm.",
+        "character_status": {
+            "Xul": {"type": "necromancer", "location": "Ashford", "last_seen": "2024-01-01 00:00:00",
+                    "events": [{"event_id": 3, "summary": "Xul rose", "timestamp": "t"}]},
+            "Aldric": {"type": "cleric", "location": "Brill", "last_seen": "2024-01-01 00:00:00", "events": []},
+        },
+        "location_status": {
+            "Ashford": {"events": [{"event_id": 3, "summary": "Xul rose"}], "notable_features": ["a well"],
+                        "characters_present": ["Xul"]},
+            "Brill": {"events": [], "notable_features": [], "characters_present": ["Aldric"]},
+        },
+        "relations": {
+            "Crimson Brotherhood_Harpers": {"status": "hostile", "events": [{"event": "raid"}]},
+            "Harpers_Order of the Silver Dragon": {"status": "friendly", "events": []},
+        },
+        "active_plots": [
+            {"name": "The Rising", "description": "The dead stir.", "status": "active", "events": [1, 3],
+             "keywords": ["necromancer,", "rises", "ashford."], "characters": ["Xul"], "locations": ["Ashford"]},
+            {"name": "A Quiet Plot", "description": "Nothing yet.", "status": "active", "events": []},
+        ],
+    }
+
+
+def test_version0_state_upgrades_to_the_current_version():
+    state = upgrade_state(_version0_state(), None)
+
+    assert state["events_since_season_change"] == 0 and state["rng_seed"] is None
+    entities = EntityRegistry(state["entities"])
+    xul, aldric, ashford = (entities.get(name) for name in ("Xul", "Aldric", "Ashford"))
+    assert state["character_status"][xul]["location"] == ashford
+    assert state["character_status"][xul]["event_total"] == 1
+    assert state["character_status"][aldric]["developments"] == []
+    assert state["location_status"][ashford]["characters_present"] == [xul]
+    assert state["location_status"][ashford]["event_total"] == 1
+    assert all(collection in state for collection in WORLD_HISTORIES)
+
+    relations = FactionRelations.from_dict(state["relations"])
+    harpers, brotherhood, order = (entities.get(name) for name in
+                                   ("Harpers", "Crimson Brotherhood", "Order of the Silver Dragon"))
+    assert relations.status(harpers, brotherhood) == "hostile"
+    assert relations.history(brotherhood, harpers) == [{"event": "raid"}]
+    assert relations.status(order, harpers) == "friendly"
+
+    rising, quiet = state["active_plots"]
+    assert (rising["id"], rising["status"], rising["last_event"]) == (0, "active", 3)
+    assert rising["keywords"] == ["necromancer", "rises", "ashford"]
+    assert rising["characters"] == [xul] and rising["locations"] == [ashford]
+    assert (quiet["id"], quiet["last_event"], quiet["keywords"]) == (1, 0, [])
+    assert state["next_plot_id"] == 2
+
+
+@pytest.mark.parametrize("version", range(SCHEMA_VERSION + 1))
+def test_each_version_upgrades_the_same_way(version):
+    # Upgrading in steps gives what upgrading in one go does
+    current = upgrade_state(_version0_state(), None)
+    stepped = _version0_state()
+    for migrate in MIGRATIONS[:version]:
+        migrate(stepped)
+    assert upgrade_state(stepped, version) == current
+
+
+def test_newer_state_is_refused():
+    with pytest.raises(ValueError, match="newer than this generator"):
+        upgrade_state({}, SCHEMA_VERSION + 1)
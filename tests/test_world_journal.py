@@ -0,0 +1,167 @@
+"""The world-state journal: its operations, checkpoints, replay and time travel."""
+
+import contextlib
+import io
+import json
+from collections import deque
+
+import pytest
+
+import web_server
+from entity_registry import EntityRegistry
+from faction_relations import FactionRelations
+from history import WORLD_HISTORIES
+from world_journal import WorldJournal, apply_delta
+from world_sections import SECTIONS
+
+
+def _comparable(state):
+    # Ring buffers are deques in the live state and lists when rebuilt
+    return json.loads(json.dumps(state, default=list))
+
+
+def _run_events(generator, count, snapshots=()):
+    states = {}
+    for _ in range(count):
+        event, category = generator.generate_event()
+        generator.save_event(event, category, generator.extract_event_data(event))
+        if generator.event_count in snapshots:
+            states[generator.event_count] = _comparable(generator.named_state())
+    generator.db.flush()
+    return states
+
+
+def test_every_operation_replays():
+    journal = WorldJournal()
+    journal.set(["time", "season"], "winter")
+    journal.add(["events_since_season_change"], 2)
+    journal.append(["character_status", 0, "developments"], "crowned")
+    journal.pop(["location_status", 1])
+    journal.push("event_history", ["event_history"], {"event_id": 4, "summary": "d"})
+    journal.entities(["Crimson Brotherhood", "Harpers"])
+    journal.relation(2, 3, "hostile")
+    journal.relation_event(2, 3, {"event_id": 4})
+    state = {"time": {"season": "autumn"}, "events_since_season_change": 1,
+             "character_status": {0: {"developments": []}}, "location_status": {1: {}},
+             "event_history": [{"event_id": n, "summary": s} for n, s in ((1, "a"), (2, "b"), (3, "c"))]}
+    relations, entities = FactionRelations(), EntityRegistry(["Xul", "Ashford"])
+
+    apply_delta(journal.take(), state, relations, entities, {"event_history": 3})
+    assert len(journal) == 0
+    assert state["time"]["season"] == "winter" and state["events_since_season_change"] == 3
+    assert state["character_status"][0]["developments"] == ["crowned"]
+    assert state["location_status"] == {}
+    assert [entry["event_id"] for entry in state["event_history"]] == [2, 3, 4]
+    assert entities.names == ["Xul", "Ashford", "Crimson Brotherhood", "Harpers"]
+    assert relations.status(3, 2) == "hostile" and relations.history(2, 3) == [{"event_id": 4}]
+
+    with pytest.raises(ValueError, match="Unknown journal operation"):
+        apply_delta([["teleport", ["time"]]], state, relations, entities, {})
+
+
+def test_events_are_journaled_between_checkpoints(make_generator):
+    generator = make_generator("Journal World")
+    generator.checkpoint_interval = 25
+    _run_events(generator, 60)
+
+    conn = generator.db.read()
+    journaled = [row[0] for row in conn.execute("SELECT event_id FROM world_journal WHERE event_id IS NOT NULL")]
+    checkpoints = [row[0] for row in conn.execute("SELECT event_id FROM world_state WHERE event_id IS NOT NULL")]
+    assert journaled[-60:] == list(range(1, 61))
+    assert checkpoints[-2:] == [25, 50]
+
+
+def test_reopening_replays_the_journal_after_the_checkpoint(make_generator):
+    generator = make_generator("Journal World")
+    generator.checkpoint_interval = 25
+    live = _run_events(generator, 60, snapshots=(60,))[60]
+
+    generator.db.close()
+    reloaded = make_generator("Journal World")
+    assert reloaded.event_count == 60
+    assert _comparable(reloaded.named_state()) == live
+    # Entries the journal created get ring buffers like the checkpointed ones
+    state = reloaded.world_state
+    histories = [state[collection] for collection in WORLD_HISTORIES]
+    histories += [data.events for data in state["location_status"].values()]
+    histories += [history for data in state["character_status"].values() for history in (data.events, data.developments)]
+    histories += [plot.events for plot in state["active_plots"]]
+    assert all(isinstance(history, deque) for history in histories)
+
+
+def test_world_at_rebuilds_the_state_after_each_event(make_generator):
+    generator = make_generator("Replay World")
+    generator.checkpoint_interval = 25
+    live = _run_events(generator, 60, snapshots=(10, 37, 60))
+
+    for event_id, state in live.items():
+        rebuilt = _comparable(generator.world_at(event_id))
+        assert rebuilt.pop("event_id") == event_id
+        assert rebuilt == state
+
+
+def test_world_at_page_shows_the_rebuilt_world(make_generator, monkeypatch):
+    generator = make_generator("Replay World")
+    _run_events(generator, 30)
+    monkeypatch.setattr(web_server, "_db_path", generator.db_path)
+    monkeypatch.setattr(web_server, "_world_name", generator.world_name)
+    client = web_server.app.test_client()
+
+    world = generator.world_at(20)
+    page = client.get("/world/at/20")
+    assert page.status_code == 200
+    text = page.get_data(as_text=True)
+    newest = max(world["character_status"].items(), key=lambda item: item[1]["event_total"])[0]
+    assert newest in text
+    assert client.get("/world/at/31").status_code == 200
+
+
+def _take_next_event_id(generator):
+    """Make the unit of the next event fail: its ID is already in use."""
+    with generator.db.write() as conn:
+        conn.execute("INSERT INTO events (id, category) VALUES (?, 'taken')", (generator.event_count + 1,))
+
+
+def _save_quietly(generator, count):
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(count):
+            event, category = generator.generate_event()
+            generator.save_event(event, category, generator.extract_event_data(event))
+            generator.db.read()  # waits for the writer
+
+
+def test_lost_write_is_followed_by_a_full_checkpoint(make_generator):
+    generator = make_generator("Journal World")
+    _run_events(generator, 20)
+    _take_next_event_id(generator)
+    _save_quietly(generator, 10)  # event 21 is lost, event 22 checkpoints the world
+    live = _comparable(generator.named_state())
+
+    conn = generator.db.read()
+    checkpoint_id, event_id = conn.execute("SELECT id, event_id FROM world_state ORDER BY id DESC LIMIT 1").fetchone()
+    assert event_id == 22
+    written = {row[0] for row in conn.execute("SELECT section FROM world_state_sections WHERE checkpoint_id = ?",
+                                              (checkpoint_id,))}
+    assert written == set(SECTIONS)
+    # Only the gap itself cannot be rebuilt
+    assert generator.world_at(21) is None
+    assert _comparable(generator.world_at(30)) == dict(live, event_id=30)
+
+    generator.close()
+    reloaded = make_generator("Journal World")
+    assert reloaded.event_count == 30
+    assert _comparable(reloaded.named_state()) == live
+
+
+def test_close_checkpoints_the_world_after_losing_the_last_write(make_generator):
+    generator = make_generator("Journal World")
+    _run_events(generator, 20)
+    _take_next_event_id(generator)
+    _save_quietly(generator, 1)
+    live = _comparable(generator.named_state())
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        generator.close()
+    reloaded = make_generator("Journal World")
+    assert reloaded.event_count == 21
+    assert _comparable(reloaded.named_state()) == live
@@ -0,0 +1,78 @@
+"""Slotted world-state records and the plain dicts they are saved as."""
+
+import json
+from collections import deque
+
+import pytest
+
+from history import json_default
+from state_codec import available_codecs, decode_state, encode_state
+from world_journal import apply_delta
+from world_records import CharacterState, LocationState, PlotState, plots_to_records, to_records
+
+RECORDS = [
+    CharacterState(type="necromancer", location=4, last_seen="2024-01-01 00:00:00",
+                   events=deque([{"event_id": 3}], maxlen=5), event_total=7, developments=["crowned"]),
+    LocationState(events=[{"event_id": 3}], event_total=1, notable_features=["a well"], characters_present=[2]),
+    PlotState(id=3, name="The Rising", description="The dead stir.", keywords=["necromancer"], status="dormant",
+              events=[1, 3], last_event=3, characters=[2], locations=[4]),
+]
+
+
+@pytest.mark.parametrize("record", RECORDS, ids=lambda record: type(record).__name__)
+def test_records_round_trip_through_dicts(record):
+    data = record.to_dict()
+    assert list(data) == [field for field, _ in type(record).FIELDS]
+    assert type(record).from_dict(data) == record
+    # Saved the way checkpoints and journal rows are
+    saved = json.loads(json.dumps(record, default=json_default))
+    assert type(record).from_dict(saved).to_dict() == json.loads(json.dumps(data, default=list))
+
+
+@pytest.mark.parametrize("codec", available_codecs())
+def test_codecs_save_records_as_dicts(codec):
+    state = {"character_status": {"2": RECORDS[0]}, "active_plots": [RECORDS[2]]}
+    decoded = decode_state(encode_state(state, codec), codec)
+    assert CharacterState.from_dict(decoded["character_status"]["2"]).events == [{"event_id": 3}]
+    assert plots_to_records(decoded["active_plots"]) == [RECORDS[2]]
+
+
+def test_legacy_dict_entries_are_defaulted_and_trimmed():
+    # A character as the original generator saved it, with a key no longer kept
+    legacy = {"type": "cleric", "location": "Brill", "last_seen": "2024-01-01 00:00:00", "events": [], "mood": "grim"}
+    character = CharacterState.from_dict(legacy)
+    assert character.to_dict() == {"type": "cleric", "location": "Brill", "last_seen": "2024-01-01 00:00:00",
+                                   "events": [], "event_total": 0, "developments": []}
+
+    plot = PlotState.from_dict({"name": "A Quiet Plot", "description": "Nothing yet."})
+    assert (plot.status, plot.events, plot.last_event, plot.keywords) == ("active", [], 0, [])
+    # Every record gets its own lists
+    assert PlotState().events is not plot.events
+    assert LocationState.from_dict({}).to_dict() == {"events": [], "event_total": 0, "notable_features": [],
+                                                     "characters_present": []}
+
+
+def test_mixed_entries_become_records():
+    character = RECORDS[0]
+    converted = to_records({1: character, 2: {"type": "mage"}}, CharacterState)
+    assert converted[1] is character and converted[2] == CharacterState(type="mage")
+    plots = plots_to_records([RECORDS[2], {"id": 4, "name": "Plot from Event #9"}])
+    assert plots[0] is RECORDS[2] and plots[1].name == "Plot from Event #9"
+
+
+def test_records_answer_journal_paths_like_dicts():
+    state = {"character_status": {2: CharacterState(type="mage", location=1)}}
+    apply_delta([["set", ["character_status", 2, "location"], 5],
+                 ["add", ["character_status", 2, "event_total"], 2],
+                 ["append", ["character_status", 2, "developments"], "exiled"]], state, None, None, {})
+    character = state["character_status"][2]
+    assert (character.location, character.event_total, character.developments) == (5, 2, ["exiled"])
+
+    assert "location" in character and "mood" not in character
+    assert character.get("mood", "calm") == "calm" and character["type"] == "mage"
+    assert list(character) == list(character.keys()) == [field for field, _ in CharacterState.FIELDS]
+    with pytest.raises(KeyError):
+        character["mood"]
+    with pytest.raises(KeyError):
+        character["mood"] = "grim"
+    assert CharacterState(type="mage") != {"type": "mage"}
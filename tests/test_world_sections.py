@@ -0,0 +1,106 @@
+"""Sectioned checkpoints and the lazily loaded world state built from them."""
+
+import json
+
+import pytest
+
+from history import json_default
+from world_sections import SECTIONS, LazyWorldState, read_checkpoint, split_state
+
+
+def _comparable(state):
+    return json.loads(json.dumps(state, default=json_default))
+
+
+def _run_events(generator, count, snapshots=()):
+    states = {}
+    for _ in range(count):
+        event, category = generator.generate_event()
+        generator.save_event(event, category, generator.extract_event_data(event))
+        if generator.event_count in snapshots:
+            states[generator.event_count] = _comparable(generator.snapshot_state())
+    generator.db.flush()
+    return states
+
+
+@pytest.mark.parametrize("codec", ["json", "marshal"])
+def test_each_checkpoint_reads_back_as_saved(make_generator, codec):
+    generator = make_generator("Section World", state_codec=codec)
+    generator.checkpoint_interval = 10
+    saved = _run_events(generator, 35, snapshots=(10, 20, 30))
+
+    cursor = generator.db.read().cursor()
+    rows = cursor.execute('''SELECT id, event_id, state_json, state_data, codec FROM world_state
+                             WHERE event_id IN (10, 20, 30)''').fetchall()
+    assert len(rows) == 3
+    for checkpoint_id, event_id, state_json, state_data, row_codec in rows:
+        assert state_json is None and state_data is None
+        state = read_checkpoint(cursor, checkpoint_id, state_json, state_data, row_codec)
+        assert _comparable(state) == saved[event_id]
+
+    # Unchanged sections are not written again; they are read from an older checkpoint
+    written = {row[0]: row[1] for row in cursor.execute(
+        "SELECT section, COUNT(*) FROM world_state_sections GROUP BY section")}
+    assert written.keys() == SECTIONS.keys()
+    assert min(written.values()) < max(written.values())
+
+
+def test_reopened_world_loads_sections_when_they_are_read(make_generator):
+    generator = make_generator("Section World")
+    generator.checkpoint_interval = 10
+    _run_events(generator, 25)
+    live = _comparable(generator.snapshot_state())
+    generator.db.close()
+
+    state = make_generator("Section World").world_state
+    assert state.loaded == {"world"}
+    state["time"]
+    assert state.loaded == {"world", "time"}
+    assert "character_status" in state and "characters" in state.loaded
+    assert "locations" not in state.loaded
+    assert _comparable(state.load_all()) == {key: value for key, value in live.items() if key != "relations"}
+
+
+class _Sections:
+    """Hands out the sections of a state, counting the reads."""
+
+    def __init__(self, state):
+        self.sections = split_state(state)
+        self.reads = []
+
+    def __call__(self, section):
+        self.reads.append(section)
+        return dict(self.sections[section])
+
+
+def test_lazy_state_reads_each_section_once():
+    state = {"entities": ["Xul"], "time": {"season": "winter"}, "events_since_season_change": 2,
+             "character_status": {0: {"location": 0}}, "location_status": {}, "active_plots": []}
+    reader = _Sections(state)
+    lazy = LazyWorldState(reader)
+
+    assert lazy["time"] == {"season": "winter"} and lazy["events_since_season_change"] == 2
+    assert lazy.get("next_plot_id", 0) == 0
+    assert "relations" not in lazy
+    with pytest.raises(KeyError):
+        lazy["rng_seed"]
+    assert reader.reads == ["time", "plots", "relations", "world"]
+    assert lazy.section("characters") == {"character_status": {0: {"location": 0}}}
+    assert dict(lazy.load_all()) == state
+    assert sorted(reader.reads) == sorted(SECTIONS)
+
+
+def test_section_is_prepared_before_it_is_visible_and_retried_after_a_failure():
+    reader = _Sections({"time": {"season": "winter"}})
+    failures = ["disk trouble"]
+
+    def prepare(section, data):
+        if failures:
+            raise OSError(failures.pop())
+        data["time"] = dict(data["time"], prepared=section)
+
+    lazy = LazyWorldState(reader, prepare)
+    with pytest.raises(OSError):
+        lazy["time"]
+    assert "time" not in lazy.loaded and not dict.__contains__(lazy, "time")
+    assert lazy["time"] == {"season": "winter", "prepared": "time"}
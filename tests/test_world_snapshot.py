@@ -0,0 +1,81 @@
+"""Published world snapshots stay as they were while the generator moves on."""
+
+from collections.abc import Mapping
+
+import pytest
+
+from world_snapshot import _REMOVED, CHUNK_SIZE, ChunkedMap, take_snapshot
+
+
+def _plain(value):
+    """A deep copy of a snapshot value built only from dicts and lists."""
+    if isinstance(value, Mapping):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, (tuple, list)):
+        return [_plain(item) for item in value]
+    return value
+
+
+def _copy(snapshot):
+    return (snapshot.event_count, _plain(snapshot.state), _plain(snapshot.relations),
+            [snapshot.name(entity_id) for entity_id in range(snapshot._name_count)], snapshot.summary())
+
+
+def _run_events(generator, count):
+    for _ in range(count):
+        event, category = generator.generate_event()
+        generator.save_event(event, category, generator.extract_event_data(event))
+
+
+def test_published_snapshot_does_not_change_with_the_world(make_generator):
+    generator = make_generator("Snapshot World")
+    _run_events(generator, 20)
+    snapshot = generator.snapshot
+    before = _copy(snapshot)
+
+    _run_events(generator, 80)
+    generator.apply_random_world_changes()
+    generator.advance_season()
+    assert generator.snapshot is not snapshot and generator.snapshot.event_count == 100
+    assert _copy(snapshot) == before
+
+    # Names interned later are not visible through the old snapshot
+    newcomer = generator.entities.intern("Vesper the Newcomer")
+    assert snapshot.name(newcomer) == "" and generator.snapshot.name(newcomer) == ""
+    assert generator.publish_snapshot().name(newcomer) == "Vesper the Newcomer"
+
+
+def test_incremental_snapshot_matches_a_full_one(make_generator):
+    generator = make_generator("Snapshot World")
+    _run_events(generator, 60)
+    generator.world_state.load_all()
+    full = take_snapshot(generator.event_count, generator.world_state, generator.relations, generator.entities.names)
+    assert _plain(generator.snapshot.state) == _plain(full.state)
+    assert _plain(generator.snapshot.relations) == _plain(full.relations)
+
+
+def test_snapshot_values_are_read_only(make_generator):
+    generator = make_generator("Snapshot World")
+    _run_events(generator, 5)
+    snapshot = generator.snapshot
+    character_id = next(iter(snapshot["character_status"]))
+    with pytest.raises(TypeError):
+        snapshot["time"]["season"] = "summer"
+    with pytest.raises(TypeError):
+        snapshot.state["time"] = {}
+    with pytest.raises(TypeError):
+        snapshot["character_status"][character_id]["location"] = None
+    assert isinstance(snapshot["event_history"], tuple)
+    assert isinstance(snapshot["character_status"][character_id]["events"], tuple)
+
+
+def test_evolve_copies_only_the_changed_chunks():
+    original = ChunkedMap.build((key, f"entry {key}") for key in range(4 * CHUNK_SIZE))
+    evolved = original.evolve({5: "changed", CHUNK_SIZE + 1: _REMOVED, 5 * CHUNK_SIZE: "new"})
+
+    assert len(original) == 4 * CHUNK_SIZE and original[5] == "entry 5" and CHUNK_SIZE + 1 in original
+    assert 5 * CHUNK_SIZE not in original
+    assert len(evolved) == 4 * CHUNK_SIZE and evolved[5] == "changed" and evolved[5 * CHUNK_SIZE] == "new"
+    assert CHUNK_SIZE + 1 not in evolved
+    assert evolved._chunks[2] is original._chunks[2] and evolved._chunks[0] is not original._chunks[0]
+    assert list(evolved)[:3] == [0, 1, 2] and list(evolved)[-1] == 5 * CHUNK_SIZE
@@ -8,9 +8,17 @@ import os
 import sqlite3
 import threading
 from pathlib import Path
-from typing import Optional, List
+from typing import Callable, Optional, List
 
-from flask import Flask, render_template, send_from_directory, jsonify, abort
+from flask import Flask, render_template, request, send_from_directory, jsonify, abort
+from markupsafe import Markup, escape
+
+from db_connections import connections
+from event_participants import character_timeline, faction_timeline
+from event_search import search_available, search_events
+from state_codec import decode_state, row_payload
+from world_journal import load_world_at
+from world_sections import read_section
 
 _SCRIPT_DIR = Path(__file__).parent
 
@@ -24,6 +32,41 @@ app = Flask(
 _db_path: str = ""
 _world_name: str = ""
 _images_dir: str = ""
+# Returns the generator's latest WorldSnapshot (see world_snapshot.py), if it runs in this process
+_snapshot: Optional[Callable[[], object]] = None
+
+
+def _current_snapshot():
+    return _snapshot() if _snapshot else None
+
+
+def _get_world_time(cur) -> dict:
+    """Return the current world time: the latest checkpoint's, updated by the journal."""
+    snapshot = _current_snapshot()
+    if snapshot is not None:
+        return dict(snapshot["time"])
+    cur.execute("SELECT id, state_json, state_data, codec, journal_id FROM world_state ORDER BY id DESC LIMIT 1")
+    ws_row = cur.fetchone()
+    world_time = {}
+    if ws_row:
+        try:
+            payload = row_payload(ws_row["state_json"], ws_row["state_data"])
+            if payload is None:
+                # Stored in sections: only the time section is needed
+                state = read_section(cur, ws_row["id"], "time")
+            else:
+                state = decode_state(payload, ws_row["codec"])
+            world_time = state.get("time", {})
+            cur.execute("SELECT delta_json FROM world_journal WHERE id > ? ORDER BY id",
+                        (ws_row["journal_id"] or 0,))
+            for (delta_json,) in cur.fetchall():
+                for op in json.loads(delta_json):
+                    if op[0] in ("set", "add") and op[1][0] == "time":
+                        key = op[1][-1]
+                        world_time[key] = op[2] if op[0] == "set" else world_time.get(key, 0) + op[2]
+        except Exception as e:
+            print(f"[web_server] Error reading world time: {e}")
+    return world_time
 
 
 def _get_latest_event() -> Optional[dict]:
@@ -32,9 +75,8 @@ def _get_latest_event() -> Optional[dict]:
         return None
 
     try:
-        conn = sqlite3.connect(_db_path)
-        conn.row_factory = sqlite3.Row
-        cur = conn.cursor()
+        cur = connections(_db_path).read().cursor()
+        cur.row_factory = sqlite3.Row
 
         cur.execute("""
             SELECT e.id, e.timestamp, e.category, e.event_text, e.headline,
@@ -48,26 +90,16 @@ def _get_latest_event() -> Optional[dict]:
         row = cur.fetchone()
 
         if not row:
-            conn.close()
             return None
 
-        # Grab world time from latest world_state
-        cur.execute("SELECT state_json FROM world_state ORDER BY id DESC LIMIT 1")
-        ws_row = cur.fetchone()
-        world_time = {}
-        if ws_row:
-            try:
-                ws = json.loads(ws_row["state_json"])
-                world_time = ws.get("time", {})
-            except (json.JSONDecodeError, KeyError):
-                pass
-
-        conn.close()
-
-        # Parse characters JSON
-        chars = []
+        # Grab world time from the latest checkpoint and journal
+        world_time = _get_world_time(cur)
+
+        # Parse characters and factions JSON
+        chars, factions = [], []
         try:
             chars = json.loads(row["characters"]) if row["characters"] else []
+            factions = json.loads(row["factions"]) if row["factions"] else []
         except (json.JSONDecodeError, TypeError):
             pass
 
@@ -101,6 +133,7 @@ def _get_latest_event() -> Optional[dict]:
             "body_text": body_text,
             "location": row["location"] or "Unknown",
             "characters": chars,
+            "factions": factions,
             "image_url": image_url,
             "hidden_details": row["hidden_details"] or "",
             "connections": row["connections"] or "",
@@ -118,9 +151,8 @@ def _get_recent_events(count: int = 10) -> List[dict]:
     if not _db_path or not Path(_db_path).exists():
         return []
     try:
-        conn = sqlite3.connect(_db_path)
-        conn.row_factory = sqlite3.Row
-        cur = conn.cursor()
+        cur = connections(_db_path).read().cursor()
+        cur.row_factory = sqlite3.Row
         cur.execute("""
             SELECT e.id, e.timestamp, e.category, e.event_text, e.headline,
                    e.description, e.location, e.image_path,
@@ -131,7 +163,6 @@ def _get_recent_events(count: int = 10) -> List[dict]:
             LIMIT ?
         """, (count,))
         rows = cur.fetchall()
-        conn.close()
 
         events = []
         for r in rows:
@@ -186,15 +217,23 @@ def api_latest():
     return jsonify(event)
 
 
+@app.route("/api/world")
+def api_world():
+    """Summary of the current world state, served from the generator's snapshot."""
+    snapshot = _current_snapshot()
+    if snapshot is None:
+        return jsonify({"error": "World state not available"}), 404
+    return jsonify(snapshot.summary())
+
+
 @app.route("/event/<int:event_id>")
 def event_page(event_id: int):
     """Show a specific event by ID."""
     if not _db_path or not Path(_db_path).exists():
         abort(404)
     try:
-        conn = sqlite3.connect(_db_path)
-        conn.row_factory = sqlite3.Row
-        cur = conn.cursor()
+        cur = connections(_db_path).read().cursor()
+        cur.row_factory = sqlite3.Row
         cur.execute("""
             SELECT e.id, e.timestamp, e.category, e.event_text, e.headline,
                    e.description, e.location, e.characters, e.factions, e.image_path,
@@ -206,24 +245,15 @@ def event_page(event_id: int):
         row = cur.fetchone()
 
         # World time
-        cur.execute("SELECT state_json FROM world_state ORDER BY id DESC LIMIT 1")
-        ws_row = cur.fetchone()
-        world_time = {}
-        if ws_row:
-            try:
-                ws = json.loads(ws_row["state_json"])
-                world_time = ws.get("time", {})
-            except (json.JSONDecodeError, KeyError):
-                pass
-
-        conn.close()
+        world_time = _get_world_time(cur)
 
         if not row:
             abort(404)
 
-        chars = []
+        chars, factions = [], []
         try:
             chars = json.loads(row["characters"]) if row["characters"] else []
+            factions = json.loads(row["factions"]) if row["factions"] else []
         except (json.JSONDecodeError, TypeError):
             pass
 
@@ -254,6 +284,7 @@ def event_page(event_id: int):
             "body_text": body_text,
             "location": row["location"] or "Unknown",
             "characters": chars,
+            "factions": factions,
             "image_url": image_url,
             "hidden_details": row["hidden_details"] or "",
             "connections": row["connections"] or "",
@@ -273,6 +304,130 @@ def event_page(event_id: int):
     )
 
 
+@app.route("/world/at/<int:event_id>")
+def world_at_page(event_id: int):
+    """Show the world as it was right after a specific event, for reviewing history."""
+    if not _db_path or not Path(_db_path).exists():
+        abort(404)
+    try:
+        world = load_world_at(_db_path, event_id)
+        latest_id = connections(_db_path).read().execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+        if event_id > latest_id:
+            world = None  # Not written yet
+    except Exception as e:
+        print(f"[web_server] Error rebuilding world at event {event_id}: {e}")
+        abort(404)
+
+    recent, characters, locations = [], [], []
+    if world:
+        recent = list(reversed(world["event_history"]))[:15]
+        characters = sorted(world["character_status"].items(),
+                            key=lambda item: item[1]["event_total"], reverse=True)[:10]
+        locations = sorted(world["location_status"].items(),
+                           key=lambda item: item[1]["event_total"], reverse=True)[:10]
+    return render_template(
+        "world_at.html",
+        world=world,
+        event_id=event_id,
+        latest_id=latest_id,
+        recent=recent,
+        characters=characters,
+        locations=locations,
+        world_name=_world_name,
+    )
+
+
+def _timeline_page(kind: str, name: str, timeline: Callable[..., List[dict]], **options):
+    """Render the newest events of a character or faction, 50 per page (?before=<id> for older)."""
+    before = request.args.get("before", type=int)
+    events = []
+    if _db_path and Path(_db_path).exists():
+        try:
+            events = timeline(connections(_db_path).read().cursor(), name, 50, before, **options)
+        except Exception as e:
+            print(f"[web_server] Error reading the timeline of {kind} {name!r}: {e}")
+    return render_template(
+        "timeline.html",
+        kind=kind,
+        name=name,
+        other=options.get("other"),
+        events=events,
+        older=events[-1]["id"] if len(events) == 50 else None,
+        world_name=_world_name,
+    )
+
+
+@app.route("/character/<path:name>")
+def character_page(name: str):
+    """Every event a character appeared in, newest first."""
+    return _timeline_page("character", name, character_timeline)
+
+
+@app.route("/faction/<path:name>")
+def faction_page(name: str):
+    """Every event a faction took part in, newest first: /faction/<name>[?with=<other faction>]"""
+    other = request.args.get("with", "").strip()
+    if other:
+        return _timeline_page("faction", name, faction_timeline, other=other)
+    return _timeline_page("faction", name, faction_timeline)
+
+
+# Snippet markers that cannot occur in event text, turned into <mark> tags after escaping
+_MARK_OPEN, _MARK_CLOSE = "\x02", "\x03"
+
+
+def _search(query: str, limit: int, offset: int = 0) -> Optional[List[dict]]:
+    """Search the event history; None when the database has no full-text index."""
+    if not _db_path or not Path(_db_path).exists():
+        return []
+    cur = connections(_db_path).read().cursor()
+    if not search_available(cur):
+        return None
+    return search_events(cur, query, limit, offset, marks=(_MARK_OPEN, _MARK_CLOSE))
+
+
+@app.route("/search")
+def search_page():
+    """Search the newspaper archive: /search?q=words"""
+    query = request.args.get("q", "").strip()
+    results = []
+    if query:
+        try:
+            results = _search(query, 50)
+        except Exception as e:
+            print(f"[web_server] Error searching for {query!r}: {e}")
+            results = []
+    for result in results or []:
+        result["snippet"] = Markup(str(escape(result["snippet"]))
+                                   .replace(_MARK_OPEN, "<mark>").replace(_MARK_CLOSE, "</mark>"))
+    return render_template(
+        "search.html",
+        query=query,
+        results=results,
+        world_name=_world_name,
+    )
+
+
+@app.route("/api/search")
+def api_search():
+    """Ranked search results as JSON: /api/search?q=words[&limit=20&offset=0]"""
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"error": "Missing q parameter"}), 400
+    limit = min(max(request.args.get("limit", 20, type=int), 1), 100)
+    offset = max(request.args.get("offset", 0, type=int), 0)
+    try:
+        results = _search(query, limit, offset)
+    except Exception as e:
+        print(f"[web_server] Error searching for {query!r}: {e}")
+        return jsonify({"error": "Search failed"}), 500
+    if results is None:
+        return jsonify({"error": "Search is not available for this world"}), 404
+    for result in results:
+        result["snippet"] = result["snippet"].replace(_MARK_OPEN, "").replace(_MARK_CLOSE, "")
+    return jsonify({"query": query, "offset": offset, "results": results})
+
+
 @app.route("/event_image/<path:filename>")
 def event_image(filename: str):
     """Serve event images from the world images directory."""
@@ -284,15 +439,19 @@ def event_image(filename: str):
 # ── Server lifecycle ──────────────────────────────────────────────────────────
 
 def start_web_server(db_path: str, world_name: str, images_dir: str,
-                     host: str = "0.0.0.0", port: int = 5000) -> threading.Thread:
+                     host: str = "0.0.0.0", port: int = 5000,
+                     snapshot: Optional[Callable[[], object]] = None) -> threading.Thread:
     """Start the Flask web server in a daemon thread.
 
+    ``snapshot`` returns the generator's current WorldSnapshot; with it the
+    world time and /api/world are served without reading the database.
     Returns the thread object (already started).
     """
-    global _db_path, _world_name, _images_dir
+    global _db_path, _world_name, _images_dir, _snapshot
     _db_path = db_path
     _world_name = world_name
     _images_dir = images_dir
+    _snapshot = snapshot
 
     # Suppress Flask/Werkzeug request logs to keep the console clean
     import logging
@@ -0,0 +1,262 @@
+"""
+Incremental world-state journal for the Fantasy World Event Generator.
+
+Instead of saving the whole world state after every event, the generator
+records each change it makes as a small operation and writes the operations of
+one event as a single journal row. A full checkpoint of the state is written
+only every few hundred events (or once enough journal bytes have piled up), and
+loading a world replays the journal rows written after its latest checkpoint.
+
+Operations are plain JSON lists, so they can be stored, inspected and replayed
+without re-rolling any randomness:
+
+    ["set", path, value]                set the value at ``path``
+    ["add", path, amount]               add ``amount`` to the number at ``path``
+    ["append", path, value]             append to the plain list at ``path``
+    ["pop", path]                       remove the list item or dict key at ``path``
+    ["push", collection, path, entry]   push to the history ring buffer at ``path``
+    ["relation", faction1, faction2, status]
+    ["relation_event", faction1, faction2, entry]
+    ["entities", [name, ...]]           names interned since the previous event
+
+``path`` is a list of keys from the top of world_state, e.g.
+``["character_status", 12, "location"]``.
+
+Because every effect is stored as data, load_world_at() can rebuild the world
+as it was after any event by replaying from the nearest earlier checkpoint.
+"""
+
+import copy
+import json
+import sqlite3
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from db_connections import connections
+from entity_registry import EntityRegistry
+from faction_relations import FactionRelations
+from history import DEFAULT_HISTORY_LIMITS, bounded
+from plot_index import live_plots
+from world_schema import upgrade_state
+from world_sections import read_checkpoint
+
+# Write a full checkpoint after this many journaled events ...
+CHECKPOINT_INTERVAL = 1000
+# ... or once this many journal bytes were written since the last one
+CHECKPOINT_BYTES = 1024 * 1024
+
+
+class WorldJournal:
+    """Collects the operations of the event being applied."""
+
+    def __init__(self):
+        self.ops: List[list] = []
+
+    def __len__(self) -> int:
+        return len(self.ops)
+
+    def set(self, path: Sequence[Any], value: Any) -> None:
+        # Copied so that later changes to the live value are not recorded twice
+        self.ops.append(["set", list(path), copy.deepcopy(value)])
+
+    def add(self, path: Sequence[Any], amount: int) -> None:
+        self.ops.append(["add", list(path), amount])
+
+    def append(self, path: Sequence[Any], value: Any) -> None:
+        self.ops.append(["append", list(path), copy.deepcopy(value)])
+
+    def pop(self, path: Sequence[Any]) -> None:
+        self.ops.append(["pop", list(path)])
+
+    def push(self, collection: str, path: Sequence[Any], entry: Any) -> None:
+        self.ops.append(["push", collection, list(path), entry])
+
+    def relation(self, faction1: int, faction2: int, status: str) -> None:
+        self.ops.append(["relation", faction1, faction2, status])
+
+    def relation_event(self, faction1: int, faction2: int, entry: Dict[str, Any]) -> None:
+        self.ops.append(["relation_event", faction1, faction2, entry])
+
+    def entities(self, names: Sequence[str]) -> None:
+        self.ops.append(["entities", list(names)])
+
+    def take(self) -> List[list]:
+        """Return the recorded operations and start a new, empty delta."""
+        ops, self.ops = self.ops, []
+        return ops
+
+
+def parent_of(state: Dict[str, Any], path: Sequence[Any]):
+    """Return the container holding the last key of ``path``."""
+    target = state
+    for key in path[:-1]:
+        target = target[key]
+    return target
+
+
+def apply_delta(ops: Sequence[list], state: Dict[str, Any], relations, entities,
+                limits: Dict[str, Optional[int]]) -> None:
+    """Re-apply one journal row to ``state``, its FactionRelations and EntityRegistry.
+
+    History pushes respect ``limits`` exactly like the live ring buffers;
+    entries they evict were archived when the event first happened. Values in
+    ``ops`` are moved into the state, not copied, so pass freshly decoded rows.
+    """
+    for op in ops:
+        kind = op[0]
+        if kind == "set":
+            parent_of(state, op[1])[op[1][-1]] = op[2]
+        elif kind == "add":
+            parent_of(state, op[1])[op[1][-1]] += op[2]
+        elif kind == "append":
+            parent_of(state, op[1])[op[1][-1]].append(op[2])
+        elif kind == "pop":
+            del parent_of(state, op[1])[op[1][-1]]
+        elif kind == "push":
+            collection, path, entry = op[1], op[2], op[3]
+            parent = parent_of(state, path)
+            entries = parent[path[-1]]
+            if not isinstance(entries, deque):
+                entries = parent[path[-1]] = bounded(entries, limits.get(collection))
+            if entries.maxlen != 0:
+                entries.append(entry)
+        elif kind == "relation":
+            relations.set_status(op[1], op[2], op[3])
+        elif kind == "relation_event":
+            relations.record(op[1], op[2], op[3])
+        elif kind == "entities":
+            for name in op[1]:
+                entities.intern(name)
+        else:
+            raise ValueError(f"Unknown journal operation {kind!r}")
+
+
+def replay_saved(state: Dict[str, Any], deltas: Iterable[List[list]],
+                 limits: Optional[Dict[str, Optional[int]]] = None) -> None:
+    """Apply journal rows to a state as decoded from its checkpoint, in place.
+
+    The rows after a checkpoint were written in the checkpoint's schema, so
+    for an older checkpoint they must be replayed before upgrade_state().
+    Relations and entity names are left in their saved form.
+    """
+    entities = EntityRegistry(state['entities'])
+    EntityRegistry.restore_int_keys(state)
+    relations = FactionRelations.from_dict(state['relations'])
+    for ops in deltas:
+        apply_delta(ops, state, relations, entities, limits or {})
+    state['entities'] = entities.names
+    state['relations'] = relations.to_dict()
+
+
+# --- reading the world back -------------------------------------------------
+
+def summary_line(event_text: Optional[str]) -> str:
+    """The one-line summary event_history keeps for an events-table row."""
+    return (event_text or '').split('\n', 1)[0]
+
+
+def fetch_event_summaries(cursor: sqlite3.Cursor, event_ids: Iterable[int]) -> Dict[int, str]:
+    """Fetch the summaries of the given event ids from the events table."""
+    event_ids = sorted(event_ids)
+    summaries = {}
+    for start in range(0, len(event_ids), 500):
+        chunk = event_ids[start:start + 500]
+        cursor.execute(f"SELECT id, event_text FROM events WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+        summaries.update((event_id, summary_line(text)) for event_id, text in cursor.fetchall())
+    return summaries
+
+
+def named_world_state(state: Dict[str, Any], relations: FactionRelations, entities: EntityRegistry,
+                      fetch_summaries: Callable[[Iterable[int]], Dict[int, str]]) -> Dict[str, Any]:
+    """Return a copy of ``state`` with entity IDs translated back to names.
+
+    'relations' becomes a list of the non-neutral faction pairs, each a dict
+    with 'factions' (two names), 'status' and 'events', and 'active_plots'
+    keeps only the live plots. ``fetch_summaries`` is asked for the text of
+    entity events no longer held in event_history.
+    """
+    known = {e['event_id'] for e in state['event_history']}
+    missing = {
+        e['event_id']
+        for section in ('character_status', 'location_status')
+        for data in state[section].values()
+        for e in data['events'] if e['event_id'] not in known
+    }
+    view = entities.named_view(state, fetch_summaries(missing) if missing else {})
+    name = entities.name
+    view['relations'] = [
+        {'factions': [name(faction1), name(faction2)], 'status': status,
+         'events': relations.history(faction1, faction2)}
+        for faction1, faction2, status in relations.notable_pairs()
+    ]
+    view['active_plots'] = live_plots(view['active_plots'])
+    return view
+
+
+def load_world_at(db_path: str, event_id: int,
+                  limits: Optional[Dict[str, Optional[int]]] = None) -> Optional[Dict[str, Any]]:
+    """Rebuild the named world state as it was right after event ``event_id``.
+
+    Starts from the latest checkpoint written at or before that event and
+    replays the journal up to it. Returns None when no such checkpoint exists
+    (e.g. worlds saved before the journal, for pre-journal events whose
+    snapshot was not kept), or when events between the checkpoint and
+    ``event_id`` were lost by the background writer.
+    """
+    limits = dict(DEFAULT_HISTORY_LIMITS, **(limits or {}))
+    conn = connections(db_path).read()
+    cursor = conn.cursor()
+    try:
+        cursor.execute('''
+        SELECT id, state_json, state_data, codec, schema_version, journal_id, event_id FROM world_state
+        WHERE event_id IS NOT NULL AND event_id <= ?
+        ORDER BY id DESC
+        LIMIT 1
+        ''', (event_id,))
+        checkpoint = cursor.fetchone()
+        if not checkpoint:
+            return None
+
+        checkpoint_id, state_json, state_data, codec, version, journal_id, checkpoint_event_id = checkpoint
+        # Per-event snapshots from before the journal have nothing to replay
+        # from, so they only answer for their own event (retention may have
+        # removed the ones in between)
+        if journal_id is None and checkpoint_event_id != event_id:
+            return None
+        state = read_checkpoint(cursor, checkpoint_id, state_json, state_data, codec)
+
+        # Journal rows are in event order: stop at the first one past event_id.
+        # Every event writes one, so skipped IDs are events the background
+        # writer lost; the state after them cannot be rebuilt from here
+        cursor.execute('''
+        SELECT event_id, delta_json FROM world_journal
+        WHERE id > ?
+        ORDER BY id
+        ''', (journal_id or 0,))
+        rows = []
+        last_event_id = checkpoint_event_id
+        for row_event_id, delta_json in cursor:
+            if last_event_id < event_id and row_event_id > last_event_id + 1:
+                return None
+            if row_event_id > event_id:
+                break
+            rows.append(delta_json)
+            last_event_id = row_event_id
+        if rows:
+            # One decode for all rows is much cheaper than one per row
+            replay_saved(state, json.loads(f"[{','.join(rows)}]"), limits)
+
+        state = upgrade_state(state, version)
+        entities = EntityRegistry(state['entities'])
+        state['entities'] = entities.names
+        EntityRegistry.restore_int_keys(state)
+        relations = FactionRelations.from_dict(state.pop('relations', {}))
+        relations.set_history_limit(limits['relation_events'])
+
+        view = named_world_state(state, relations, entities,
+                                 lambda ids: fetch_event_summaries(conn.cursor(), ids))
+        view['event_id'] = event_id
+        return view
+    finally:
+        # Ends the read of the journal rows left after the break above
+        cursor.close()
@@ -0,0 +1,132 @@
+"""
+Slotted record types for the per-entity parts of the world state.
+
+world_state['character_status'] and world_state['location_status'] map entity
+IDs to one record each, and world_state['active_plots'] is a list of plot
+records. With thousands of characters, a dict per entry (with its own copy of
+every key) costs several times the memory of a ``__slots__`` object, and
+attribute access on a slotted object is cheaper than a dict lookup.
+
+Records are only used in the live state. Checkpoints, journal rows and the
+named views handed to templates and the AI hold plain dicts: to_dict() and
+from_dict() convert at that boundary, and the codecs call to_dict() for any
+record they meet. Records also answer ``record[field]``, so journal paths such
+as ``["character_status", 12, "location"]`` reach into them unchanged.
+"""
+
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+
+class Record:
+    """Base class: a fixed set of fields, each with a default factory."""
+
+    __slots__ = ()
+    # (field, default factory) pairs, in the order of __slots__
+    FIELDS: Tuple[Tuple[str, Callable[[], Any]], ...] = ()
+
+    def __init__(self, **fields: Any):
+        for field, default in self.FIELDS:
+            setattr(self, field, fields[field] if field in fields else default())
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]):
+        """Build a record from a saved dict; unknown keys are dropped, missing ones defaulted."""
+        return cls(**data)
+
+    @classmethod
+    def coerce(cls, value):
+        """Return ``value`` as a record, converting it if it is still a dict."""
+        return value if isinstance(value, cls) else cls.from_dict(value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field, _ in self.FIELDS}
+
+    # --- mapping-style access for journal paths and views --------------------
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__slots__)
+
+    def keys(self) -> Tuple[str, ...]:
+        return self.__slots__
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def __eq__(self, other: Any) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    __hash__ = None  # mutable
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{field}={getattr(self, field)!r}" for field, _ in self.FIELDS)
+        return f"{type(self).__name__}({fields})"
+
+
+class CharacterState(Record):
+    """One entry of world_state['character_status']."""
+
+    FIELDS = (
+        ("type", str),
+        ("location", lambda: None),
+        ("last_seen", str),
+        ("events", list),
+        ("event_total", int),
+        ("developments", list),
+    )
+    __slots__ = tuple(field for field, _ in FIELDS)
+
+
+class LocationState(Record):
+    """One entry of world_state['location_status']."""
+
+    FIELDS = (
+        ("events", list),
+        ("event_total", int),
+        ("notable_features", list),
+        ("characters_present", list),
+    )
+    __slots__ = tuple(field for field, _ in FIELDS)
+
+
+class PlotState(Record):
+    """One entry of world_state['active_plots']."""
+
+    FIELDS = (
+        ("id", int),
+        ("name", str),
+        ("description", str),
+        ("keywords", list),
+        ("status", lambda: "active"),
+        ("events", list),
+        ("last_event", int),
+        ("characters", list),
+        ("locations", list),
+    )
+    __slots__ = tuple(field for field, _ in FIELDS)
+
+
+def to_records(entries: Dict[Any, Any], record_type: type) -> Dict[Any, Any]:
+    """Return ``entries`` (ID -> dict or record) with every value a ``record_type``."""
+    coerce = record_type.coerce
+    return {key: coerce(value) for key, value in entries.items()}
+
+
+def plots_to_records(plots: Iterable[Any]) -> List[PlotState]:
+    """Return a plot list with every plot a PlotState."""
+    return [PlotState.coerce(plot) for plot in plots]
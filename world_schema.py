@@ -0,0 +1,84 @@
+"""
+World-state schema versions for the Fantasy World Event Generator.
+
+Every world_state checkpoint records the schema version it was written with.
+upgrade_state() brings an older state up to SCHEMA_VERSION by running each
+migration after its version in turn, so the generator itself only ever deals
+with the current layout. Rows saved before versions were recorded count as
+version 0; the migrations check what is actually there, so they are safe to
+run on any of those older layouts.
+
+Versions:
+    1 - name-keyed state, with events_since_season_change and rng_seed
+    2 - entities interned to integer IDs, relations as a FactionRelations dict
+    3 - bounded histories: event_total counters and every world history present
+    4 - plot lifecycle: plot ids, status and last_event, word keywords, next_plot_id
+"""
+
+from typing import Any, Callable, Dict, List, Optional
+
+from entity_registry import EntityRegistry
+from faction_relations import FactionRelations
+from fantasy_events_data import factions as WORLD_FACTIONS
+from history import WORLD_HISTORIES
+from plot_index import plot_keywords
+
+SCHEMA_VERSION = 4
+
+
+def _to_v1(state: Dict[str, Any]) -> None:
+    state.setdefault('events_since_season_change', 0)
+    # None means "not seeded yet"; the generator picks a seed when it loads the world
+    state.setdefault('rng_seed', None)
+
+
+def _to_v2(state: Dict[str, Any]) -> None:
+    relations = state.get('relations', {})
+    if 'entities' not in state:
+        entities = EntityRegistry()
+        # Relation keys joined two faction names with "_"
+        pairs = entities.intern_state(state, WORLD_FACTIONS)
+        state['entities'] = entities.names
+        state['relations'] = FactionRelations.from_legacy(pairs).to_dict()
+    elif 'factions' not in relations:
+        # Interned before the relation matrix, keyed "<id>_<id>"
+        pairs = []
+        for key, data in relations.items():
+            first, _, second = key.partition('_')
+            pairs.append((int(first), int(second), data))
+        state['relations'] = FactionRelations.from_legacy(pairs).to_dict()
+
+
+def _to_v3(state: Dict[str, Any]) -> None:
+    for collection in WORLD_HISTORIES:
+        state.setdefault(collection, [])
+    for data in state['character_status'].values():
+        data.setdefault('event_total', len(data.get('events', [])))
+        data.setdefault('developments', [])
+    for data in state['location_status'].values():
+        data.setdefault('event_total', len(data.get('events', [])))
+
+
+def _to_v4(state: Dict[str, Any]) -> None:
+    for plot_id, plot in enumerate(state['active_plots']):
+        plot['id'] = plot_id
+        plot.setdefault('status', 'active')
+        plot['last_event'] = max(plot['events'], default=0)
+        # Keywords used to be raw words, punctuation and all
+        plot['keywords'] = plot_keywords(' '.join(plot.get('keywords', [])))
+    state['next_plot_id'] = len(state['active_plots'])
+
+
+# MIGRATIONS[n] upgrades a version-n state to version n + 1
+MIGRATIONS: List[Callable[[Dict[str, Any]], None]] = [_to_v1, _to_v2, _to_v3, _to_v4]
+
+
+def upgrade_state(state: Dict[str, Any], version: Optional[int]) -> Dict[str, Any]:
+    """Upgrade ``state`` in place from ``version`` (None for unversioned rows) and return it."""
+    version = version or 0
+    if version > SCHEMA_VERSION:
+        raise ValueError(f"World state schema version {version} is newer than this generator's "
+                         f"({SCHEMA_VERSION}); please update the generator")
+    for migrate in MIGRATIONS[version:]:
+        migrate(state)
+    return state
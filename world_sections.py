@@ -0,0 +1,202 @@
+"""
+Section-level world-state storage for the Fantasy World Event Generator.
+
+A checkpoint is not stored as one big document but as independent sections:
+
+    world       - entity names, the RNG seed, the world description
+    time        - calendar, weather and the season counter
+    relations   - the FactionRelations matrix and per-pair logs
+    characters  - character_status
+    locations   - location_status
+    plots       - active_plots and the next plot ID
+    history     - event_history and the other world histories
+
+Each section is a row of the world_state_sections table. A checkpoint only
+writes the sections that changed since the previous one; a section it did not
+write is the newest row of that section written at or before it. Journal
+operations are routed to sections the same way, so the generator knows which
+sections are dirty and can replay the journal section by section.
+
+LazyWorldState loads a section the first time one of its keys is read, so a
+world starts without decoding (or replaying into) character, location and
+history data it has not touched yet.
+"""
+
+import sqlite3
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from db_connections import connections
+from history import WORLD_HISTORIES
+from state_codec import decode_state, row_payload, state_columns
+
+# Top-level world_state keys by section; keys not listed belong to "world"
+SECTIONS: Dict[str, Tuple[str, ...]] = {
+    "world": ("entities", "rng_seed", "world_description"),
+    "time": ("time", "events_since_season_change"),
+    "relations": ("relations",),
+    "characters": ("character_status",),
+    "locations": ("location_status",),
+    "plots": ("active_plots", "next_plot_id"),
+    "history": WORLD_HISTORIES,
+}
+_SECTION_OF = {key: section for section, keys in SECTIONS.items() for key in keys}
+
+
+def section_of(key: str) -> str:
+    """Return the section a top-level world_state key is stored in."""
+    return _SECTION_OF.get(key, "world")
+
+
+def split_state(state: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Split a whole world state into its sections (every section is present)."""
+    sections: Dict[str, Dict[str, Any]] = {section: {} for section in SECTIONS}
+    for key, value in state.items():
+        sections[section_of(key)][key] = value
+    return sections
+
+
+def op_section(op: list) -> str:
+    """Return the section a journal operation changes."""
+    kind = op[0]
+    if kind in ("set", "add", "append", "pop"):
+        return section_of(op[1][0])
+    if kind == "push":
+        return section_of(op[2][0])
+    if kind in ("relation", "relation_event"):
+        return "relations"
+    return "world"
+
+
+def split_ops(deltas: Iterable[List[list]]) -> Dict[str, List[list]]:
+    """Group the operations of journal rows by section, keeping their order."""
+    ops_by_section: Dict[str, List[list]] = {}
+    for ops in deltas:
+        for op in ops:
+            ops_by_section.setdefault(op_section(op), []).append(op)
+    return ops_by_section
+
+
+# --- database rows ------------------------------------------------------------
+
+def read_section(cursor: sqlite3.Cursor, checkpoint_id: int, section: str) -> Dict[str, Any]:
+    """Return one section as of checkpoint ``checkpoint_id`` ({} if it was never written)."""
+    cursor.execute('''
+    SELECT state_json, state_data, codec FROM world_state_sections
+    WHERE section = ? AND checkpoint_id <= ?
+    ORDER BY checkpoint_id DESC
+    LIMIT 1
+    ''', (section, checkpoint_id))
+    row = cursor.fetchone()
+    if not row:
+        return {}
+    return decode_state(row_payload(row[0], row[1]), row[2])
+
+
+def read_checkpoint(cursor: sqlite3.Cursor, checkpoint_id: int, state_json: Optional[str],
+                    state_data: Optional[bytes], codec: Optional[str]) -> Dict[str, Any]:
+    """Return the whole state of a world_state row, stored in one piece or as sections."""
+    payload = row_payload(state_json, state_data)
+    if payload is not None:
+        return decode_state(payload, codec)
+    state: Dict[str, Any] = {}
+    for section in SECTIONS:
+        state.update(read_section(cursor, checkpoint_id, section))
+    return state
+
+
+def encode_sections(sections: Dict[str, Dict[str, Any]], codec: str) -> List[Tuple[str, Optional[str], Optional[bytes]]]:
+    """Encode ``sections`` with ``codec`` as ``(section, state_json, state_data)`` rows for write_sections()."""
+    return [(section, *state_columns(data, codec)) for section, data in sections.items()]
+
+
+def write_sections(cursor: sqlite3.Cursor, checkpoint_id: int,
+                   encoded: List[Tuple[str, Optional[str], Optional[bytes]]], codec: str) -> int:
+    """Store sections encoded by encode_sections() as part of checkpoint
+    ``checkpoint_id``; returns the bytes written."""
+    rows = []
+    written = 0
+    for section, state_json, state_data in encoded:
+        written += len(state_json) if state_json is not None else len(state_data)
+        rows.append((checkpoint_id, section, state_json, state_data, codec))
+    cursor.executemany('''
+    INSERT INTO world_state_sections (checkpoint_id, section, state_json, state_data, codec)
+    VALUES (?, ?, ?, ?, ?)
+    ''', rows)
+    return written
+
+
+def section_reader(db_path: str, checkpoint_id: int) -> Callable[[str], Dict[str, Any]]:
+    """Return a function reading sections of checkpoint ``checkpoint_id`` on demand."""
+    def read(section: str) -> Dict[str, Any]:
+        return read_section(connections(db_path).read().cursor(), checkpoint_id, section)
+    return read
+
+
+# --- lazily loaded state --------------------------------------------------------
+
+class LazyWorldState(dict):
+    """A world_state dict that fetches each section on first access.
+
+    ``read_section(section)`` returns the section's keys as stored;
+    ``prepare(section, data)``, if set, may adjust them in place (restore ID
+    keys, bound histories, replay the journal) before they become visible.
+    Item access, ``get`` and ``in`` load what they need. Anything that walks
+    the whole dict -- iteration, ``dict(state)``, serialization -- must call
+    load_all() first.
+    """
+
+    def __init__(self, read_section: Callable[[str], Dict[str, Any]],
+                 prepare: Optional[Callable[[str, Dict[str, Any]], None]] = None):
+        super().__init__()
+        self.read_section = read_section
+        self.prepare = prepare
+        self.loaded = set()
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any], prepare=None) -> "LazyWorldState":
+        """Wrap a state that is already fully decoded, e.g. an old one-piece checkpoint."""
+        sections = split_state(state)
+        return cls(lambda section: sections.pop(section, {}), prepare)
+
+    def load(self, section: str) -> None:
+        """Load ``section`` unless it already is."""
+        if section in self.loaded:
+            return
+        # Marked first: prepare() may read other keys of the same section
+        self.loaded.add(section)
+        try:
+            data = self.read_section(section)
+            if self.prepare:
+                self.prepare(section, data)
+        except Exception:
+            self.loaded.discard(section)
+            raise
+        self.update(data)
+
+    def load_all(self) -> "LazyWorldState":
+        """Load every section that is not loaded yet and return self."""
+        for section in SECTIONS:
+            self.load(section)
+        return self
+
+    def section(self, section: str) -> Dict[str, Any]:
+        """Return the keys of ``section``, loading it if needed."""
+        self.load(section)
+        return {key: value for key, value in self.items() if section_of(key) == section}
+
+    def __missing__(self, key):
+        section = section_of(key)
+        if section in self.loaded:
+            raise KeyError(key)
+        self.load(section)
+        return self[key]
+
+    def __contains__(self, key) -> bool:
+        self.load(section_of(key))
+        return super().__contains__(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
@@ -0,0 +1,249 @@
+"""
+Copy-on-write world-state snapshots for the Fantasy World Event Generator.
+
+The generator changes world_state in place while it applies an event. Other
+threads (the web server, and anything else that only reads) must not see it
+half-way through, and locking every access would serialize them with the
+event loop. Instead, after each event the generator publishes a WorldSnapshot:
+a read-only copy of the state that is never changed afterwards. Publishing is
+a single attribute assignment, so readers just take the current snapshot
+without any lock and keep a consistent view for as long as they hold it.
+
+Snapshots share structure with the previous one. The journal operations of an
+event say which keys it touched; every other key is carried over as is. The
+ID-keyed maps (character_status, location_status) are split into chunks of
+CHUNK_SIZE IDs, and only the chunks holding a changed entry are copied, so
+publishing after an event costs about the same with 50 characters as with
+50,000.
+
+Snapshot values are tuples and read-only mappings. History entries (the small
+dicts inside event lists) are shared with the live state; the generator never
+changes an entry once it is recorded.
+"""
+
+import heapq
+from collections import deque
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from plot_index import live_plots
+from world_records import Record
+
+# IDs per chunk of an ID-keyed map (a power of two)
+CHUNK_BITS = 8
+CHUNK_SIZE = 1 << CHUNK_BITS
+
+# world_state keys stored as ChunkedMap
+ID_KEYED = ("character_status", "location_status")
+
+_REMOVED = object()
+_SEQUENCES = (list, deque)
+
+
+def frozen(value: Any) -> Any:
+    """Return a read-only copy of a world_state value.
+
+    Dicts and records become read-only mappings, lists and ring buffers
+    tuples; the items of lists are not copied (see the module docstring).
+    """
+    if isinstance(value, Record):
+        # Record fields are flat: scalars, lists and ring buffers
+        return MappingProxyType({field: tuple(item) if isinstance(item, _SEQUENCES) else item
+                                 for field, item in value.to_dict().items()})
+    if isinstance(value, dict):
+        return MappingProxyType({key: frozen(item) for key, item in value.items()})
+    if isinstance(value, _SEQUENCES):
+        return tuple(value)
+    return value
+
+
+class ChunkedMap(Mapping):
+    """Read-only int-keyed mapping stored as chunks of CHUNK_SIZE keys.
+
+    evolve() returns a new map that shares every chunk without a changed key.
+    """
+
+    __slots__ = ("_chunks", "_len")
+
+    def __init__(self, chunks: Optional[Dict[int, Dict[int, Any]]] = None, length: int = 0):
+        self._chunks = chunks or {}
+        self._len = length
+
+    @classmethod
+    def build(cls, items: Iterable[Tuple[int, Any]]) -> "ChunkedMap":
+        chunks: Dict[int, Dict[int, Any]] = {}
+        length = 0
+        for key, value in items:
+            chunks.setdefault(key >> CHUNK_BITS, {})[key] = value
+            length += 1
+        return cls(chunks, length)
+
+    def evolve(self, changes: Dict[int, Any]) -> "ChunkedMap":
+        """Return a copy with ``changes`` applied (a value of _REMOVED deletes the key)."""
+        chunks = dict(self._chunks)
+        length = self._len
+        copied = set()
+        for key, value in changes.items():
+            index = key >> CHUNK_BITS
+            if index not in copied:
+                chunks[index] = dict(chunks.get(index, ()))
+                copied.add(index)
+            chunk = chunks[index]
+            if value is _REMOVED:
+                if chunk.pop(key, _REMOVED) is not _REMOVED:
+                    length -= 1
+            else:
+                if key not in chunk:
+                    length += 1
+                chunk[key] = value
+        return ChunkedMap(chunks, length)
+
+    def __getitem__(self, key: int) -> Any:
+        try:
+            return self._chunks[key >> CHUNK_BITS][key]
+        except (KeyError, TypeError):
+            raise KeyError(key) from None
+
+    def __iter__(self) -> Iterator[int]:
+        for index in sorted(self._chunks):
+            yield from self._chunks[index]
+
+    def __len__(self) -> int:
+        return self._len
+
+    def items(self) -> Iterator[Tuple[int, Any]]:
+        for index in sorted(self._chunks):
+            yield from self._chunks[index].items()
+
+    def values(self) -> Iterator[Any]:
+        for index in sorted(self._chunks):
+            yield from self._chunks[index].values()
+
+
+class WorldSnapshot:
+    """One published, read-only version of the world state.
+
+    ``snapshot[key]`` returns a top-level world_state key; entity IDs are
+    translated with name(). ``relations`` holds ``(faction1, faction2,
+    status, events)`` for every non-neutral faction pair.
+    """
+
+    __slots__ = ("event_count", "state", "relations", "_names", "_name_count")
+
+    def __init__(self, event_count: int, state: Mapping[str, Any],
+                 relations: Tuple[Tuple[int, int, str, tuple], ...], names: List[str]):
+        self.event_count = event_count
+        self.state = MappingProxyType(dict(state))
+        self.relations = relations
+        # The registry's name list only ever grows, so it is shared, not copied
+        self._names = names
+        self._name_count = len(names)
+
+    def __getitem__(self, key: str) -> Any:
+        return self.state[key]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.state.get(key, default)
+
+    def name(self, entity_id: Optional[int]) -> str:
+        if entity_id is None or entity_id >= self._name_count:
+            return ""
+        return self._names[entity_id]
+
+    def summary(self, top: int = 10) -> Dict[str, Any]:
+        """Return a JSON-ready overview: time, the busiest characters and
+        locations, notable relations, live plots and the latest events."""
+        name = self.name
+
+        def busiest(entries: Mapping[int, Mapping[str, Any]]) -> List[Tuple[int, Mapping[str, Any]]]:
+            return heapq.nlargest(top, entries.items(), key=lambda item: item[1]["event_total"])
+
+        return {
+            "event_count": self.event_count,
+            "time": dict(self.state["time"]),
+            "world_description": self.state.get("world_description", ""),
+            "character_count": len(self.state["character_status"]),
+            "location_count": len(self.state["location_status"]),
+            "characters": [
+                {"name": name(cid), "type": data["type"], "location": name(data["location"]),
+                 "event_total": data["event_total"]}
+                for cid, data in busiest(self.state["character_status"])
+            ],
+            "locations": [
+                {"name": name(lid), "event_total": data["event_total"],
+                 "characters_present": [name(c) for c in data["characters_present"]]}
+                for lid, data in busiest(self.state["location_status"])
+            ],
+            "relations": [
+                {"factions": [name(faction1), name(faction2)], "status": status}
+                for faction1, faction2, status, _ in self.relations
+            ],
+            "active_plots": [
+                {"name": plot["name"], "description": plot["description"], "events": list(plot["events"])}
+                for plot in live_plots(self.state["active_plots"])
+            ],
+            "recent_events": [dict(entry) for entry in reversed(self.state["event_history"][-top:])],
+        }
+
+
+# --- building snapshots ------------------------------------------------------------
+
+def _frozen_key(key: str, value: Any) -> Any:
+    if key in ID_KEYED:
+        return ChunkedMap.build((entry_id, frozen(entry)) for entry_id, entry in value.items())
+    if key == "active_plots":
+        return tuple(frozen(plot) for plot in value)
+    return frozen(value)
+
+
+def _frozen_relations(relations) -> Tuple[Tuple[int, int, str, tuple], ...]:
+    return tuple((faction1, faction2, status, tuple(relations.history(faction1, faction2)))
+                 for faction1, faction2, status in relations.notable_pairs())
+
+
+def take_snapshot(event_count: int, state: Mapping[str, Any], relations, names: List[str]) -> WorldSnapshot:
+    """Build a snapshot of the whole state (every section must be loaded)."""
+    return WorldSnapshot(event_count,
+                         {key: _frozen_key(key, value) for key, value in state.items() if key != "entities"},
+                         _frozen_relations(relations), names)
+
+
+def next_snapshot(previous: WorldSnapshot, ops: Sequence[list], event_count: int,
+                  state: Mapping[str, Any], relations, names: List[str]) -> WorldSnapshot:
+    """Build the snapshot after an event from the previous one and the event's journal operations.
+
+    Only the keys (and, for ID-keyed maps, the entries) the operations touched
+    are copied from ``state``.
+    """
+    changed_keys = set()
+    changed_ids: Dict[str, set] = {}
+    relations_changed = False
+    for op in ops:
+        kind = op[0]
+        if kind in ("set", "add", "append", "pop"):
+            path = op[1]
+        elif kind == "push":
+            path = op[2]
+        else:
+            relations_changed = relations_changed or kind in ("relation", "relation_event")
+            continue
+        key = path[0]
+        if key in ID_KEYED and len(path) > 1:
+            changed_ids.setdefault(key, set()).add(path[1])
+        else:
+            changed_keys.add(key)
+
+    new_state = dict(previous.state)
+    for key in changed_keys:
+        if key in state:
+            new_state[key] = _frozen_key(key, state[key])
+        else:
+            new_state.pop(key, None)
+    for key, ids in changed_ids.items():
+        if key in changed_keys:
+            continue
+        entries = state[key]
+        new_state[key] = new_state[key].evolve(
+            {entry_id: frozen(entries[entry_id]) if entry_id in entries else _REMOVED for entry_id in ids})
+    return WorldSnapshot(event_count, new_state,
+                         _frozen_relations(relations) if relations_changed else previous.relations, names)